@@ -1,52 +1,35 @@
-import pandas as pd
+"""Ingesta del dataset de razas: CSV de origen -> archivo columnar tipado (int8)
+
+Uso:
+    python adapt_kaggle_dataset.py                            # data/breed_traits.csv -> data/dog_breeds_dataset.col
+    python adapt_kaggle_dataset.py refugios.csv --chunk-size 200000
+    python adapt_kaggle_dataset.py data/dog_breeds_dataset.csv     # convierte un CSV ya en formato del proyecto
+    python adapt_kaggle_dataset.py --csv data/dog_breeds_dataset.csv  # exporta además un CSV legible
+
+Acepta el CSV de Kaggle (breed_traits.csv, columnas 'Breed', 'Energy Level',
+...) o uno ya en el formato del proyecto (breed + 10 características). El
+origen se lee por bloques de --chunk-size filas y cada bloque se adapta con
+operaciones vectorizadas (el tamaño se estima una vez por nombre distinto,
+no por fila). Kaggle usa 0 cuando no hay dato (p. ej. Plott Hounds): se lleva
+al mínimo de la escala 1-5. Las filas sin nombre, con características vacías
+o con otros valores fuera de 1-5 se descartan. El resultado es un archivo
+columnar versionado que el servidor y analytics mapean en memoria sin volver
+a parsear texto; el origen nunca se sobrescribe.
+"""
+import argparse
 import os
+import sys
+import time
 
-print("=== ADAPTANDO DATASET DE KAGGLE AL FORMATO DEL PROYECTO ===\n")
-
-# Leer el dataset descargado de Kaggle
-kaggle_df = pd.read_csv('data/dog_breeds_dataset.csv')
-
-print(f"Dataset original: {len(kaggle_df)} razas")
-print(f"Columnas originales: {list(kaggle_df.columns)}\n")
-
-# Mapear columnas de Kaggle a nuestro formato
-# El dataset de Kaggle tiene columnas diferentes, necesitamos mapearlas
-column_mapping = {
-    'Breed': 'breed',
-    'Affectionate With Family': 'good_with_kids',  # Aproximación
-    'Good With Young Children': 'good_with_kids',
-    'Good With Other Dogs': 'good_with_kids',  # Usaremos promedio
-    'Trainability Level': 'trainability',
-    'Energy Level': 'energy_level',
-    'Barking Level': 'barking_tendency',
-    'Coat Grooming Frequency': 'grooming_needs',
-    'Adaptability Level': 'apartment_friendly',
-    'Watchdog/Protective Nature': 'watchdog_ability',
-}
-
-# Crear el nuevo DataFrame con el formato adaptado
-adapted_df = pd.DataFrame()
-
-# Breed (limpiar nombres)
-adapted_df['breed'] = kaggle_df['Breed'].str.strip()
+import numpy as np
+import pandas as pd
 
-# Características numéricas (todas en escala 1-5)
-adapted_df['trainability'] = kaggle_df['Trainability Level']
-adapted_df['energy_level'] = kaggle_df['Energy Level']
-adapted_df['barking_tendency'] = kaggle_df['Barking Level']
-adapted_df['grooming_needs'] = kaggle_df['Coat Grooming Frequency']
-adapted_df['apartment_friendly'] = kaggle_df['Adaptability Level']
-adapted_df['watchdog_ability'] = kaggle_df['Watchdog/Protective Nature']
+from controllers.columnar_dataset import ColumnarWriter, load_columnar, COLUMNAR_PATH, CSV_PATH, FEATURES, TRAIT_RANGE
 
-# Good with kids (promedio de familia, niños pequeños)
-adapted_df['good_with_kids'] = (
-    kaggle_df['Affectionate With Family'] + 
-    kaggle_df['Good With Young Children']
-) / 2
-adapted_df['good_with_kids'] = adapted_df['good_with_kids'].round().astype(int)
+RAW_PATH = 'data/breed_traits.csv'
 
 # Size - Estimamos basándonos en el nombre de la raza (pequeño, mediano, grande)
-# Para razas conocidas
+# Para razas conocidas; gana la primera clave contenida en el nombre
 size_mapping = {
     'Chihuahuas': 1, 'Toy': 1, 'Miniature': 1, 'Yorkshire': 1, 'Pomeranian': 1, 'Maltese': 1,
     'Small': 2, 'Terrier': 2, 'Dachshund': 2, 'Bulldog': 2, 'Boston': 2, 'Shih Tzu': 2,
@@ -54,45 +37,119 @@ size_mapping = {
     'Large': 4, 'Labrador': 4, 'Golden': 4, 'German Shepherd': 4, 'Boxer': 4, 'Rottweiler': 4, 'Husky': 4,
     'Giant': 5, 'Great Dane': 5, 'Mastiff': 5, 'Saint Bernard': 5
 }
-
-def estimate_size(breed_name):
-    breed_lower = breed_name.lower()
-    for key, size in size_mapping.items():
-        if key.lower() in breed_lower:
-            return size
-    return 3  # Default mediano
-
-adapted_df['size'] = adapted_df['breed'].apply(estimate_size)
-
-# Exercise needs - Basado en energy level
-adapted_df['exercise_needs'] = adapted_df['energy_level']
-
-# Good alone - Estimamos inverso a affectionate (más independiente = mejor solo)
-adapted_df['good_alone'] = 5 - kaggle_df['Affectionate With Family']
-adapted_df['good_alone'] = adapted_df['good_alone'].clip(1, 5)
-
-    # Reordenar columnas en el orden correcto
-final_df = adapted_df[[
-    'breed', 'size', 'energy_level', 'trainability', 'good_with_kids',
-    'exercise_needs', 'barking_tendency', 'grooming_needs', 
-    'apartment_friendly', 'good_alone', 'watchdog_ability'
-]]
-
-# Guardar el dataset adaptado directamente como el dataset principal
-output_path = 'data/dog_breeds_dataset.csv'
-final_df.to_csv(output_path, index=False)
-
-print(f"✓ Dataset adaptado guardado en: {output_path}")
-print(f"Total de razas: {len(final_df)}")
-print(f"Columnas finales: {list(final_df.columns)}")
-
-print("\n=== PRIMERAS 10 RAZAS ADAPTADAS ===")
-print(final_df.head(10))
-
-print("\n=== ESTADÍSTICAS ===")
-print(final_df.describe())
-
-print("\nDataset de Kaggle adaptado y listo para usar!")
-print("El archivo data/dog_breeds_dataset.csv contiene las 195 razas del AKC")
-print("\nPara entrenar los modelos con este dataset, ejecuta:")
-print("python train_dog_model.py")
\ No newline at end of file
+DEFAULT_SIZE = 3  # Default mediano
+MISSING_VALUE = 0  # "Sin dato" en breed_traits.csv
+
+
+def estimate_sizes(breeds: pd.Series) -> np.ndarray:
+    """Tamaño estimado por nombre, vectorizado y calculado una vez por nombre distinto"""
+    codes, uniques = pd.factorize(breeds.str.lower())
+    lowered = pd.Series(uniques, dtype=object)
+    sizes = np.full(len(uniques), DEFAULT_SIZE, dtype=np.int8)
+    # En orden inverso: la asignación de la primera clave del diccionario queda al final y gana
+    for key, size in reversed(list(size_mapping.items())):
+        sizes[lowered.str.contains(key.lower(), regex=False).to_numpy()] = size
+    return sizes[codes]
+
+
+def adapt_kaggle_chunk(kaggle_df: pd.DataFrame) -> pd.DataFrame:
+    """Mapea un bloque de breed_traits.csv al formato del proyecto"""
+    adapted_df = pd.DataFrame(index=kaggle_df.index)
+    # Breed (limpiar nombres)
+    adapted_df['breed'] = kaggle_df['Breed'].str.strip()
+
+    # Características numéricas (todas en escala 1-5)
+    adapted_df['trainability'] = kaggle_df['Trainability Level']
+    adapted_df['energy_level'] = kaggle_df['Energy Level']
+    adapted_df['barking_tendency'] = kaggle_df['Barking Level']
+    adapted_df['grooming_needs'] = kaggle_df['Coat Grooming Frequency']
+    adapted_df['apartment_friendly'] = kaggle_df['Adaptability Level']
+    adapted_df['watchdog_ability'] = kaggle_df['Watchdog/Protective Nature']
+
+    # Good with kids (promedio de familia, niños pequeños)
+    adapted_df['good_with_kids'] = ((kaggle_df['Affectionate With Family'] +
+                                     kaggle_df['Good With Young Children']) / 2).round()
+
+    adapted_df['size'] = estimate_sizes(adapted_df['breed'].fillna(''))
+
+    # Exercise needs - Basado en energy level
+    adapted_df['exercise_needs'] = adapted_df['energy_level']
+
+    # Good alone - Estimamos inverso a affectionate (más independiente = mejor solo)
+    adapted_df['good_alone'] = (5 - kaggle_df['Affectionate With Family']).clip(1, 5)
+    return adapted_df[['breed'] + FEATURES]
+
+
+def clean_chunk(df: pd.DataFrame):
+    """(nombres, matriz int8 de características, filas descartadas) de un bloque adaptado"""
+    traits = df[FEATURES].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+    low, high = TRAIT_RANGE
+    # Sin dato -> mínimo de la escala, como hace good_alone con clip(1, 5)
+    traits = np.where(traits == MISSING_VALUE, low, traits)
+    valid = df['breed'].notna().to_numpy() & np.isfinite(traits).all(axis=1) \
+        & ((traits >= low) & (traits <= high)).all(axis=1)
+    breeds = df['breed'][valid].astype(str).tolist()
+    return breeds, np.rint(traits[valid]).astype(np.int8), int((~valid).sum())
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Ingesta por bloques del dataset de razas a formato columnar")
+    parser.add_argument('source', nargs='?', help=f"CSV de origen (por defecto {RAW_PATH} o {CSV_PATH})")
+    parser.add_argument('--output', default=COLUMNAR_PATH)
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    parser.add_argument('--csv', help="Exporta también el resultado como CSV en esta ruta")
+    args = parser.parse_args(argv)
+
+    source = args.source or (RAW_PATH if os.path.exists(RAW_PATH) else CSV_PATH)
+    print("=== INGESTA DEL DATASET DE RAZAS AL FORMATO COLUMNAR ===\n")
+    columns = list(pd.read_csv(source, nrows=0).columns)
+    kaggle = 'Breed' in columns
+    if not kaggle and not {'breed', *FEATURES} <= set(columns):
+        print(f"❌ {source} no tiene ni las columnas de Kaggle ni las del proyecto: {columns}")
+        return 1
+    print(f"Origen: {source} ({'formato Kaggle' if kaggle else 'formato del proyecto'})")
+
+    started = time.perf_counter()
+    writer = ColumnarWriter(args.output, FEATURES, metadata={'source': os.path.basename(source)})
+    csv_tmp = f'{args.csv}.tmp' if args.csv else None
+    dropped = 0
+    try:
+        for i, chunk in enumerate(pd.read_csv(source, chunksize=args.chunk_size)):
+            adapted = adapt_kaggle_chunk(chunk) if kaggle else chunk[['breed'] + FEATURES]
+            breeds, traits, bad = clean_chunk(adapted)
+            writer.append(breeds, traits)
+            dropped += bad
+            if csv_tmp:
+                export = pd.DataFrame(traits, columns=FEATURES)
+                export.insert(0, 'breed', breeds)
+                export.to_csv(csv_tmp, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+            if i == 0:
+                print("\n=== PRIMERAS 10 RAZAS ADAPTADAS ===")
+                print(adapted.head(10))
+        header = writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+    if csv_tmp:
+        os.replace(csv_tmp, args.csv)
+
+    elapsed = time.perf_counter() - started
+    print(f"\n✓ Dataset columnar guardado en: {args.output} "
+          f"(versión {header['version']}, huella {header['fingerprint']})")
+    print(f"Total de razas: {header['rows']:,} ({dropped:,} filas descartadas) en {elapsed:.2f}s")
+    if args.csv:
+        print(f"✓ Exportado también como CSV en: {args.csv}")
+
+    # Estadísticas calculadas sobre las columnas mapeadas, sin volver a leer el CSV
+    dataset = load_columnar(args.output)
+    print("\n=== ESTADÍSTICAS (media por característica) ===")
+    for name in dataset.features:
+        print(f"  {name:<20} {dataset.columns[name].mean():.2f}")
+
+    print("\nPara entrenar los modelos con este dataset, ejecuta:")
+    print("python train_dog_model.py")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""Recall y latencia de la búsqueda por clústeres (IVF) sobre catálogos sintéticos grandes
+
+Uso:
+    python benchmark_cluster_search.py                           # 10k, 100k y 1M filas
+    python benchmark_cluster_search.py --rows 50000 --nprobe 1 4 16
+    python benchmark_cluster_search.py --lists 256 --queries 500 --output ivf.json
+    python benchmark_cluster_search.py --rows 100000 --save-csv data/synthetic_100k.csv   # solo genera
+
+El catálogo sintético imita un inventario de perros individuales: cada fila
+parte de una raza del CSV (elegida al azar) y cada característica se mueve
+±1 con probabilidad --jitter, recortada a 1-5, así se conservan las
+distribuciones y correlaciones entre características del dataset real.
+Se compara contra la búsqueda exacta (producto matriz-vector completo) con
+el scaler servido, usando los 5 centroides del KMeans entrenado y centroides
+propios entrenados sobre el catálogo (--lists, por defecto ~√filas).
+El recall cuenta como acierto cualquier fila con similitud al menos igual a
+la k-ésima exacta (con tantas filas hay muchos empates).
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SEED = 42
+
+
+def synthetic_catalog(df: pd.DataFrame, rows: int, seed: int = SEED, jitter: float = 0.3) -> pd.DataFrame:
+    """Catálogo de `rows` perros generado a partir de las razas de df"""
+    rng = np.random.default_rng(seed)
+    features = [column for column in df.columns if column != 'breed']
+    base = rng.integers(0, len(df), rows)
+    traits = df[features].to_numpy(dtype=np.int8)[base]
+    moves = rng.choice(np.array([-1, 1], dtype=np.int8), size=traits.shape)
+    traits = np.clip(traits + moves * (rng.random(traits.shape) < jitter), 1, 5).astype(np.int8)
+
+    catalog = pd.DataFrame(traits, columns=features)
+    names = df['breed'].to_numpy()[base]
+    catalog.insert(0, 'breed', [f"{name} #{i}" for i, name in enumerate(names)])
+    return catalog
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def exact_top_k(matrix: np.ndarray, query: np.ndarray, k: int):
+    scores = matrix @ query
+    best = np.argpartition(scores, -k)[-k:]
+    return best[np.argsort(scores[best])[::-1]], scores
+
+
+def run_size(engine, df: pd.DataFrame, rows: int, args) -> dict:
+    from controllers.cluster_index import ClusterIndex
+
+    started = time.perf_counter()
+    catalog = synthetic_catalog(df, rows, seed=args.seed, jitter=args.jitter)
+    matrix = engine.scale_batch(catalog[engine.features].to_numpy())
+    generated = time.perf_counter() - started
+    print(f"\n=== {rows:,} filas (generado y escalado en {generated:.2f}s) ===")
+
+    rng = np.random.default_rng(args.seed + 1)
+    queries = engine.scale_batch(rng.integers(1, 6, size=(args.queries, len(engine.features))))
+
+    exact_times, thresholds = [], []
+    for query in queries:
+        t = time.perf_counter()
+        best, scores = exact_top_k(matrix, query, args.k)
+        exact_times.append(time.perf_counter() - t)
+        thresholds.append(scores[best[-1]])
+    exact_p50 = percentile(exact_times, 50)
+    print(f"  exacta             p50 {exact_p50 * 1e3:8.3f} ms  p95 {percentile(exact_times, 95) * 1e3:8.3f} ms")
+
+    indexes = []
+    if args.model_centroids is not None:
+        t = time.perf_counter()
+        indexes.append(('kmeans-modelo', ClusterIndex(matrix, args.model_centroids), time.perf_counter() - t))
+    n_lists = args.lists or max(1, int(np.sqrt(rows)))
+    t = time.perf_counter()
+    indexes.append((f'ivf-{n_lists}', ClusterIndex.train(matrix, n_lists, seed=args.seed), time.perf_counter() - t))
+
+    result = {'rows': rows, 'k': args.k, 'queries': args.queries,
+              'exact': {'p50_ms': exact_p50 * 1e3, 'p95_ms': percentile(exact_times, 95) * 1e3},
+              'indexes': []}
+    for name, index, build_seconds in indexes:
+        stats = index.stats()
+        print(f"  {name}: {stats['lists']} listas (media {stats['mean_list']}, máx {stats['max_list']}), "
+              f"construido en {build_seconds:.2f}s")
+        entry = {'name': name, 'build_seconds': build_seconds, **stats, 'nprobe': []}
+        for nprobe in args.nprobe:
+            if nprobe > index.n_lists:
+                continue
+            times, recalls, scanned = [], [], []
+            for query, threshold in zip(queries, thresholds):
+                t = time.perf_counter()
+                _, similarities, visited = index.search(query, top_n=args.k, nprobe=nprobe)
+                times.append(time.perf_counter() - t)
+                recalls.append(float(np.sum(similarities >= threshold - 1e-6)) / args.k)
+                scanned.append(visited / rows)
+            p50 = percentile(times, 50)
+            row = {'nprobe': nprobe, 'recall': statistics.fmean(recalls), 'scanned': statistics.fmean(scanned),
+                   'p50_ms': p50 * 1e3, 'p95_ms': percentile(times, 95) * 1e3, 'speedup': exact_p50 / p50}
+            entry['nprobe'].append(row)
+            print(f"    nprobe {nprobe:>4}  recall@{args.k} {row['recall']:.3f}  "
+                  f"recorre {row['scanned'] * 100:5.1f}%  p50 {row['p50_ms']:8.3f} ms  "
+                  f"p95 {row['p95_ms']:8.3f} ms  x{row['speedup']:.1f}")
+        result['indexes'].append(entry)
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de la búsqueda por clústeres sobre catálogos sintéticos")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument('--lists', type=int, default=0, help="Clústeres a entrenar (0 = √filas)")
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('-k', type=int, default=5)
+    parser.add_argument('--jitter', type=float, default=0.3,
+                        help="Probabilidad de mover cada característica ±1 respecto de su raza")
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--output', help="Guarda los resultados en JSON")
+    parser.add_argument('--save-csv', help="Escribe el catálogo sintético (un solo --rows) y termina")
+    args = parser.parse_args(argv)
+
+    os.chdir(BASE_DIR)
+    sys.path.insert(0, BASE_DIR)
+    from controllers.columnar_dataset import read_dataset
+    df = read_dataset()
+
+    if args.save_csv:
+        catalog = synthetic_catalog(df, args.rows[0], seed=args.seed, jitter=args.jitter)
+        catalog.to_csv(args.save_csv, index=False)
+        print(f"✓ Catálogo sintético de {len(catalog):,} filas guardado en {args.save_csv}")
+        return 0
+
+    from controllers.model_snapshot import load_snapshot
+    snapshot = load_snapshot()
+    engine = snapshot.engine
+    args.model_centroids = snapshot.cluster_index.centroids if snapshot.cluster_index is not None else None
+
+    results = [run_size(engine, df, rows, args) for rows in args.rows]
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'results': results}, f, indent=2)
+        print(f"\n✓ Resultados guardados en {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,367 @@
+"""Micro-benchmarks de los caminos críticos del recomendador y de analytics
+
+Uso:
+    python benchmark_dog_api.py                          # todos, cada uno en su propio proceso
+    python benchmark_dog_api.py -k similar -k load       # solo los que contienen esos textos
+    python benchmark_dog_api.py --output bench.json      # guarda resultados (por defecto benchmarks/latest.json)
+    python benchmark_dog_api.py --compare benchmarks/baseline.json
+    python benchmark_dog_api.py --compare-files base.json new.json   # compara dos archivos sin ejecutar
+    python benchmark_dog_api.py --list
+
+Cada benchmark corre aislado en un subproceso nuevo (salvo --in-process), con
+calentamiento, varias repeticiones y el recolector de basura desactivado
+mientras se mide. El resultado por benchmark incluye min, media, desviación
+y percentiles p50/p90/p95/p99 del tiempo por llamada.
+"""
+import argparse
+import contextlib
+import gc
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join('benchmarks', 'latest.json')
+N_FEATURES = 10
+SEED = 42
+
+
+def random_profiles(count: int, seed: int = SEED):
+    """Perfiles de usuario reproducibles (10 valores 1-5)"""
+    rng = random.Random(seed)
+    return [[rng.randint(1, 5) for _ in range(N_FEATURES)] for _ in range(count)]
+
+
+def cycling(func, args_list):
+    """Función sin argumentos que recorre args_list en cada llamada"""
+    it = itertools.cycle(args_list)
+    return lambda: func(*next(it))
+
+
+# ===== Definición de benchmarks =====
+# Cada entrada: nombre -> (preparación que retorna la función a medir, repeticiones, calentamiento)
+
+def _find_similar_breeds():
+    from controllers.dog_controller import find_similar_breeds
+    return cycling(find_similar_breeds, [(p,) for p in random_profiles(512)])
+
+
+def _find_similar_breeds_constrained():
+    from controllers.dog_controller import find_similar_breeds
+    return cycling(lambda p: find_similar_breeds(p, constraints='apartment_friendly>=4 AND good_with_kids>=4'),
+                   [(p,) for p in random_profiles(512)])
+
+
+def _engine_top_k():
+    # Puntuación en vivo sin la tabla de respuestas
+    from controllers.dog_controller import snapshots
+    engine = snapshots.current.engine
+    return cycling(engine.top_k, [(p,) for p in random_profiles(512)])
+
+
+def _recommend_breed():
+    from controllers.dog_controller import recommend_breed
+    return cycling(recommend_breed, [(p,) for p in random_profiles(512)])
+
+
+def _generate_comparison_plot():
+    from controllers.dog_controller import find_similar_breeds, generate_comparison_plot
+    args = [(p, find_similar_breeds(p)) for p in random_profiles(8)]
+    return cycling(generate_comparison_plot, args)
+
+
+def _generate_comparison_svgs():
+    from controllers.dog_controller import find_similar_breeds, generate_comparison_svgs
+    args = [(p, find_similar_breeds(p)) for p in random_profiles(64)]
+    return cycling(generate_comparison_svgs, args)
+
+
+def _analytics(name, *args):
+    def setup():
+        from controllers import analytics_controller
+        return lambda: getattr(analytics_controller, name)(*args)
+    return setup
+
+
+def _load_model_snapshot():
+    from controllers.model_snapshot import load_snapshot
+    return load_snapshot
+
+
+def _load_sklearn_models():
+    import joblib
+
+    def load():
+        for path in ('models/dog_scaler.pkl', 'models/dog_knn_model.pkl', 'models/dog_kmeans_model.pkl'):
+            joblib.load(path)
+    return load
+
+
+def _load_dataset_csv():
+    import pandas as pd
+    return lambda: pd.read_csv('data/dog_breeds_dataset.csv')
+
+
+def _load_dataset_columnar():
+    from controllers.columnar_dataset import load_columnar
+    return lambda: load_columnar('data/dog_breeds_dataset.col').to_frame()
+
+
+FAST = (300, 30)      # (repeticiones, calentamiento)
+MEDIUM = (50, 5)
+SLOW = (10, 1)
+VERY_SLOW = (5, 1)
+
+BENCHMARKS = {
+    'find_similar_breeds': (_find_similar_breeds, FAST),
+    'find_similar_breeds_constrained': (_find_similar_breeds_constrained, FAST),
+    'engine_top_k': (_engine_top_k, FAST),
+    'recommend_breed': (_recommend_breed, FAST),
+    'generate_comparison_svgs': (_generate_comparison_svgs, FAST),
+    'generate_comparison_plot': (_generate_comparison_plot, SLOW),
+    'analytics.render_chart.distributions': (_analytics('render_chart', 'distributions'), SLOW),
+    'analytics.render_chart.correlation': (_analytics('render_chart', 'correlation'), SLOW),
+    'analytics.render_chart.size_pie': (_analytics('render_chart', 'size_pie'), SLOW),
+    'analytics.render_chart.top_energy': (_analytics('render_chart', 'top_energy'), SLOW),
+    'analytics.render_chart.radar': (_analytics('render_chart', 'radar'), SLOW),
+    'analytics.render_chart.scatter': (_analytics('render_chart', 'scatter'), SLOW),
+    'analytics.render_chart.pair_plot': (_analytics('render_chart', 'pair_plot'), VERY_SLOW),
+    'analytics.get_dataset_statistics': (_analytics('get_dataset_statistics'), MEDIUM),
+    'load.model_snapshot': (_load_model_snapshot, MEDIUM),
+    'load.sklearn_models': (_load_sklearn_models, MEDIUM),
+    'load.dataset_csv': (_load_dataset_csv, MEDIUM),
+    'load.dataset_columnar': (_load_dataset_columnar, MEDIUM),
+}
+
+
+# ===== Medición =====
+
+def percentile(sorted_values, q: float) -> float:
+    """Percentil con interpolación lineal (q en 0..100)"""
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    position = (len(sorted_values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        'samples': len(samples),
+        'min': ordered[0],
+        'mean': statistics.fmean(ordered),
+        'stdev': statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        'p50': percentile(ordered, 50),
+        'p90': percentile(ordered, 90),
+        'p95': percentile(ordered, 95),
+        'p99': percentile(ordered, 99),
+        'max': ordered[-1],
+    }
+
+
+def calibrate(func, min_sample_time: float) -> int:
+    """Llamadas por muestra para que cada muestra dure al menos min_sample_time (como timeit.autorange)"""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - started >= min_sample_time or number >= 1 << 16:
+            return number
+        number *= 2
+
+
+def measure(name: str, repeat=None, warmup=None, min_sample_time: float = 0.002):
+    """Ejecuta un benchmark y retorna sus estadísticas (segundos por llamada)"""
+    setup, (default_repeat, default_warmup) = BENCHMARKS[name]
+    repeat = repeat or default_repeat
+    warmup = default_warmup if warmup is None else warmup
+
+    func = setup()
+    for _ in range(warmup):
+        func()
+    number = calibrate(func, min_sample_time)
+
+    samples = []
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(number):
+                func()
+            samples.append((time.perf_counter() - started) / number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    result = summarize(samples)
+    result.update(number=number, warmup=warmup, unit='s')
+    return result
+
+
+def run_isolated(name: str, args) -> dict:
+    """Corre un benchmark en un proceso nuevo para que no comparta cachés ni estado con los demás"""
+    command = [sys.executable, os.path.abspath(__file__), '--run-one', name,
+               '--min-sample-time', str(args.min_sample_time)]
+    if args.repeat:
+        command += ['--repeat', str(args.repeat)]
+    if args.warmup is not None:
+        command += ['--warmup', str(args.warmup)]
+    env = dict(os.environ, DOG_ANALYTICS_WARMUP='0', PYTHONHASHSEED='0')
+    completed = subprocess.run(command, cwd=BASE_DIR, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else 'falló')
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+# ===== Resultados =====
+
+def environment() -> dict:
+    import numpy as np
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def format_time(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:8.1f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:8.2f} ms"
+    return f"{seconds:8.3f} s "
+
+
+def print_results(results: dict) -> None:
+    print(f"\n{'benchmark':<44} {'p50':>11} {'p95':>11} {'p99':>11} {'min':>11}  muestras")
+    for name, result in results.items():
+        if 'error' in result:
+            print(f"{name:<44} ERROR: {result['error']}")
+            continue
+        print(f"{name:<44} {format_time(result['p50'])} {format_time(result['p95'])} "
+              f"{format_time(result['p99'])} {format_time(result['min'])}  "
+              f"{result['samples']}x{result['number']}")
+
+
+def compare(baseline: dict, current: dict, threshold: float, metric: str = 'p50') -> int:
+    """Imprime la variación por benchmark y retorna cuántas regresiones superan el umbral"""
+    regressions = 0
+    print(f"\nComparación ({metric}, umbral {threshold:.0%}) "
+          f"base {baseline['environment'].get('commit')} -> actual {current['environment'].get('commit')}")
+    print(f"{'benchmark':<44} {'base':>11} {'actual':>11} {'cambio':>9}")
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None or 'error' in base or 'error' in result:
+            print(f"{name:<44} {'-':>11} {'-':>11} {'sin base' if base is None else 'error':>9}")
+            continue
+        change = result[metric] / base[metric] - 1
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESIÓN'
+            regressions += 1
+        elif change < -threshold:
+            flag = '  mejora'
+        print(f"{name:<44} {format_time(base[metric])} {format_time(result[metric])} {change:+8.1%}{flag}")
+    print(f"\n{regressions} regresiones por encima del {threshold:.0%}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de Dog Breed AI")
+    parser.add_argument('-k', dest='patterns', action='append', default=[],
+                        help="Ejecutar solo benchmarks cuyo nombre contenga este texto (repetible)")
+    parser.add_argument('--repeat', type=int, help="Muestras por benchmark (por defecto según su costo)")
+    parser.add_argument('--warmup', type=int, help="Llamadas de calentamiento antes de medir")
+    parser.add_argument('--min-sample-time', type=float, default=0.002,
+                        help="Duración mínima de cada muestra en segundos (se agrupan llamadas rápidas)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Archivo JSON de resultados")
+    parser.add_argument('--compare', metavar='BASELINE', help="Comparar la ejecución con un JSON de referencia")
+    parser.add_argument('--compare-files', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help="Comparar dos archivos de resultados sin ejecutar nada")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="Variación relativa que cuenta como regresión (0.10 = 10%%)")
+    parser.add_argument('--metric', default='p50', choices=['min', 'mean', 'p50', 'p90', 'p95', 'p99'])
+    parser.add_argument('--in-process', action='store_true', help="No aislar cada benchmark en un subproceso")
+    parser.add_argument('--list', action='store_true', help="Listar los benchmarks disponibles")
+    parser.add_argument('--run-one', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    os.chdir(BASE_DIR)
+    if BASE_DIR not in sys.path:
+        sys.path.insert(0, BASE_DIR)
+
+    if args.list:
+        for name in BENCHMARKS:
+            print(name)
+        return 0
+
+    if args.compare_files:
+        with open(args.compare_files[0], encoding='utf-8') as f:
+            baseline = json.load(f)
+        with open(args.compare_files[1], encoding='utf-8') as f:
+            current = json.load(f)
+        return 1 if compare(baseline, current, args.threshold, args.metric) else 0
+
+    if args.run_one:
+        # Subproceso: los mensajes de carga van a stderr y el resultado JSON a stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            result = measure(args.run_one, args.repeat, args.warmup, args.min_sample_time)
+        print(json.dumps(result))
+        return 0
+
+    names = [name for name in BENCHMARKS
+             if not args.patterns or any(pattern in name for pattern in args.patterns)]
+    if not names:
+        print("Ningún benchmark coincide con los filtros")
+        return 2
+
+    results = {}
+    for name in names:
+        print(f"Ejecutando {name}...", flush=True)
+        try:
+            if args.in_process:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results[name] = measure(name, args.repeat, args.warmup, args.min_sample_time)
+            else:
+                results[name] = run_isolated(name, args)
+        except Exception as e:
+            results[name] = {'error': str(e)}
+
+    report = {'environment': environment(), 'results': results}
+    print_results(results)
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Resultados guardados en {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        return 1 if compare(baseline, report, args.threshold, args.metric) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,279 @@
+"""Genera las miniaturas locales del catálogo de razas (WebP + JPEG de tamaño fijo)
+
+Uso:
+    python build_thumbnails.py                       # usa las imágenes de data/breed_images/
+    python build_thumbnails.py --download            # descarga antes las URLs de static/dog_images.json
+    python build_thumbnails.py --source fotos/ --size 300 --workers 4
+    python build_thumbnails.py --force               # regenera todo aunque nada haya cambiado
+
+Cada raza del dataset toma su imagen de --source (archivo <slug>.jpg/.png/.webp,
+p. ej. retrievers-labrador.jpg); las razas sin imagen reciben una miniatura
+generada con sus iniciales, así /breeds nunca depende de servicios externos.
+Cada imagen se recorta al centro a --size x --size y se guarda en WebP y en
+JPEG (respaldo) con un hash del contenido en el nombre, lo que permite servirlas
+con caché inmutable. static/thumbnails/manifest.json relaciona el nombre exacto
+de cada raza del dataset con sus archivos; solo se reprocesan las razas cuya
+imagen de origen o configuración cambió, y se borran los archivos que ya no
+usa ninguna raza. El servidor recarga el manifiesto sin reiniciar.
+
+Requiere Pillow (pip install pillow); el servidor no lo necesita.
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DIR = 'data/breed_images'
+URLS_PATH = 'static/dog_images.json'
+PIPELINE_VERSION = 1
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+# Claves de static/dog_images.json que no coinciden con el nombre en inglés del dataset
+ALIASES = {
+    'Pastor Alemán': 'German Shepherd Dogs',
+    'Bulldog Francés': 'French Bulldogs',
+    'Husky Siberiano': 'Siberian Huskies',
+    'Jack Russell Terrier': 'Russell Terriers',
+    'Schnauzer': 'Miniature Schnauzers',
+}
+
+
+def slugify(breed: str) -> str:
+    """'Retrievers\\xa0(Labrador)' -> 'retrievers-labrador'"""
+    from controllers.breed_catalog import normalize_name
+    return re.sub(r'[^a-z0-9]+', '-', normalize_name(breed)).strip('-')
+
+
+def _tokens(name: str) -> frozenset:
+    """Palabras del nombre en singular, sin importar el orden ni los paréntesis"""
+    from controllers.breed_catalog import normalize_name
+    words = []
+    for word in re.findall(r'[a-z0-9]+', normalize_name(name)):
+        if word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        if word.endswith('y'):
+            word = word[:-1] + 'ie'   # husky/huskies y collie/collies terminan igual
+        words.append(word)
+    return frozenset(words)
+
+
+def match_breed(name: str, breeds: list):
+    """Raza del dataset para un nombre libre: alias, mismas palabras o subconjunto único"""
+    name = ALIASES.get(name, name)
+    wanted = _tokens(name)
+    candidates = [breed for breed in breeds if _tokens(breed) == wanted]
+    if not candidates:
+        candidates = [breed for breed in breeds if wanted <= _tokens(breed)]
+    return candidates[0] if len(candidates) == 1 else None
+
+
+def find_sources(source_dir: str, breeds: list) -> dict:
+    """{raza: ruta de la imagen de origen} según <slug>.<ext> en source_dir"""
+    by_slug = {}
+    if os.path.isdir(source_dir):
+        for filename in sorted(os.listdir(source_dir)):
+            stem, ext = os.path.splitext(filename)
+            if ext.lower() in SOURCE_EXTENSIONS:
+                by_slug.setdefault(slugify(stem), os.path.join(source_dir, filename))
+    return {breed: by_slug[slugify(breed)] for breed in breeds if slugify(breed) in by_slug}
+
+
+def download_sources(urls_path: str, source_dir: str, breeds: list, existing: dict) -> int:
+    """Descarga a source_dir las imágenes remotas de las razas que aún no tienen origen local"""
+    with open(urls_path, 'r', encoding='utf-8') as f:
+        urls = json.load(f)
+    os.makedirs(source_dir, exist_ok=True)
+    downloaded = 0
+    for name, url in urls.items():
+        breed = match_breed(name, breeds)
+        if breed is None:
+            print(f"  Sin raza del dataset para '{name}'")
+            continue
+        if breed in existing:
+            continue
+        try:
+            request = urllib.request.Request(url, headers={'User-Agent': 'dog-breed-ai/1.0'})
+            with urllib.request.urlopen(request, timeout=15) as response:
+                data = response.read()
+            path = os.path.join(source_dir, f'{slugify(breed)}.jpg')
+            with open(path, 'wb') as f:
+                f.write(data)
+            existing[breed] = path
+            downloaded += 1
+            print(f"  ✓ {name} -> {path}")
+        except Exception as e:
+            print(f"  Error descargando '{name}': {e}")
+    return downloaded
+
+
+def file_sha256(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _placeholder(breed: str, size: int):
+    """Fondo de color estable por raza con las iniciales del nombre"""
+    from PIL import Image, ImageDraw, ImageFont
+
+    digest = hashlib.sha256(breed.encode('utf-8')).digest()
+    # Tonos cálidos (naranjas y marrones) como el resto del sitio
+    color = (150 + digest[0] % 90, 70 + digest[1] % 70, 30 + digest[2] % 40)
+    image = Image.new('RGB', (size, size), color)
+    initials = ''.join(word[0] for word in re.findall(r'\w+', breed.replace('\xa0', ' '))[:2]).upper()
+    try:
+        font = ImageFont.load_default(size=size // 3)
+    except TypeError:
+        font = ImageFont.load_default()   # Pillow < 10.1: fuente fija
+    draw = ImageDraw.Draw(image)
+    draw.text((size / 2, size / 2), initials, fill=(255, 255, 255), font=font, anchor='mm')
+    return image
+
+
+def render_thumbnail(breed: str, source, size: int, webp_quality: int, jpeg_quality: int) -> dict:
+    """{'webp': bytes, 'jpeg': bytes} de la miniatura de una raza"""
+    from PIL import Image, ImageOps
+
+    if source is None:
+        image = _placeholder(breed, size)
+    else:
+        with Image.open(source) as original:
+            image = ImageOps.exif_transpose(original).convert('RGB')
+        image = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+
+    outputs = {}
+    buffer = io.BytesIO()
+    image.save(buffer, 'WEBP', quality=webp_quality, method=6)
+    outputs['webp'] = buffer.getvalue()
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=jpeg_quality, optimize=True, progressive=True)
+    outputs['jpeg'] = buffer.getvalue()
+    return outputs
+
+
+def write_content_addressed(output_dir: str, slug: str, data: bytes, ext: str) -> str:
+    """Guarda data como <slug>.<hash>.<ext> (si no existe ya) y retorna el nombre"""
+    filename = f'{slug}.{hashlib.sha256(data).hexdigest()[:12]}.{ext}'
+    path = os.path.join(output_dir, filename)
+    if not os.path.exists(path):
+        with open(f'{path}.tmp', 'wb') as f:
+            f.write(data)
+        os.replace(f'{path}.tmp', path)
+    return filename
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Genera miniaturas locales para el catálogo de razas")
+    parser.add_argument('--source', default=SOURCE_DIR, help="Carpeta con imágenes <slug>.jpg/.png/.webp")
+    parser.add_argument('--download', action='store_true',
+                        help=f"Descarga primero las imágenes de {URLS_PATH} que falten en --source")
+    parser.add_argument('--size', type=int, default=150, help="Lado de la miniatura en píxeles")
+    parser.add_argument('--webp-quality', type=int, default=80)
+    parser.add_argument('--jpeg-quality', type=int, default=82)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--force', action='store_true', help="Regenera todas las miniaturas")
+    args = parser.parse_args(argv)
+
+    try:
+        import PIL
+    except ImportError:
+        print("❌ Se requiere Pillow para generar miniaturas: pip install pillow")
+        return 1
+
+    source_dir = os.path.abspath(args.source)
+    os.chdir(BASE_DIR)
+    if BASE_DIR not in sys.path:
+        sys.path.insert(0, BASE_DIR)
+    from controllers.columnar_dataset import read_traits
+    from controllers.thumbnails import THUMBNAILS_DIR, THUMBNAIL_MANIFEST_PATH, MANIFEST_VERSION
+
+    print("=== GENERANDO MINIATURAS DEL CATÁLOGO DE RAZAS ===\n")
+    started = time.perf_counter()
+    breeds, _, _ = read_traits()
+    sources = find_sources(source_dir, breeds)
+    if args.download:
+        print(f"Descargando imágenes de {URLS_PATH} en {args.source}...")
+        downloaded = download_sources(URLS_PATH, source_dir, breeds, sources)
+        print(f"✓ {downloaded} imágenes descargadas\n")
+
+    try:
+        with open(THUMBNAIL_MANIFEST_PATH, 'r', encoding='utf-8') as f:
+            previous = json.load(f).get('breeds', {})
+    except (OSError, ValueError):
+        previous = {}
+
+    os.makedirs(THUMBNAILS_DIR, exist_ok=True)
+    settings = {'pipeline': PIPELINE_VERSION, 'size': args.size, 'webp_quality': args.webp_quality,
+                'jpeg_quality': args.jpeg_quality, 'pillow': PIL.__version__}
+    settings_key = hashlib.sha256(json.dumps(settings, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+    def build(breed: str):
+        """(entrada del manifiesto, True si se regeneró)"""
+        source = sources.get(breed)
+        source_sha = file_sha256(source) if source else 'placeholder'
+        entry = previous.get(breed)
+        if not args.force and entry and entry.get('source_sha') == source_sha \
+                and entry.get('settings') == settings_key \
+                and all(os.path.exists(os.path.join(THUMBNAILS_DIR, entry[fmt])) for fmt in ('webp', 'jpeg')):
+            return entry, False
+        try:
+            outputs = render_thumbnail(breed, source, args.size, args.webp_quality, args.jpeg_quality)
+        except Exception as e:
+            # Imagen ilegible (p. ej. una descarga fallida): se usan las iniciales
+            print(f"  Error procesando {source}: {e}")
+            source, source_sha = None, 'placeholder'
+            outputs = render_thumbnail(breed, None, args.size, args.webp_quality, args.jpeg_quality)
+        slug = slugify(breed)
+        return {
+            'webp': write_content_addressed(THUMBNAILS_DIR, slug, outputs['webp'], 'webp'),
+            'jpeg': write_content_addressed(THUMBNAILS_DIR, slug, outputs['jpeg'], 'jpg'),
+            'source': os.path.relpath(source, BASE_DIR) if source else None,
+            'source_sha': source_sha,
+            'settings': settings_key,
+        }, True
+
+    entries = {}
+    rebuilt = 0
+    # Pillow libera el GIL al decodificar, redimensionar y codificar: los hilos escalan
+    with ThreadPoolExecutor(max(args.workers, 1)) as executor:
+        for breed, (entry, changed) in zip(breeds, executor.map(build, breeds)):
+            entries[breed] = entry
+            rebuilt += changed
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'generated': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'size': args.size,
+        'breeds': entries,
+    }
+    # Escritura atómica: el watcher del servidor nunca ve un manifiesto a medias
+    with open(f'{THUMBNAIL_MANIFEST_PATH}.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(f'{THUMBNAIL_MANIFEST_PATH}.tmp', THUMBNAIL_MANIFEST_PATH)
+
+    # Archivos que ya no referencia ninguna raza (imágenes reemplazadas)
+    referenced = {entry[fmt] for entry in entries.values() for fmt in ('webp', 'jpeg')}
+    removed = 0
+    for filename in os.listdir(THUMBNAILS_DIR):
+        if filename != os.path.basename(THUMBNAIL_MANIFEST_PATH) and filename not in referenced:
+            os.remove(os.path.join(THUMBNAILS_DIR, filename))
+            removed += 1
+
+    total_bytes = {fmt: sum(os.path.getsize(os.path.join(THUMBNAILS_DIR, entry[fmt])) for entry in entries.values())
+                   for fmt in ('webp', 'jpeg')}
+    own = sum(entry['source'] is not None for entry in entries.values())
+    print(f"✓ {len(entries)} razas: {own} con imagen propia, {len(entries) - own} con iniciales")
+    print(f"  {rebuilt} regeneradas, {len(entries) - rebuilt} sin cambios, {removed} archivos obsoletos borrados")
+    print(f"  WebP {total_bytes['webp'] / 1024:.0f} KB, JPEG {total_bytes['jpeg'] / 1024:.0f} KB "
+          f"en {THUMBNAILS_DIR}/ ({time.perf_counter() - started:.2f}s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,299 +1,335 @@
-import pandas as pd
-import matplotlib
-matplotlib.use('Agg')  # Backend sin GUI
-import matplotlib.pyplot as plt
-import seaborn as sns
-import io
+import importlib
+import os
 import base64
-from typing import Dict, List
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Iterator, List, Tuple, TYPE_CHECKING
+import numpy as np
+from fastapi import APIRouter, Request, HTTPException
+from fastapi.responses import Response, StreamingResponse
+from controllers.render_executor import render_executor, RenderQueueFull
+from controllers.compression import etag_matches
+from controllers.metrics import REGISTRY, CACHE_EVENTS, stage
+from controllers.chart_pool import chart_pool
+from controllers import columnar_dataset
 
-# Configuración de estilo
-plt.style.use('seaborn-v0_8-darkgrid')
-sns.set_palette("husl")
+if TYPE_CHECKING:
+    import pandas as pd
 
-def load_dataset() -> pd.DataFrame:
+# Crear el enrutador para los gráficos individuales
+router = APIRouter()
+
+def charts_module():
+    """Importa bajo demanda el módulo de gráficos (matplotlib/seaborn) la primera vez que se necesita"""
+    return importlib.import_module('controllers.analytics_charts')
+
+def dataset_path() -> str:
+    """Archivo del dataset: el columnar si existe, si no el CSV"""
+    return columnar_dataset.resolve_dataset_path()
+
+# Caché de dataset, gráficos y estadísticas, indexada por la huella del dataset
+_cache_lock = threading.Lock()
+_cache = {
+    'stat': None,          # (ruta, st_mtime_ns, st_size) cuando se calculó la huella
+    'fingerprint': None,   # huella del contenido (encabezado columnar o sha256 del CSV)
+    'columns': None,       # características -> arreglo (vistas int8 del mmap si es columnar)
+    'dataset': None,       # DataFrame solo para los gráficos
+    'statistics': None,
+    'images': None,        # (nombre, formato) -> bytes
+}
+
+REGISTRY.gauge('dog_analytics_dataset_info', 'Huella del dataset usado por analytics',
+               lambda: [((_cache['fingerprint'],), 1)] if _cache['fingerprint'] else [], ('fingerprint',))
+REGISTRY.gauge('dog_chart_pool_tasks_total', 'Gráficos enviados al pool de procesos por resultado',
+               lambda: [(('submitted',), chart_pool.stats()['submitted']), (('failed',), chart_pool.stats()['failed'])],
+               ('result',), kind='counter')
+REGISTRY.gauge('dog_analytics_cached_charts', 'Gráficos renderizados en caché para el dataset actual',
+               lambda: len(_cache['images'] or ()))
+
+def dataset_fingerprint() -> str:
+    """Huella del contenido del dataset; solo se recalcula si cambian ruta, mtime o tamaño"""
+    path = dataset_path()
+    st = os.stat(path)
+    stat_key = (path, st.st_mtime_ns, st.st_size)
+    with _cache_lock:
+        if _cache['stat'] == stat_key:
+            return _cache['fingerprint']
+
+        fingerprint = columnar_dataset.dataset_fingerprint(path)
+
+        if fingerprint != _cache['fingerprint']:
+            # El contenido cambió: invalidar todo lo derivado del dataset
+            _cache.update(columns=None, dataset=None, statistics=None, images=None)
+        _cache.update(stat=stat_key, fingerprint=fingerprint)
+        return fingerprint
+
+def _cached_dataset() -> "pd.DataFrame":
+    """Dataset compartido para la versión actual (no debe modificarse)"""
+    dataset_fingerprint()
+    with _cache_lock:
+        if _cache['dataset'] is None:
+            with stage('analytics', 'load_dataset'):
+                _cache['dataset'] = columnar_dataset.read_dataset(_cache['stat'][0])
+        return _cache['dataset']
+
+def _cached_columns() -> Dict[str, np.ndarray]:
+    """Columnas de características para la versión actual, sin DataFrame (no deben modificarse)"""
+    dataset_fingerprint()
+    with _cache_lock:
+        if _cache['columns'] is None:
+            with stage('analytics', 'load_columns'):
+                _cache['columns'] = columnar_dataset.read_columns(_cache['stat'][0])
+        return _cache['columns']
+
+def load_dataset() -> "pd.DataFrame":
     """Carga el dataset de razas de perros"""
-    return pd.read_csv('data/dog_breeds_dataset.csv')
-
-def plot_to_base64(fig) -> str:
-    """Convierte una figura de matplotlib a base64 para embeber en HTML"""
-    buf = io.BytesIO()
-    fig.savefig(buf, format='png', dpi=100, bbox_inches='tight')
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.read()).decode('utf-8')
-    buf.close()
-    plt.close(fig)
-    return f"data:image/png;base64,{img_base64}"
-
-def generate_feature_distributions() -> str:
-    """Histogramas de distribución de características"""
-    df = load_dataset()
-    
-    features = ['energy_level', 'trainability', 'good_with_kids', 'exercise_needs', 
-                'barking_tendency', 'grooming_needs', 'apartment_friendly', 
-                'good_alone', 'watchdog_ability']
-    
-    fig, axes = plt.subplots(3, 3, figsize=(15, 12))
-    fig.suptitle('Distribución de Características de las Razas', fontsize=16, fontweight='bold')
-    
-    # Crear paleta de colores con suficientes colores
-    colors = sns.color_palette("husl", len(features))
-    
-    for idx, feature in enumerate(features):
-        ax = axes[idx // 3, idx % 3]
-        counts = df[feature].value_counts().sort_index()
-        
-        ax.bar(counts.index, counts.values, color=colors[idx], alpha=0.7)
-        ax.set_xlabel(feature.replace('_', ' ').title(), fontsize=10)
-        ax.set_ylabel('Número de Razas', fontsize=10)
-        ax.set_xticks([1, 2, 3, 4, 5])
-        ax.grid(axis='y', alpha=0.3)
-        
-        # Añadir valores sobre las barras
-        for i, v in enumerate(counts.values):
-            ax.text(counts.index[i], v + 1, str(v), ha='center', fontsize=8)
-    
-    plt.tight_layout()
-    return plot_to_base64(fig)
+    return _cached_dataset().copy()
 
-def generate_correlation_heatmap() -> str:
-    """Matriz de correlación entre características"""
-    df = load_dataset()
-    
-    features = ['energy_level', 'trainability', 'good_with_kids', 'exercise_needs', 
-                'barking_tendency', 'grooming_needs', 'apartment_friendly', 
-                'good_alone', 'watchdog_ability']
-    
-    correlation = df[features].corr()
-    
-    fig, ax = plt.subplots(figsize=(12, 10))
-    sns.heatmap(correlation, annot=True, fmt='.2f', cmap='coolwarm', center=0,
-                square=True, linewidths=1, cbar_kws={"shrink": 0.8}, ax=ax)
-    
-    ax.set_title('Matriz de Correlación entre Características', fontsize=14, fontweight='bold', pad=20)
-    
-    # Rotar etiquetas
-    labels = [label.get_text().replace('_', ' ').title() for label in ax.get_xticklabels()]
-    ax.set_xticklabels(labels, rotation=45, ha='right')
-    ax.set_yticklabels(labels, rotation=0)
-    
-    plt.tight_layout()
-    return plot_to_base64(fig)
+CHART_MEDIA_TYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
 
-def generate_size_distribution() -> str:
-    """Gráfico de pastel de distribución de tamaños"""
-    df = load_dataset()
-    
-    size_counts = df['size'].value_counts().sort_index()
-    
-    # Labels dinámicos basados en los valores que existen
-    size_labels_map = {
-        1: 'Muy Pequeño',
-        2: 'Pequeño',
-        3: 'Mediano',
-        4: 'Grande',
-        5: 'Muy Grande'
-    }
-    
-    size_labels = [size_labels_map[size] for size in size_counts.index]
-    
-    fig, ax = plt.subplots(figsize=(10, 8))
-    
-    colors = ['#FF6B6B', '#FFA07A', '#4ECDC4', '#45B7D1', '#95E1D3']
-    # Usar solo los colores necesarios
-    used_colors = [colors[i-1] for i in size_counts.index]
-    
-    explode = tuple([0.05] * len(size_counts))
-    
-    _, _, autotexts = ax.pie(size_counts.values, labels=size_labels,
-                                        autopct='%1.1f%%', startangle=90,
-                                        colors=used_colors, explode=explode,
-                                        textprops={'fontsize': 12})    # Mejorar estilo
-    for autotext in autotexts:
-        autotext.set_color('white')
-        autotext.set_fontweight('bold')
-        autotext.set_fontsize(14)
-    
-    ax.set_title('Distribución de Tamaños de Razas\n(195 Razas AKC)', 
-                 fontsize=14, fontweight='bold', pad=20)
-    
-    # Añadir leyenda con conteos
-    legend_labels = [f'{label}: {count} razas' for label, count in zip(size_labels, size_counts.values)]
-    ax.legend(legend_labels, loc='upper left', bbox_to_anchor=(1, 0, 0.5, 1))
-    
-    plt.tight_layout()
-    return plot_to_base64(fig)
+def image_to_data_uri(image: bytes, fmt: str = 'png') -> str:
+    """Convierte los bytes de una imagen en un data URI para embeber en HTML"""
+    return f"data:{CHART_MEDIA_TYPES[fmt]};base64,{base64.b64encode(image).decode('utf-8')}"
 
-def generate_top_breeds_chart(feature: str, top_n: int = 10) -> str:
-    """Gráfico de barras horizontales de top razas por característica"""
-    df = load_dataset()
-    
-    top_breeds = df.nlargest(top_n, feature)[['breed', feature]].sort_values(feature)
-    
-    fig, ax = plt.subplots(figsize=(12, 8))
-    
-    colors = plt.cm.viridis(top_breeds[feature] / 5.0)
-    bars = ax.barh(top_breeds['breed'], top_breeds[feature], color=colors)
-    
-    ax.set_xlabel('Nivel (1-5)', fontsize=12, fontweight='bold')
-    ax.set_ylabel('Raza', fontsize=12, fontweight='bold')
-    ax.set_title(f'Top {top_n} Razas - {feature.replace("_", " ").title()}', 
-                 fontsize=14, fontweight='bold', pad=20)
-    ax.set_xlim(0, 5.5)
-    ax.grid(axis='x', alpha=0.3)
-    
-    # Añadir valores al final de las barras
-    for bar in bars:
-        width = bar.get_width()
-        ax.text(width + 0.1, bar.get_y() + bar.get_height()/2, 
-                f'{width:.1f}', ha='left', va='center', fontweight='bold')
-    
-    plt.tight_layout()
-    return plot_to_base64(fig)
+# Gráficos disponibles como endpoint individual: nombre -> constructor en analytics_charts
+CHART_FIGURES = {
+    'distributions': 'feature_distributions_figure',
+    'correlation': 'correlation_heatmap_figure',
+    'size_pie': 'size_distribution_figure',
+    'scatter': 'scatter_plot_figure',
+    'pair_plot': 'pair_plot_figure',
+    'radar': 'radar_chart_figure',
+}
 
-def generate_radar_chart() -> str:
-    """Radar chart comparando razas populares"""
-    df = load_dataset()
-    
-    # Seleccionar 4 razas populares (nombres exactos del dataset)
-    breeds_to_compare = [
-        'Retrievers (Labrador)',
-        'German Shepherd Dogs', 
-        'Bulldogs',
-        'Yorkshire Terriers'
-    ]
-    features = ['energy_level', 'trainability', 'good_with_kids', 
-                'exercise_needs', 'barking_tendency', 'watchdog_ability']
-    
-    fig, ax = plt.subplots(figsize=(10, 10), subplot_kw={'projection': 'polar'})
-    
-    angles = [n / float(len(features)) * 2 * 3.14159 for n in range(len(features))]
-    angles += angles[:1]
-    
-    ax.set_theta_offset(3.14159 / 2)
-    ax.set_theta_direction(-1)
-    ax.set_xticks(angles[:-1])
-    ax.set_xticklabels([f.replace('_', ' ').title() for f in features], fontsize=10)
-    ax.set_ylim(0, 5)
-    ax.set_yticks([1, 2, 3, 4, 5])
-    ax.set_yticklabels(['1', '2', '3', '4', '5'], fontsize=8)
-    ax.grid(True)
-    
-    colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A']
-    
-    for idx, breed in enumerate(breeds_to_compare):
-        breed_data = df[df['breed'] == breed][features].values.flatten().tolist()
-        breed_data += breed_data[:1]
-        ax.plot(angles, breed_data, 'o-', linewidth=2, label=breed, color=colors[idx])
-        ax.fill(angles, breed_data, alpha=0.15, color=colors[idx])
-    
-    ax.set_title('Comparación de Perfiles de Razas Populares', 
-                 fontsize=14, fontweight='bold', y=1.08)
-    ax.legend(loc='upper right', bbox_to_anchor=(1.3, 1.1), fontsize=10)
-    
-    plt.tight_layout()
-    return plot_to_base64(fig)
+# Nombres históricos de los gráficos top_N
+TOP_CHART_ALIASES = {
+    'top_energy': 'energy_level',
+    'top_trainability': 'trainability',
+}
 
-def generate_scatter_plot() -> str:
-    """Scatter plot: Energy vs Trainability con tamaño por size"""
-    df = load_dataset()
-    
-    fig, ax = plt.subplots(figsize=(12, 8))
-    
-    size_map = {1: 100, 2: 200, 3: 300}
-    sizes = df['size'].map(size_map)
-    
-    scatter = ax.scatter(df['energy_level'], df['trainability'], 
-                        s=sizes, alpha=0.6, c=df['good_with_kids'], 
-                        cmap='viridis', edgecolors='black', linewidth=0.5)
-    
-    ax.set_xlabel('Nivel de Energía', fontsize=12, fontweight='bold')
-    ax.set_ylabel('Entrenabilidad', fontsize=12, fontweight='bold')
-    ax.set_title('Energía vs Entrenabilidad (color=bueno con niños, tamaño=size)', 
-                 fontsize=14, fontweight='bold', pad=20)
-    ax.grid(alpha=0.3)
-    ax.set_xlim(0.5, 5.5)
-    ax.set_ylim(0.5, 5.5)
-    
-    # Colorbar
-    cbar = plt.colorbar(scatter, ax=ax)
-    cbar.set_label('Bueno con Niños', fontsize=10)
-    
-    # Leyenda de tamaños
-    for size_val, marker_size in size_map.items():
-        size_label = ['Pequeño', 'Mediano', 'Grande'][size_val - 1]
-        ax.scatter([], [], s=marker_size, c='gray', alpha=0.6, 
-                  edgecolors='black', label=size_label)
-    
-    ax.legend(title='Tamaño', loc='upper left', fontsize=10)
-    
-    plt.tight_layout()
-    return plot_to_base64(fig)
+# Gráficos que muestra la página /analytics
+DASHBOARD_CHARTS = ['distributions', 'correlation', 'size_pie', 'top_energy',
+                    'top_trainability', 'scatter', 'pair_plot']
 
-def generate_pair_plot() -> str:
-    """Genera un Pair Plot (matriz de dispersión) similar al de Iris"""
-    df = load_dataset()
-    
-    # Seleccionar las características más importantes para visualizar
-    features = ['energy_level', 'trainability', 'exercise_needs', 'good_with_kids']
-    
-    # Crear categorías de tamaño para colorear
-    size_labels = ['Pequeño', 'Mediano', 'Grande']
-    df['size_category'] = pd.cut(df['size'], bins=[0, 2, 3, 5], labels=size_labels)
-    
-    # Crear el pair plot
-    pairplot_data = df[features + ['size_category']].copy()
-    
-    # Crear el pairplot
-    g = sns.pairplot(pairplot_data, 
-                     hue='size_category',
-                     palette={size_labels[0]: '#FF6B35', size_labels[1]: '#8B4513', size_labels[2]: '#654321'},
-                     diag_kind='hist',
-                     plot_kws={'alpha': 0.6, 's': 50},
-                     diag_kws={'alpha': 0.7, 'bins': 5})
-    
-    g.fig.suptitle('Matriz de Relaciones entre Características Principales', 
-                   fontsize=18, fontweight='bold', y=1.0)
-    
-    # Ajustar etiquetas
-    for ax in g.axes.flatten():
-        ax.set_xlabel(ax.get_xlabel().replace('_', ' ').title(), fontsize=10)
-        ax.set_ylabel(ax.get_ylabel().replace('_', ' ').title(), fontsize=10)
-    
-    # Convertir a base64
-    buf = io.BytesIO()
-    g.fig.savefig(buf, format='png', dpi=100, bbox_inches='tight')
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.read()).decode('utf-8')
-    buf.close()
-    plt.close(g.fig)
-    
-    return f"data:image/png;base64,{img_base64}"
-
-def generate_all_charts() -> Dict[str, str]:
-    """Genera todos los gráficos y retorna diccionario con imágenes base64"""
-    return {
-        'distributions': generate_feature_distributions(),
-        'correlation': generate_correlation_heatmap(),
-        'size_pie': generate_size_distribution(),
-        'top_energy': generate_top_breeds_chart('energy_level', 10),
-        'top_trainability': generate_top_breeds_chart('trainability', 10),
-        'scatter': generate_scatter_plot(),
-        'pair_plot': generate_pair_plot()  # Nuevo: Pair Plot como en Iris
-    }
+def chart_exists(name: str) -> bool:
+    """Indica si hay un gráfico con ese nombre (sin cargar matplotlib)"""
+    return _top_chart_feature(name) is not None or name in CHART_FIGURES
+
+def _top_chart_feature(name: str):
+    feature = TOP_CHART_ALIASES.get(name)
+    if feature is None and name.startswith('top_'):
+        feature = name[len('top_'):]
+    if feature is not None and feature in _cached_columns():
+        return feature
+    return None
+
+def chart_builder(name: str):
+    """Retorna el constructor de figura para un nombre de gráfico, o None si no existe"""
+    if name in CHART_FIGURES:
+        return getattr(charts_module(), CHART_FIGURES[name])
+    feature = _top_chart_feature(name)
+    if feature is not None:
+        top_breeds_figure = charts_module().top_breeds_figure
+        return lambda df: top_breeds_figure(df, feature, 10)
+    return None
+
+def render_chart(name: str, fmt: str = 'png') -> bytes:
+    """Renderiza un gráfico por nombre a bytes PNG o SVG"""
+    builder = chart_builder(name)
+    if builder is None:
+        raise KeyError(name)
+    return charts_module().render_figure(builder(load_dataset()), fmt)
+
+def _describe(values: np.ndarray) -> Dict[str, float]:
+    """Lo mismo que DataFrame.describe() para una columna numérica, redondeado a 2 decimales"""
+    values = values.astype(np.float64)
+    q25, q50, q75 = np.percentile(values, [25, 50, 75])
+    summary = {'count': len(values), 'mean': values.mean(), 'std': values.std(ddof=1), 'min': values.min(),
+               '25%': q25, '50%': q50, '75%': q75, 'max': values.max()}
+    return {name: round(float(value), 2) for name, value in summary.items()}
 
 def get_dataset_statistics() -> Dict:
-    """Obtiene estadísticas descriptivas del dataset"""
-    df = load_dataset()
+    """Obtiene estadísticas descriptivas del dataset directamente de las columnas"""
+    columns = _cached_columns()
     
     features = ['energy_level', 'trainability', 'good_with_kids', 'exercise_needs', 
                 'barking_tendency', 'grooming_needs', 'apartment_friendly', 
                 'good_alone', 'watchdog_ability']
     
-    stats = df[features].describe().round(2).to_dict()
-    
-    return {
-        'total_breeds': len(df),
-        'statistics': stats,
-        'size_distribution': df['size'].value_counts().to_dict()
-    }
+    with stage('analytics', 'statistics'):
+        stats = {feature: _describe(columns[feature]) for feature in features}
+        sizes, counts = np.unique(columns['size'], return_counts=True)
+        order = np.argsort(-counts, kind='stable')
+        
+        return {
+            'total_breeds': len(columns['size']),
+            'statistics': stats,
+            'size_distribution': {int(sizes[i]): int(counts[i]) for i in order}
+        }
+
+
+def _get_cached(key: str, builder):
+    """Retorna el valor cacheado para la versión actual del dataset o lo construye"""
+    fingerprint = dataset_fingerprint()
+    with _cache_lock:
+        if _cache[key] is not None and _cache['fingerprint'] == fingerprint:
+            return _cache[key]
+
+    value = builder()
+
+    with _cache_lock:
+        # Solo se guarda si el dataset no cambió mientras se construía
+        if _cache['fingerprint'] == fingerprint:
+            _cache[key] = value
+    return value
+
+# Un lock por gráfico: evita renderizar dos veces el mismo sin serializar los distintos
+_render_locks: Dict[tuple, threading.Lock] = {}
+
+def get_chart_image(name: str, fmt: str = 'png') -> bytes:
+    """Bytes del gráfico para la versión actual del dataset; se renderiza una sola vez"""
+    fingerprint = dataset_fingerprint()
+    key = (name, fmt)
+    with _cache_lock:
+        images = _cache['images'] if _cache['fingerprint'] == fingerprint else None
+        if images is not None and key in images:
+            CACHE_EVENTS.inc('analytics_chart', 'hit')
+            return images[key]
+        render_lock = _render_locks.setdefault(key, threading.Lock())
+    CACHE_EVENTS.inc('analytics_chart', 'miss')
+
+    with render_lock:
+        # Otro hilo pudo haberlo renderizado mientras se esperaba el lock
+        with _cache_lock:
+            images = _cache['images']
+            if images is not None and key in images and _cache['fingerprint'] == fingerprint:
+                return images[key]
+
+        with stage('analytics_chart', f'{name}.{fmt}'):
+            image = chart_pool.render(name, fmt) if chart_pool.enabled else render_chart(name, fmt)
+
+        with _cache_lock:
+            if _cache['fingerprint'] == fingerprint:
+                if _cache['images'] is None:
+                    _cache['images'] = {}
+                _cache['images'][key] = image
+    return image
+
+def iter_chart_images(names: List[str], fmt: str = 'png') -> Iterator[Tuple[str, bytes]]:
+    """Retorna (nombre, bytes) a medida que cada gráfico está listo
+
+    Los cacheados salen de inmediato; los demás se renderizan a la vez en el
+    pool de procesos, así el total tarda lo que el gráfico más lento.
+    """
+    fingerprint = dataset_fingerprint()
+    pending = []
+    with _cache_lock:
+        images = _cache['images'] if _cache['fingerprint'] == fingerprint else None
+        for name in names:
+            if images is not None and (name, fmt) in images:
+                pending.append((name, images[(name, fmt)]))
+            else:
+                pending.append((name, None))
+
+    missing = [name for name, image in pending if image is None]
+    for name, image in pending:
+        if image is not None:
+            CACHE_EVENTS.inc('analytics_chart', 'hit')
+            yield name, image
+    if not missing:
+        return
+
+    # Sin pool de procesos los hilos no aportan paralelismo (GIL): se renderiza en orden
+    if not chart_pool.enabled:
+        for name in missing:
+            yield name, get_chart_image(name, fmt)
+        return
+
+    # Un hilo por gráfico que solo espera a su proceso; get_chart_image evita renders duplicados
+    with ThreadPoolExecutor(max_workers=len(missing), thread_name_prefix="chart-wait") as waiters:
+        futures = {waiters.submit(get_chart_image, name, fmt): name for name in missing}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+def get_cached_statistics() -> Dict:
+    """Estadísticas del dataset actual; se recalculan solo cuando cambia el CSV"""
+    return _get_cached('statistics', get_dataset_statistics)
+
+def warm_analytics_cache() -> None:
+    """Precalienta gráficos y estadísticas (pensado para ejecutarse al iniciar)"""
+    try:
+        get_cached_statistics()
+        for _ in iter_chart_images(DASHBOARD_CHARTS, 'png'):
+            pass
+        print(f"✓ Caché de analytics lista (dataset {dataset_fingerprint()})")
+    except Exception as e:
+        print(f"Error precalentando analytics: {e}")
+
+def dataset_last_modified() -> str:
+    """Fecha de última modificación del dataset en formato HTTP"""
+    return formatdate(os.stat(dataset_path()).st_mtime, usegmt=True)
+
+def _not_modified(request: Request, etag: str, last_modified: str) -> bool:
+    """Evalúa If-None-Match / If-Modified-Since de la petición"""
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        # Comparación débil: si el middleware comprimió la respuesta, el cliente trae W/"..."
+        return etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since:
+        try:
+            return parsedate_to_datetime(if_modified_since) >= parsedate_to_datetime(last_modified)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+@router.get("/api/analytics/charts", tags=["API"],
+            summary="Gráficos de Analytics en Streaming",
+            description="Gráficos del dashboard como NDJSON ({name, data}), cada línea enviada apenas su gráfico está listo")
+async def stream_charts(fmt: str = 'png'):
+    if fmt not in CHART_MEDIA_TYPES:
+        raise HTTPException(status_code=404, detail=f"Formato no soportado: {fmt}")
+
+    # Generador síncrono: StreamingResponse lo recorre en el pool de hilos, sin bloquear el event loop
+    def lines():
+        for name, image in iter_chart_images(DASHBOARD_CHARTS, fmt):
+            yield json.dumps({'name': name, 'data': image_to_data_uri(image, fmt)}) + '\n'
+
+    return StreamingResponse(lines(), media_type='application/x-ndjson',
+                             headers={'Cache-Control': 'no-cache', 'X-Dataset-Version': dataset_fingerprint()})
+
+@router.get("/analytics/charts/{name}.{fmt}", tags=["API"],
+            summary="Gráfico de Analytics",
+            description="Retorna un gráfico individual del dataset en PNG o SVG, cacheable por navegador y proxies")
+async def chart_image(request: Request, name: str, fmt: str):
+    if fmt not in CHART_MEDIA_TYPES:
+        raise HTTPException(status_code=404, detail=f"Formato no soportado: {fmt}")
+    if not chart_exists(name):
+        raise HTTPException(status_code=404, detail=f"Gráfico no encontrado: {name}")
+
+    fingerprint = dataset_fingerprint()
+    etag = f'"{fingerprint}-{name}-{fmt}"'
+    last_modified = dataset_last_modified()
+
+    # Las URLs versionadas (?v=<huella>) nunca cambian de contenido
+    if request.query_params.get('v') == fingerprint:
+        cache_control = 'public, max-age=31536000, immutable'
+    else:
+        cache_control = 'public, max-age=86400'
+    headers = {'ETag': etag, 'Last-Modified': last_modified, 'Cache-Control': cache_control}
+
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        with stage('analytics_chart_endpoint', 'render_executor'):
+            image = await render_executor.run(get_chart_image, name, fmt)
+    except RenderQueueFull:
+        raise HTTPException(status_code=503, detail="Servidor ocupado renderizando gráficos",
+                            headers={'Retry-After': '2'})
+    return Response(content=image, media_type=CHART_MEDIA_TYPES[fmt], headers=headers)
@@ -0,0 +1,168 @@
+import json
+import multiprocessing
+import os
+import struct
+import time
+from typing import Optional, Sequence
+
+import numpy as np
+
+# Formato del archivo:
+#   MAGIC (8 bytes) | longitud del encabezado JSON (uint32 LE) | encabezado JSON
+#   | relleno hasta múltiplo de 64 | tabla uint8 de forma (LEVELS ** n_features, k)
+MAGIC = b'DOGTOPK1'
+FORMAT_VERSION = 1
+LEVELS = 5          # cada característica toma valores 1..5
+ALIGNMENT = 64
+
+
+def profile_count(n_features: int) -> int:
+    return LEVELS ** n_features
+
+
+def profile_index(user_preferences: Sequence[int]) -> Optional[int]:
+    """Índice del perfil en la tabla (base 5, primera característica más significativa)"""
+    index = 0
+    for value in user_preferences:
+        if not 1 <= value <= LEVELS or int(value) != value:
+            return None
+        index = index * LEVELS + int(value) - 1
+    return index
+
+
+def profiles_for_range(start: int, stop: int, n_features: int) -> np.ndarray:
+    """Genera los perfiles [start, stop) de la tabla como matriz (n, n_features) de valores 1..5"""
+    powers = LEVELS ** np.arange(n_features - 1, -1, -1, dtype=np.int64)
+    indices = np.arange(start, stop, dtype=np.int64)[:, None]
+    return (indices // powers) % LEVELS + 1
+
+
+def _read_header(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("No es una tabla de respuestas válida")
+    (header_len,) = struct.unpack('<I', f.read(4))
+    header = json.loads(f.read(header_len).decode('utf-8'))
+    return header
+
+
+class AnswerTable:
+    """Tabla top-k precalculada para todo el espacio de perfiles, mapeada en memoria (solo lectura)"""
+
+    def __init__(self, path: str, header: dict, table: np.ndarray):
+        self.path = path
+        self.header = header
+        self.k = header['k']
+        self.fingerprint = header['fingerprint']
+        self.table = table
+
+    @classmethod
+    def open(cls, path: str, expected_fingerprint: str,
+             n_features: int) -> Optional["AnswerTable"]:
+        """Abre la tabla si existe y corresponde al modelo actual; si no, retorna None"""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                header = _read_header(f)
+            if header.get('version') != FORMAT_VERSION:
+                print(f"Tabla de respuestas ignorada: versión {header.get('version')} no soportada")
+                return None
+            if header.get('fingerprint') != expected_fingerprint or header.get('n_features') != n_features:
+                print("Tabla de respuestas ignorada: no corresponde al modelo actual (se usará puntuación en vivo)")
+                return None
+            # ndarray normal sobre el memmap: indexar un np.memmap es varias veces más lento
+            table = np.asarray(np.memmap(path, dtype=np.uint8, mode='r', offset=header['data_offset'],
+                                         shape=(profile_count(n_features), header['k'])))
+            return cls(path, header, table)
+        except Exception as e:
+            print(f"Error abriendo la tabla de respuestas: {e}")
+            return None
+
+    def lookup(self, user_preferences: Sequence[int]) -> Optional[np.ndarray]:
+        """Índices de las k mejores razas para el perfil, o None si el perfil no está en la tabla"""
+        index = profile_index(user_preferences)
+        if index is None:
+            return None
+        return self.table[index]
+
+
+# ===== Construcción offline =====
+
+_worker_engine = None
+
+
+def _init_worker(engine):
+    global _worker_engine
+    _worker_engine = engine
+
+
+def _compute_chunk(bounds):
+    start, stop, k = bounds
+    profiles = profiles_for_range(start, stop, len(_worker_engine.features))
+    indices, _ = _worker_engine.top_k_batch(profiles, top_n=k)
+    return start, indices.astype(np.uint8)
+
+
+def build_answer_table(engine, path: str, k: int = 5, chunk_size: int = 1 << 16,
+                       workers: Optional[int] = None) -> dict:
+    """Calcula la tabla top-k para los 5^n perfiles en bloques vectorizados repartidos entre núcleos
+
+    Escribe primero a un archivo temporal y lo renombra al terminar, de modo que
+    los servidores nunca vean una tabla a medio escribir.
+    """
+    n_features = len(engine.features)
+    if len(engine) > 256:
+        raise ValueError("La tabla usa índices uint8: máximo 256 razas")
+    k = min(k, len(engine))
+    rows = profile_count(n_features)
+
+    header = {
+        'version': FORMAT_VERSION,
+        'k': k,
+        'n_features': n_features,
+        'n_breeds': len(engine),
+        'features': engine.features,
+        'fingerprint': engine.fingerprint,
+    }
+    # El offset de datos depende de la longitud del propio encabezado
+    header['data_offset'] = 0
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_offset = -(-(len(MAGIC) + 4 + len(header_bytes) + 16) // ALIGNMENT) * ALIGNMENT
+    header['data_offset'] = data_offset
+    header_bytes = json.dumps(header).encode('utf-8')
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b'\0' * (data_offset - f.tell()))
+        f.truncate(data_offset + rows * k)
+
+    table = np.memmap(tmp_path, dtype=np.uint8, mode='r+', offset=data_offset, shape=(rows, k))
+    chunks = [(start, min(start + chunk_size, rows), k) for start in range(0, rows, chunk_size)]
+
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    # Solo se paraleliza con fork: con spawn los workers re-ejecutarían el script de entrenamiento.
+    # Quien llama debe hacerlo sin otros hilos trabajando (train_dog_model la corre al final)
+    if workers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context('fork')
+        with ctx.Pool(workers, initializer=_init_worker, initargs=(engine,)) as pool:
+            for start, block in pool.imap_unordered(_compute_chunk, chunks):
+                table[start:start + len(block)] = block
+    else:
+        workers = 1
+        _init_worker(engine)
+        for bounds in chunks:
+            start, block = _compute_chunk(bounds)
+            table[start:start + len(block)] = block
+
+    table.flush()
+    del table
+    os.replace(tmp_path, path)
+
+    elapsed = time.perf_counter() - started
+    print(f"✓ Tabla de respuestas: {rows:,} perfiles x top-{k} "
+          f"({os.path.getsize(path) / 1e6:.1f} MB) en {elapsed:.1f}s con {workers} procesos")
+    return header
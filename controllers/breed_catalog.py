@@ -0,0 +1,162 @@
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Rangos de tamaño usados por los botones de filtro de /breeds
+SIZE_GROUPS = {
+    'small': (1, 2),
+    'medium': (3, 3),
+    'large': (4, 5),
+}
+# Longitud máxima de los n-gramas indexados para búsqueda por subcadena
+NGRAM = 3
+
+
+def normalize_name(name: str) -> str:
+    """Nombre en minúsculas, sin tildes y con espacios normales (el dataset usa \\xa0)"""
+    name = unicodedata.normalize('NFKD', name.replace('\xa0', ' '))
+    name = ''.join(ch for ch in name if not unicodedata.combining(ch))
+    return ' '.join(name.casefold().split())
+
+
+class BreedCatalog:
+    """Catálogo de razas precalculado para paginar, ordenar y buscar en el servidor
+
+    Se construye una vez por versión del modelo: los registros JSON, las
+    permutaciones de orden por cada columna, un índice ordenado de nombres y
+    palabras para búsqueda por prefijo y un índice de n-gramas (1..3) para
+    búsqueda por subcadena. Cada consulta solo combina arreglos ya calculados.
+    """
+
+    def __init__(self, breeds: Sequence[str], features: Sequence[str], traits: np.ndarray,
+                 version: str = '', thumbnails: Optional[Dict[str, Dict[str, str]]] = None):
+        self.version = version
+        self.features = list(features)
+        traits = np.asarray(traits).astype(np.int64)
+        n = len(breeds)
+
+        # Registros listos para serializar; 'id' es la posición 1-based en el dataset
+        # y 'thumbnail' las URLs locales de la miniatura (None si no se generaron)
+        thumbnails = thumbnails or {}
+        self.items: List[Dict] = []
+        for idx, (breed, row) in enumerate(zip(breeds, traits.tolist())):
+            item = {'id': idx + 1, 'breed': breed, 'thumbnail': thumbnails.get(breed)}
+            item.update(zip(self.features, row))
+            self.items.append(item)
+
+        # Permutaciones precalculadas para cada criterio de orden
+        names = [normalize_name(breed) for breed in breeds]
+        self._names = names
+        alphabetical = np.array(sorted(range(n), key=names.__getitem__), dtype=np.int64)
+        self._orders: Dict[str, np.ndarray] = {
+            'id': np.arange(n, dtype=np.int64),
+            '-id': np.arange(n, dtype=np.int64)[::-1],
+            'breed': alphabetical,
+            '-breed': alphabetical[::-1],
+        }
+        for col, feature in enumerate(self.features):
+            # Orden estable: a igual valor se conserva el orden alfabético
+            values = traits[alphabetical, col]
+            self._orders[feature] = alphabetical[np.argsort(values, kind='stable')]
+            self._orders[f'-{feature}'] = alphabetical[np.argsort(-values, kind='stable')]
+        self._traits = traits
+
+        # Índice de prefijos: (nombre o palabra del nombre, id) ordenados para bisect
+        prefix_keys = set()
+        for idx, name in enumerate(names):
+            prefix_keys.add((name, idx))
+            for word in name.split():
+                prefix_keys.add((word, idx))
+        self._prefix_index: List[Tuple[str, int]] = sorted(prefix_keys)
+
+        # Índice invertido de n-gramas para subcadenas arbitrarias
+        self._ngrams: Dict[str, np.ndarray] = {}
+        postings: Dict[str, set] = {}
+        for idx, name in enumerate(names):
+            for size in range(1, NGRAM + 1):
+                for start in range(len(name) - size + 1):
+                    postings.setdefault(name[start:start + size], set()).add(idx)
+        for gram, ids in postings.items():
+            self._ngrams[gram] = np.array(sorted(ids), dtype=np.int64)
+
+    @classmethod
+    def from_engine(cls, engine, thumbnails: Optional[Dict[str, Dict[str, str]]] = None) -> "BreedCatalog":
+        return cls(engine.breeds, engine.features, engine.traits, version=engine.fingerprint,
+                   thumbnails=thumbnails)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def prefix_matches(self, query: str) -> np.ndarray:
+        """Ids cuyo nombre o alguna de sus palabras empieza por query"""
+        start = bisect_left(self._prefix_index, (query, -1))
+        ids = set()
+        for key, idx in self._prefix_index[start:]:
+            if not key.startswith(query):
+                break
+            ids.add(idx)
+        return np.array(sorted(ids), dtype=np.int64)
+
+    def substring_matches(self, query: str) -> np.ndarray:
+        """Ids cuyo nombre contiene query: intersección de n-gramas y verificación final"""
+        if len(query) <= NGRAM:
+            return self._ngrams.get(query, np.empty(0, dtype=np.int64))
+        candidates = None
+        for start in range(len(query) - NGRAM + 1):
+            ids = self._ngrams.get(query[start:start + NGRAM])
+            if ids is None:
+                return np.empty(0, dtype=np.int64)
+            candidates = ids if candidates is None else np.intersect1d(candidates, ids, assume_unique=True)
+            if not candidates.size:
+                return candidates
+        return np.array([idx for idx in candidates.tolist() if query in self._names[idx]], dtype=np.int64)
+
+    def query(self, offset: int = 0, limit: int = 24, q: str = '', sort: str = 'id',
+              size: Optional[str] = None, allowed: Optional[np.ndarray] = None) -> Dict:
+        """Página de resultados filtrados y ordenados
+
+        sort acepta 'id' (orden del dataset), 'breed' o el nombre de una
+        característica, con '-' delante para orden descendente. Con búsqueda y
+        orden 'id' o 'breed', las coincidencias por prefijo van primero.
+        allowed es una máscara booleana opcional (p. ej. de TraitBitmapIndex).
+        """
+        sort = sort or 'id'
+        if sort not in self._orders:
+            raise ValueError(f"Orden desconocido '{sort}' (use id, breed o {self.features}, con '-' para descendente)")
+        order = self._orders[sort]
+
+        mask = np.ones(len(self.items), dtype=bool) if allowed is None else allowed.copy()
+        if size:
+            if size not in SIZE_GROUPS:
+                raise ValueError(f"Tamaño desconocido '{size}' (use {list(SIZE_GROUPS)})")
+            low, high = SIZE_GROUPS[size]
+            column = self._traits[:, self.features.index('size')]
+            mask &= (column >= low) & (column <= high)
+
+        q = normalize_name(q or '')
+        if q:
+            matched = np.zeros(len(self.items), dtype=bool)
+            matched[self.substring_matches(q)] = True
+            mask &= matched
+            ordered = order[mask[order]]
+            if sort in ('id', 'breed'):
+                # Relevancia: primero los nombres (o palabras) que empiezan por la búsqueda
+                is_prefix = np.zeros(len(self.items), dtype=bool)
+                is_prefix[self.prefix_matches(q)] = True
+                ordered = np.concatenate([ordered[is_prefix[ordered]], ordered[~is_prefix[ordered]]])
+        else:
+            ordered = order[mask[order]]
+
+        total = int(ordered.size)
+        page = ordered[offset:offset + limit].tolist()
+        next_offset = offset + len(page)
+        return {
+            'version': self.version,
+            'total': total,
+            'offset': offset,
+            'limit': limit,
+            'next_offset': next_offset if next_offset < total else None,
+            'items': [self.items[idx] for idx in page],
+        }
@@ -0,0 +1,134 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+# Cantidad de gráficos del dashboard: más procesos que estos no aportan nada
+MAX_USEFUL_PROCESSES = 7
+
+
+def _init_worker():
+    """Carga matplotlib/seaborn y el dataset una sola vez por proceso"""
+    from controllers import analytics_controller
+    analytics_controller.charts_module()
+    analytics_controller._cached_dataset()
+
+
+def _render_in_worker(name: str, fmt: str) -> bytes:
+    # analytics_controller del worker mantiene su propia copia del dataset y la
+    # recarga solo si cambia la huella del CSV
+    from controllers import analytics_controller
+    return analytics_controller.render_chart(name, fmt)
+
+
+class ChartProcessPool:
+    """Pool de procesos para renderizar gráficos en paralelo
+
+    pyplot no es seguro entre hilos y el renderizado de matplotlib no libera
+    el GIL, así que varios gráficos en hilos se ejecutan uno tras otro. Con
+    procesos, un /analytics en frío tarda lo que el gráfico más lento y no la
+    suma de todos. El pool se crea la primera vez que se usa, en el proceso que
+    lo usa: tras un fork el hijo descarta el pool heredado y crea el suyo.
+    """
+
+    def __init__(self, processes: int):
+        self.processes = processes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_process = False
+        self._submitted = 0
+        self._failed = 0
+        self._restarts = 0
+
+    @classmethod
+    def from_env(cls) -> "ChartProcessPool":
+        """DOG_CHART_PROCESSES (0 = renderizar en el hilo llamador); por defecto uno por núcleo hasta 7"""
+        cpus = os.cpu_count() or 1
+        # Con un solo núcleo un proceso aparte solo agrega memoria y tiempo de arranque
+        default = min(cpus, MAX_USEFUL_PROCESSES) if cpus > 1 else 0
+        return cls(int(os.environ.get("DOG_CHART_PROCESSES", default)))
+
+    @property
+    def enabled(self) -> bool:
+        return self.processes > 0 and not self._in_process
+
+    @contextmanager
+    def in_process(self):
+        """Renderiza en el proceso actual mientras dure el bloque (p. ej. precarga antes del fork)"""
+        previous, self._in_process = self._in_process, True
+        try:
+            yield
+        finally:
+            self._in_process = previous
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: no hereda hilos ni el estado global de forkserver del proceso que hizo fork
+                self._executor = ProcessPoolExecutor(max_workers=self.processes,
+                                                     mp_context=multiprocessing.get_context('spawn'),
+                                                     initializer=_init_worker)
+            return self._executor
+
+    def _after_fork_in_child(self) -> None:
+        # Los procesos y los hilos de gestión del pool heredado pertenecen al padre
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def submit(self, name: str, fmt: str) -> Future:
+        """Encola el renderizado de un gráfico y retorna un Future con los bytes"""
+        executor = self._get_executor()
+        try:
+            future = executor.submit(_render_in_worker, name, fmt)
+        except BrokenProcessPool:
+            self._reset(executor)
+            future = self._get_executor().submit(_render_in_worker, name, fmt)
+        with self._lock:
+            self._submitted += 1
+        return future
+
+    def render(self, name: str, fmt: str) -> bytes:
+        """Renderiza en un proceso del pool y espera el resultado"""
+        future = self.submit(name, fmt)
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            # Un worker murió (p. ej. por memoria): se recrea el pool para las próximas tareas
+            with self._lock:
+                self._failed += 1
+            self._reset(self._executor)
+            raise
+
+    def _reset(self, executor) -> None:
+        with self._lock:
+            if executor is not None and self._executor is executor:
+                self._executor = None
+                self._restarts += 1
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        """Detiene los procesos; el próximo uso crea un pool nuevo"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'processes': self.processes,
+                'running': self._executor is not None,
+                'submitted': self._submitted,
+                'failed': self._failed,
+                'restarts': self._restarts,
+            }
+
+
+# Pool compartido por analytics_controller
+chart_pool = ChartProcessPool.from_env()
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=chart_pool._after_fork_in_child)
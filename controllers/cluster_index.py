@@ -0,0 +1,127 @@
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+# Filas por bloque al asignar la matriz a los centroides (acota la memoria temporal)
+ASSIGN_CHUNK = 1 << 16
+
+
+def _normalize(rows: np.ndarray) -> np.ndarray:
+    rows = np.asarray(rows, dtype=np.float32)
+    norms = np.linalg.norm(rows, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(rows / norms, dtype=np.float32)
+
+
+class ClusterIndex:
+    """Índice invertido por clústeres (estilo IVF) sobre la matriz normalizada del motor
+
+    Cada fila se asigna al centroide más cercano (coseno) y las filas se
+    reordenan para que cada clúster quede contiguo en memoria. Una consulta
+    puntúa primero los centroides, recorre solo las filas de los nprobe
+    clústeres más cercanos y reordena esos candidatos con la similitud exacta
+    en float32; el resultado es aproximado solo porque algunas filas quedan
+    fuera de los clústeres visitados.
+    """
+
+    def __init__(self, matrix: np.ndarray, centroids: np.ndarray):
+        self.centroids = _normalize(centroids)
+        n_lists = len(self.centroids)
+
+        assignments = np.empty(len(matrix), dtype=np.int32)
+        for start in range(0, len(matrix), ASSIGN_CHUNK):
+            block = matrix[start:start + ASSIGN_CHUNK]
+            assignments[start:start + len(block)] = np.argmax(block @ self.centroids.T, axis=1)
+
+        # Filas ordenadas por clúster: las listas son vistas contiguas de una sola matriz
+        self.order = np.argsort(assignments, kind='stable').astype(np.intp)
+        self.offsets = np.zeros(n_lists + 1, dtype=np.intp)
+        np.cumsum(np.bincount(assignments, minlength=n_lists), out=self.offsets[1:])
+        self.lists = np.ascontiguousarray(matrix[self.order], dtype=np.float32)
+
+    @classmethod
+    def from_engine(cls, engine, centroids: np.ndarray) -> "ClusterIndex":
+        """Índice sobre los centroides del KMeans entrenado (espacio escalado del StandardScaler)"""
+        return cls(engine.matrix, centroids)
+
+    @classmethod
+    def train(cls, matrix: np.ndarray, n_lists: int, seed: int = 42,
+              sample_size: int = 100_000) -> "ClusterIndex":
+        """Entrena centroides propios para catálogos grandes (KMeans por mini-lotes sobre una muestra)"""
+        from sklearn.cluster import MiniBatchKMeans
+
+        rng = np.random.default_rng(seed)
+        sample = matrix if len(matrix) <= sample_size else matrix[rng.choice(len(matrix), sample_size, replace=False)]
+        n_lists = max(1, min(n_lists, len(sample)))
+        kmeans = MiniBatchKMeans(n_clusters=n_lists, random_state=seed, n_init=1,
+                                 batch_size=max(1024, 4 * n_lists))
+        kmeans.fit(sample)
+        return cls(matrix, kmeans.cluster_centers_)
+
+    def __len__(self) -> int:
+        return len(self.lists)
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    def probe(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """Clústeres a visitar, del más cercano al más lejano"""
+        scores = self.centroids @ query
+        nprobe = min(max(nprobe, 1), len(scores))
+        if nprobe < len(scores):
+            nearest = np.argpartition(scores, -nprobe)[-nprobe:]
+        else:
+            nearest = np.arange(len(scores))
+        return nearest[np.argsort(scores[nearest])[::-1]]
+
+    def search(self, query: np.ndarray, top_n: int = 5, nprobe: int = 8) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Top-n aproximado para una consulta ya escalada y normalizada
+
+        Retorna (índices de fila del motor, similitudes, filas recorridas).
+        Si los nprobe clústeres tienen menos de top_n filas se visitan más,
+        en orden de cercanía.
+        """
+        lists = self.probe(query, nprobe)
+        starts, stops = self.offsets[lists], self.offsets[lists + 1]
+        visited = np.cumsum(stops - starts)
+        if visited[-1] < top_n and len(lists) < self.n_lists:
+            # Clústeres casi vacíos: se ordenan todos y se toman los necesarios
+            lists = self.probe(query, self.n_lists)
+            starts, stops = self.offsets[lists], self.offsets[lists + 1]
+            visited = np.cumsum(stops - starts)
+            needed = min(int(np.searchsorted(visited, top_n)) + 1, len(lists))
+            starts, stops, visited = starts[:needed], stops[:needed], visited[:needed]
+
+        scores = np.concatenate([self.lists[start:stop] @ query for start, stop in zip(starts, stops)])
+        top_n = min(top_n, len(scores))
+        if top_n <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32), 0
+        if top_n < len(scores):
+            best = np.argpartition(scores, -top_n)[-top_n:]
+        else:
+            best = np.arange(len(scores))
+        best = best[np.argsort(scores[best])[::-1]]
+
+        # Posición en la concatenación -> fila en self.lists -> fila original del motor
+        which = np.searchsorted(visited, best, side='right')
+        positions = starts[which] + best - (visited[which] - (stops[which] - starts[which]))
+        return self.order[positions], scores[best], len(scores)
+
+    def stats(self) -> Dict:
+        sizes = np.diff(self.offsets)
+        return {
+            'rows': len(self),
+            'lists': self.n_lists,
+            'min_list': int(sizes.min()) if len(sizes) else 0,
+            'max_list': int(sizes.max()) if len(sizes) else 0,
+            'mean_list': round(float(sizes.mean()), 1) if len(sizes) else 0.0,
+        }
+
+
+def build_cluster_index(engine, centroids: Optional[np.ndarray]) -> Optional[ClusterIndex]:
+    """ClusterIndex del motor si hay centroides KMeans disponibles"""
+    if centroids is None or len(centroids) == 0:
+        return None
+    if centroids.shape[1] != len(engine.features):
+        raise ValueError(f"Los centroides tienen {centroids.shape[1]} dimensiones y el modelo {len(engine.features)}")
+    return ClusterIndex.from_engine(engine, centroids)
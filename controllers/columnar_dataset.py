@@ -0,0 +1,263 @@
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Formato del archivo (mismo esquema de contenedor que el bundle de modelos):
+#   MAGIC (8 bytes) | longitud del encabezado JSON (uint32 LE) | encabezado JSON
+#   | columnas crudas, cada una alineada a 64 bytes
+# El encabezado lleva el esquema (nombre y tipo de cada columna), el número de
+# filas, la huella del contenido y el offset de cada columna. Las
+# características se guardan como int8 (una columna por característica) y los
+# nombres como UTF-8 concatenado más offsets int64 (como una columna de texto Arrow).
+MAGIC = b'DOGCOLS1'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+COLUMNAR_PATH = 'data/dog_breeds_dataset.col'
+CSV_PATH = 'data/dog_breeds_dataset.csv'
+
+FEATURES = ['size', 'energy_level', 'trainability', 'good_with_kids', 'exercise_needs',
+            'barking_tendency', 'grooming_needs', 'apartment_friendly', 'good_alone', 'watchdog_ability']
+# Escala 1-5 (la misma que la tabla de respuestas, los filtros y la validación de perfiles)
+TRAIT_RANGE = (1, 5)
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def resolve_dataset_path(columnar_path: str = COLUMNAR_PATH, csv_path: str = CSV_PATH) -> str:
+    """El archivo columnar si existe; si no, el CSV (instalaciones sin ingesta previa)"""
+    return columnar_path if os.path.exists(columnar_path) else csv_path
+
+
+def is_columnar(path: str) -> bool:
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class ColumnarDataset:
+    """Dataset de razas mapeado en memoria: columnas int8 y nombres sin copia ni parseo de texto"""
+
+    def __init__(self, path: str, header: dict, columns: Dict[str, np.ndarray],
+                 name_offsets: np.ndarray, name_data: np.ndarray, buffer=None):
+        self.path = path
+        self.header = header
+        self.columns = columns
+        self._name_offsets = name_offsets
+        self._name_data = name_data
+        self._buffer = buffer   # mantiene vivo el mmap mientras existan las vistas
+        self._names = None
+
+    @property
+    def features(self) -> List[str]:
+        return [column['name'] for column in self.header['schema'] if column['type'] == 'int8']
+
+    @property
+    def fingerprint(self) -> str:
+        return self.header['fingerprint']
+
+    def __len__(self) -> int:
+        return self.header['rows']
+
+    @property
+    def breeds(self) -> List[str]:
+        """Nombres decodificados una sola vez, al primer uso"""
+        if self._names is None:
+            data = self._name_data.tobytes()
+            offsets = self._name_offsets.tolist()
+            self._names = [data[start:stop].decode('utf-8') for start, stop in zip(offsets, offsets[1:])]
+        return self._names
+
+    def traits(self, features: Optional[List[str]] = None) -> np.ndarray:
+        """Matriz filas x características (int8); es la única copia, de 1 byte por valor
+
+        En orden Fortran (cada característica contigua, como el bloque de pandas) para
+        que escalado y normas den bit a bit lo mismo que con el DataFrame del CSV.
+        """
+        features = features or self.features
+        matrix = np.empty((len(self), len(features)), dtype=np.int8, order='F')
+        for i, name in enumerate(features):
+            matrix[:, i] = self.columns[name]
+        return matrix
+
+    def to_frame(self):
+        """DataFrame con las mismas columnas que el CSV (breed + características int8 sobre el mmap)"""
+        import pandas as pd
+        frame = pd.DataFrame({name: self.columns[name] for name in self.features}, copy=False)
+        frame.insert(0, 'breed', self.breeds)
+        return frame
+
+
+def load_columnar(path: str = COLUMNAR_PATH) -> ColumnarDataset:
+    """Mapea el archivo en memoria (solo lectura); las columnas son vistas sin copia"""
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} no es un dataset columnar válido")
+    (header_len,) = struct.unpack_from('<I', buffer, len(MAGIC))
+    header_start = len(MAGIC) + 4
+    header = json.loads(bytes(buffer[header_start:header_start + header_len]).decode('utf-8'))
+    if header.get('version') != FORMAT_VERSION:
+        raise ValueError(f"Versión de dataset columnar no soportada: {header.get('version')}")
+
+    data_start = _align(header_start + header_len)
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        arrays[name] = np.frombuffer(buffer, dtype=np.dtype(spec['dtype']), count=spec['count'],
+                                     offset=data_start + spec['offset'])
+    columns = {column['name']: arrays[column['name']] for column in header['schema'] if column['type'] == 'int8'}
+    return ColumnarDataset(path, header, columns, arrays['breed.offsets'], arrays['breed.data'], buffer)
+
+
+def read_dataset(path: Optional[str] = None):
+    """DataFrame del dataset, desde el archivo columnar (mapeado) o desde el CSV"""
+    path = path or resolve_dataset_path()
+    if is_columnar(path):
+        return load_columnar(path).to_frame()
+    import pandas as pd
+    return pd.read_csv(path)
+
+
+def read_columns(path: Optional[str] = None) -> Dict[str, np.ndarray]:
+    """Columnas de características sin DataFrame ni nombres: vistas int8 del mmap si es columnar"""
+    path = path or resolve_dataset_path()
+    if is_columnar(path):
+        return load_columnar(path).columns
+    import pandas as pd
+    df = pd.read_csv(path)
+    return {name: df[name].to_numpy() for name in df.columns if name != 'breed'}
+
+
+def read_traits(path: Optional[str] = None) -> Tuple[List[str], List[str], np.ndarray]:
+    """(razas, características, matriz filas x características) sin pasar por un DataFrame"""
+    path = path or resolve_dataset_path()
+    if is_columnar(path):
+        dataset = load_columnar(path)
+        return dataset.breeds, dataset.features, dataset.traits()
+    import pandas as pd
+    df = pd.read_csv(path)
+    features = [column for column in df.columns if column != 'breed']
+    return df['breed'].tolist(), features, df[features].to_numpy()
+
+
+def dataset_fingerprint(path: str) -> str:
+    """Huella del contenido: la del encabezado si es columnar (O(1)); sha256 del archivo si es CSV"""
+    if is_columnar(path):
+        with open(path, 'rb') as f:
+            f.seek(len(MAGIC))
+            (header_len,) = struct.unpack('<I', f.read(4))
+            return json.loads(f.read(header_len).decode('utf-8'))['fingerprint']
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+class ColumnarWriter:
+    """Escribe el dataset por bloques con memoria acotada
+
+    Cada bloque se anexa a un archivo temporal por columna; al cerrar se
+    ensamblan en el formato final con copias en streaming y se reemplaza el
+    destino de forma atómica. Así se pueden ingerir millones de filas sin
+    tener el dataset completo en memoria.
+    """
+
+    def __init__(self, path: str, features: Iterable[str] = FEATURES, metadata: Optional[dict] = None):
+        self.path = path
+        self.features = list(features)
+        self.metadata = metadata or {}
+        self.rows = 0
+        self._name_bytes = 0
+        self._spill_dir = tempfile.mkdtemp(prefix='dogcols-', dir=os.path.dirname(os.path.abspath(path)) or '.')
+        self._spills = {name: open(os.path.join(self._spill_dir, name), 'wb')
+                        for name in self.features + ['breed.offsets', 'breed.data']}
+        # Un hash por columna: la huella no depende de cómo se partió la entrada en bloques
+        self._digests = {name: hashlib.sha256() for name in self._spills}
+        self._write('breed.offsets', np.zeros(1, dtype='<i8').tobytes())
+
+    def _write(self, name: str, data: bytes) -> None:
+        self._spills[name].write(data)
+        self._digests[name].update(data)
+
+    def append(self, breeds: List[str], traits: np.ndarray) -> None:
+        """Anexa un bloque: nombres y matriz filas x características dentro de TRAIT_RANGE"""
+        traits = np.asarray(traits)
+        if traits.shape != (len(breeds), len(self.features)):
+            raise ValueError(f"Forma {traits.shape} no coincide con {len(breeds)} filas x {len(self.features)}")
+        low, high = TRAIT_RANGE
+        if traits.size and (traits.min() < low or traits.max() > high):
+            raise ValueError(f"Valores de características fuera de {low}-{high}")
+        traits = traits.astype(np.int8)
+        for j, name in enumerate(self.features):
+            self._write(name, np.ascontiguousarray(traits[:, j]).tobytes())
+
+        encoded = [breed.encode('utf-8') for breed in breeds]
+        lengths = np.fromiter((len(name) for name in encoded), dtype=np.int64, count=len(encoded))
+        offsets = self._name_bytes + np.cumsum(lengths)
+        data = b''.join(encoded)
+        self._write('breed.offsets', offsets.astype('<i8').tobytes())
+        self._write('breed.data', data)
+        self._name_bytes += len(data)
+        self.rows += len(breeds)
+
+    def close(self) -> dict:
+        """Ensambla el archivo final y retorna su encabezado"""
+        for spill in self._spills.values():
+            spill.close()
+        sizes = {name: os.path.getsize(os.path.join(self._spill_dir, name)) for name in self._spills}
+        dtypes = {name: '|i1' for name in self.features}
+        dtypes.update({'breed.offsets': '<i8', 'breed.data': '|u1'})
+
+        header = {
+            'version': FORMAT_VERSION,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'rows': self.rows,
+            'schema': [{'name': 'breed', 'type': 'utf8'}] + [{'name': name, 'type': 'int8'} for name in self.features],
+            'fingerprint': self._fingerprint(),
+            'arrays': {},
+        }
+        header.update(self.metadata)
+        offset = 0
+        for name in self._spills:
+            header['arrays'][name] = {'offset': offset, 'dtype': dtypes[name],
+                                      'count': sizes[name] // np.dtype(dtypes[name]).itemsize}
+            offset = _align(offset + sizes[name])
+
+        header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+        data_start = _align(len(MAGIC) + 4 + len(header_bytes))
+        tmp_path = f'{self.path}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(MAGIC)
+                f.write(struct.pack('<I', len(header_bytes)))
+                f.write(header_bytes)
+                for name in self._spills:
+                    f.write(b'\0' * (data_start + header['arrays'][name]['offset'] - f.tell()))
+                    with open(os.path.join(self._spill_dir, name), 'rb') as spill:
+                        shutil.copyfileobj(spill, f, 1 << 20)
+            os.replace(tmp_path, self.path)
+        finally:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+        return header
+
+    def _fingerprint(self) -> str:
+        digest = hashlib.sha256()
+        for name, column_digest in self._digests.items():
+            digest.update(name.encode('utf-8') + column_digest.digest())
+        return digest.hexdigest()[:16]
+
+    def abort(self) -> None:
+        for spill in self._spills.values():
+            spill.close()
+        shutil.rmtree(self._spill_dir, ignore_errors=True)
@@ -0,0 +1,188 @@
+import gzip
+import hashlib
+from typing import Dict, Iterable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.responses import Response
+
+# brotli es opcional: sin él solo se ofrecen gzip e identidad
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Respuestas más pequeñas no compensan el costo de comprimir
+MIN_COMPRESS_SIZE = 1024
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'image/svg+xml',
+                      'application/x-ndjson')
+
+# Orden de preferencia ante calidades iguales en Accept-Encoding
+PREFERRED_ENCODINGS = ('br', 'gzip', 'identity')
+
+
+def available_encodings() -> tuple:
+    return PREFERRED_ENCODINGS if brotli is not None else ('gzip', 'identity')
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """{codificación: calidad} de un encabezado Accept-Encoding"""
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def choose_encoding(header: Optional[str], offered: Iterable[str]) -> str:
+    """Mejor codificación aceptada por el cliente entre las ofrecidas ('identity' si ninguna)"""
+    if not header:
+        return 'identity'
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*')
+    best, best_quality = 'identity', 0.0
+    for coding in PREFERRED_ENCODINGS:
+        if coding not in offered or coding == 'identity':
+            continue
+        quality = accepted.get(coding, wildcard if wildcard is not None else 0.0)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    if encoding == 'gzip':
+        # mtime=0: mismo contenido, mismos bytes (ETag y cachés estables)
+        return gzip.compress(body, compresslevel=level or 6, mtime=0)
+    if encoding == 'br':
+        return brotli.compress(body, quality=level if level is not None else 5)
+    return body
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparación débil de If-None-Match (lista de ETags o *)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith('W/') else candidate) == opaque:
+            return True
+    return False
+
+
+class PrecompressedPage:
+    """Página renderizada una vez, con sus variantes gzip/brotli ya comprimidas en memoria
+
+    Se comprime con el nivel máximo porque el costo se paga una sola vez; cada
+    petición solo elige la variante según Accept-Encoding, o responde 304 si
+    el cliente ya tiene esa versión (ETag).
+    """
+
+    def __init__(self, body: bytes, media_type: str = 'text/html; charset=utf-8',
+                 cache_control: str = 'no-cache'):
+        self.media_type = media_type
+        self.cache_control = cache_control
+        # ETag débil: las variantes comprimidas son semánticamente la misma representación
+        self.etag = f'W/"{hashlib.sha256(body).hexdigest()[:20]}"'
+        self.variants = {'identity': body}
+        for encoding, level in (('gzip', 9), ('br', 11)):
+            if encoding in available_encodings():
+                compressed = compress(body, encoding, level)
+                if len(compressed) < len(body):
+                    self.variants[encoding] = compressed
+
+    def sizes(self) -> Dict[str, int]:
+        return {encoding: len(data) for encoding, data in self.variants.items()}
+
+    def response(self, request: Request) -> Response:
+        headers = {'ETag': self.etag, 'Cache-Control': self.cache_control, 'Vary': 'Accept-Encoding'}
+        if etag_matches(request.headers.get('if-none-match'), self.etag):
+            return Response(status_code=304, headers=headers)
+        encoding = choose_encoding(request.headers.get('accept-encoding'), self.variants)
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        return Response(self.variants[encoding], media_type=self.media_type, headers=headers)
+
+
+class CompressionMiddleware:
+    """Middleware ASGI que comprime respuestas dinámicas (brotli o gzip según Accept-Encoding)
+
+    Solo comprime respuestas de un único mensaje, de tipo textual y de al
+    menos MIN_COMPRESS_SIZE bytes; las respuestas en streaming, las que ya
+    traen Content-Encoding (páginas precomprimidas) y las imágenes pasan tal
+    cual. Usa niveles rápidos: la compresión ocurre en cada petición.
+    """
+
+    def __init__(self, app, minimum_size: int = MIN_COMPRESS_SIZE, gzip_level: int = 6,
+                 brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {'gzip': gzip_level, 'br': brotli_quality}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get('accept-encoding'), available_encodings())
+        if encoding == 'identity':
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message['type'] == 'http.response.start':
+                # Se retiene hasta ver el cuerpo: los encabezados dependen de si se comprime
+                start = message
+                return
+            if message['type'] != 'http.response.body':
+                # Extensiones (p. ej. http.response.debug antes del inicio) pasan sin tocar
+                if start is not None:
+                    passthrough = True
+                    await send(start)
+                await send(message)
+                return
+
+            body = message.get('body', b'')
+            headers = MutableHeaders(raw=start['headers'])
+            content_type = headers.get('content-type', '')
+            if message.get('more_body', False) or 'content-encoding' in headers \
+                    or len(body) < self.minimum_size or start['status'] in (204, 304) \
+                    or not content_type.startswith(COMPRESSIBLE_TYPES):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding, self.levels[encoding])
+            headers['Content-Encoding'] = encoding
+            # Los bytes codificados son otra representación: un ETag fuerte ya no los identifica
+            etag = headers.get('etag')
+            if etag and not etag.startswith('W/'):
+                headers['ETag'] = f'W/{etag}'
+            headers['Content-Length'] = str(len(compressed))
+            headers.add_vary_header('Accept-Encoding')
+            await send(start)
+            await send({'type': 'http.response.body', 'body': compressed})
+
+        await self.app(scope, receive, send_wrapper)
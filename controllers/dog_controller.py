@@ -1,17 +1,24 @@
 import joblib
 import numpy as np
-import pandas as pd
-import json
-import seaborn as sns
-import matplotlib.pyplot as plt
-from sklearn.metrics.pairwise import cosine_similarity
+import hmac
 from io import BytesIO
-from PIL import Image
 import base64
-from fastapi import APIRouter, Request, Form
+from fastapi import APIRouter, Request, Form, HTTPException, Header, Query
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, JSONResponse
+from pydantic import BaseModel, Field, conint, conlist
+from typing import List, Optional
 import os
+from controllers.svg_charts import comparison_bar_svg, radar_svg
+from controllers.result_cache import ResultCache, MISSING
+from controllers.single_flight import SingleFlight
+from controllers.compression import PrecompressedPage
+from controllers.model_snapshot import SnapshotManager, SCALER_PATH, KMEANS_PATH
+from controllers.breed_catalog import BreedCatalog
+from controllers.trait_filter import FilterSyntaxError
+from controllers.metrics import REGISTRY, CACHE_EVENTS, stage
+from controllers.startup_report import timed
 
 # Crear el enrutador para las peticiones
 router = APIRouter()
@@ -19,44 +26,142 @@ router = APIRouter()
 # Inicializar el objeto Jinja2Templates
 templates = Jinja2Templates(directory="templates")
 
-# Cargar modelos y datos
+# Límite de perfiles por petición del endpoint batch
+MAX_BATCH_PROFILES = int(os.environ.get("DOG_MAX_BATCH_PROFILES", "10000"))
+
+# Longitud máxima de una expresión de restricciones (p. ej. "energy_level<=2 AND size>=4")
+MAX_CONSTRAINTS_LENGTH = 500
+
+# Un perfil: exactamente 10 valores enteros 1-5; pydantic lo valida antes de convertir a numpy
+TraitValue = conint(ge=1, le=5)
+Profile = conlist(TraitValue, min_length=10, max_length=10)
+
+class BatchRecommendationRequest(BaseModel):
+    """Perfiles a puntuar, cada uno con 10 valores (1-5) en el orden de breed_info['features']"""
+    # El tope se valida en el modelo: una lista enorme se rechaza sin validar todos sus perfiles
+    profiles: List[Profile] = Field(..., max_length=MAX_BATCH_PROFILES,
+                                    description=f"Lista de hasta {MAX_BATCH_PROFILES} perfiles de 10 características (1-5)")
+    top_n: int = Field(5, ge=1, le=20, description="Número de razas a retornar por perfil")
+    constraints: str = Field("", max_length=MAX_CONSTRAINTS_LENGTH,
+                             description="Restricciones duras, p. ej. 'apartment_friendly>=4 AND good_with_kids=5'")
+
+# Búsqueda por clústeres KMeans (estilo IVF): 'auto' la usa desde DOG_IVF_MIN_ROWS filas,
+# 'ivf' siempre que haya centroides y 'exact' nunca; DOG_IVF_NPROBE = clústeres visitados
+# (2 de los 5 centroides del KMeans entrenado da recall@5 ~0.96, ver benchmark_cluster_search.py)
+SEARCH_MODE = os.environ.get("DOG_SEARCH_MODE", "auto")
+IVF_NPROBE = int(os.environ.get("DOG_IVF_NPROBE", "2"))
+IVF_MIN_ROWS = int(os.environ.get("DOG_IVF_MIN_ROWS", "50000"))
+
+# Paginación del catálogo de razas (/breeds y /api/breeds)
+BREEDS_PAGE_SIZE = int(os.environ.get("DOG_BREEDS_PAGE_SIZE", "24"))
+MAX_BREEDS_PAGE_SIZE = 200
+
+# Modelos sklearn que no se necesitan para servir /recommend
+_lazy_models = {}
+
+# Snapshot servido (motor + breed_info + imágenes + tabla de respuestas); se reemplaza
+# de forma atómica al recargar. KNN, KMeans y el scaler pickle se cargan bajo demanda.
+snapshots = SnapshotManager()
 try:
-    scaler = joblib.load('models/dog_scaler.pkl')
-    knn_model = joblib.load('models/dog_knn_model.pkl')
-    kmeans_model = joblib.load('models/dog_kmeans_model.pkl')
-    
-    with open('models/breed_info.json', 'r', encoding='utf-8') as f:
-        breed_info = json.load(f)
-    
-    # Cargar imágenes de razas
-    with open('static/dog_images.json', 'r', encoding='utf-8') as f:
-        dog_images = json.load(f)
-    
-    # Cargar dataset original
-    df = pd.read_csv('data/dog_breeds_dataset.csv')
-    
+    snapshots.load_initial(timer=timed)
+    if snapshots.current.answer_table is not None:
+        print(f"✓ Tabla de respuestas mapeada en memoria ({snapshots.current.answer_table.path})")
     print("✓ Modelos de perros cargados exitosamente")
 except Exception as e:
     print(f"Error cargando modelos: {e}")
 
+# Caché de recomendaciones + gráficos por perfil (DOG_RESULT_CACHE_SIZE/_TTL/_POLICY)
+recommendation_cache = ResultCache.from_env()
+# Fallos de caché idénticos y simultáneos (p. ej. el formulario por defecto en un pico) se calculan una vez
+recommendation_flights = SingleFlight()
+
+# Vigilancia de artefactos para recarga en caliente (segundos entre comprobaciones, 0 = desactivada)
+MODEL_WATCH_INTERVAL = float(os.environ.get("DOG_MODEL_WATCH_INTERVAL", "5"))
+# Token para POST /admin/reload; sin token la ruta queda deshabilitada (la IP de origen no es
+# confiable detrás de un proxy en el mismo host) y las recargas dependen solo del watcher
+ADMIN_TOKEN = os.environ.get("DOG_ADMIN_TOKEN", "")
+
+def _on_snapshot_swap(previous, current):
+    """Tras una recarga: las entradas de caché y los modelos sklearn ya no corresponden"""
+    _lazy_models.clear()
+    if previous is None or previous.version != current.version:
+        recommendation_cache.clear()
+
+snapshots.on_swap(_on_snapshot_swap)
+
+# Métricas leídas al exportar /metrics (sin costo en el camino de las peticiones)
+REGISTRY.gauge('dog_model_info', 'Versión y origen del modelo servido',
+               lambda: [((snapshots.current.version, snapshots.current.source), 1)] if snapshots.current else [],
+               ('version', 'source'))
+REGISTRY.gauge('dog_model_generation', 'Generación del snapshot servido (sube con cada recarga)',
+               lambda: snapshots.current.generation if snapshots.current else None)
+REGISTRY.gauge('dog_model_reloads_total', 'Recargas de modelos por resultado',
+               lambda: [(('ok',), snapshots.reloads), (('error',), snapshots.failures)], ('result',), kind='counter')
+REGISTRY.gauge('dog_model_breeds', 'Razas en el modelo servido',
+               lambda: len(snapshots.current.engine) if snapshots.current else None)
+REGISTRY.gauge('dog_recommendation_cache_entries', 'Entradas en la caché de /recommend',
+               lambda: len(recommendation_cache))
+REGISTRY.gauge('dog_recommendation_inflight', 'Cálculos de /recommend en curso (uno por perfil distinto)',
+               lambda: len(recommendation_flights))
+REGISTRY.gauge('dog_recommendation_cache_evictions_total', 'Expulsiones de la caché de /recommend por motivo',
+               lambda: [(('capacity',), recommendation_cache.evictions),
+                        (('ttl',), recommendation_cache.expirations),
+                        (('invalidation',), recommendation_cache.invalidations)], ('reason',), kind='counter')
+
+# Catálogo precalculado ((versión, generación), catálogo); se reconstruye solo cuando cambia el snapshot
+_catalog_state = (None, None)
+
+def get_catalog(snapshot=None):
+    """Catálogo de razas del snapshot servido, construido una vez por recarga"""
+    global _catalog_state
+    snapshot = snapshot or snapshots.current
+    # La generación cuenta también recargas que solo cambian las miniaturas
+    key = (snapshot.version, snapshot.generation)
+    version, catalog = _catalog_state
+    if version != key:
+        catalog = BreedCatalog.from_engine(snapshot.engine, thumbnails=snapshot.thumbnails)
+        _catalog_state = (key, catalog)
+    return catalog
+
+def get_scaler():
+    """StandardScaler de sklearn, cargado la primera vez que se usa"""
+    if 'scaler' not in _lazy_models:
+        _lazy_models['scaler'] = joblib.load(SCALER_PATH)
+    return _lazy_models['scaler']
+
+def get_knn_model():
+    """Modelo KNN, cargado la primera vez que se usa"""
+    if 'knn' not in _lazy_models:
+        _lazy_models['knn'] = joblib.load('models/dog_knn_model.pkl')
+    return _lazy_models['knn']
+
+def get_kmeans_model():
+    """Modelo KMeans, cargado la primera vez que se usa"""
+    if 'kmeans' not in _lazy_models:
+        _lazy_models['kmeans'] = joblib.load(KMEANS_PATH)
+    return _lazy_models['kmeans']
+
 def recommend_breed(user_preferences):
     """Recomienda razas basadas en las preferencias del usuario"""
+    engine = snapshots.current.engine
     try:
         # Normalizar las preferencias del usuario
-        user_scaled = scaler.transform([user_preferences])
+        with stage('recommend_breed', 'scaling'):
+            user_scaled = get_scaler().transform([user_preferences])
         
         # Usar KNN para encontrar razas similares
-        distances, indices = knn_model.kneighbors(user_scaled, n_neighbors=5)
+        with stage('recommend_breed', 'knn'):
+            distances, indices = get_knn_model().kneighbors(user_scaled, n_neighbors=5)
         
         # Obtener las razas recomendadas
         recommended_breeds = []
         for idx in indices[0]:
-            breed_name = df.iloc[idx]['breed']
+            breed_name = engine.breeds[idx]
             similarity = 1 / (1 + distances[0][len(recommended_breeds)])  # Convertir distancia a similitud
             recommended_breeds.append({
                 'breed': breed_name,
                 'similarity': similarity,
-                'characteristics': df.iloc[idx].to_dict()
+                'characteristics': engine.records[idx]
             })
         
         return recommended_breeds
@@ -64,43 +169,57 @@ def recommend_breed(user_preferences):
         print(f"Error en recomendación: {e}")
         return []
 
-def find_similar_breeds(user_preferences, top_n=5):
-    """Encuentra razas similares usando similitud coseno"""
+def find_similar_breeds(user_preferences, top_n=5, snapshot=None, constraints=None):
+    """Encuentra razas similares usando similitud coseno
+
+    constraints es una expresión de restricciones duras (ver TraitBitmapIndex);
+    solo se puntúan las razas que la cumplen. Lanza FilterSyntaxError si es inválida.
+    """
+    snapshot = snapshot or snapshots.current
+    engine, answer_table = snapshot.engine, snapshot.answer_table
+    if constraints:
+        with stage('find_similar_breeds', 'constraint_filter'):
+            candidates = snapshot.trait_index.filter(constraints)
+        if not candidates.size:
+            return []
+        with stage('find_similar_breeds', 'constrained_similarity'):
+            return engine.top_k(user_preferences, top_n=top_n, candidates=candidates)
     try:
-        # Normalizar preferencias del usuario
-        user_scaled = scaler.transform([user_preferences])
-        
-        # Normalizar todo el dataset
-        x_scaled = scaler.transform(df.drop('breed', axis=1))
-        
-        # Calcular similitud coseno
-        similarities = cosine_similarity(user_scaled, x_scaled)[0]
-        
-        # Obtener los indices más similares
-        similar_indices = similarities.argsort()[-top_n:][::-1]
-        
-        results = []
-        for idx in similar_indices:
-            breed_data = df.iloc[idx]
-            results.append({
-                'breed': breed_data['breed'],
-                'similarity': similarities[idx],
-                'characteristics': breed_data.to_dict()
-            })
-        
-        return results
+        # Camino O(1): índices precalculados en la tabla mapeada en memoria
+        if answer_table is not None and top_n <= answer_table.k:
+            with stage('find_similar_breeds', 'answer_table'):
+                indices = answer_table.lookup(user_preferences)
+                if indices is not None:
+                    return engine.results_for(user_preferences, indices[:top_n])
+        if use_cluster_search(snapshot):
+            with stage('find_similar_breeds', 'cluster_search'):
+                indices, _, _ = snapshot.cluster_index.search(engine.scale_preferences(user_preferences),
+                                                              top_n=top_n, nprobe=IVF_NPROBE)
+                return engine.results_for(user_preferences, indices)
+        with stage('find_similar_breeds', 'similarity'):
+            return engine.top_k(user_preferences, top_n=top_n)
     except Exception as e:
         print(f"Error buscando similares: {e}")
         return []
 
+def use_cluster_search(snapshot) -> bool:
+    """Búsqueda aproximada por clústeres según DOG_SEARCH_MODE y el tamaño del catálogo"""
+    if snapshot.cluster_index is None or SEARCH_MODE == 'exact':
+        return False
+    return SEARCH_MODE == 'ivf' or len(snapshot.engine) >= IVF_MIN_ROWS
+
 def generate_comparison_plot(user_preferences, recommended_breeds):
     """Genera un gráfico comparativo entre el perfil del usuario y las razas recomendadas"""
     try:
         # Preparar datos para el gráfico
-        features = breed_info['features']
+        features = snapshots.current.breed_info['features']
+        
+        # matplotlib se importa solo si se usa este gráfico (fuera del camino de /recommend)
+        from matplotlib.figure import Figure
         
-        # Crear el gráfico
-        fig, ax = plt.subplots(figsize=(12, 8))
+        # Crear el gráfico (API orientada a objetos: segura fuera del hilo principal)
+        fig = Figure(figsize=(12, 8))
+        ax = fig.subplots()
         
         # Gráfico de radar/polar sería ideal, pero usaremos barras por simplicidad
         x_pos = np.arange(len(features))
@@ -126,38 +245,89 @@ def generate_comparison_plot(user_preferences, recommended_breeds):
         
         # Guardar como imagen base64
         buf = BytesIO()
-        plt.tight_layout()
-        plt.savefig(buf, format="png", dpi=150, bbox_inches='tight')
-        buf.seek(0)
+        with stage('comparison_plot', 'savefig'):
+            fig.tight_layout()
+            fig.savefig(buf, format="png", dpi=150, bbox_inches='tight')
         img_base64 = base64.b64encode(buf.getvalue()).decode("utf-8")
         
-        plt.close(fig)
         return img_base64
     
     except Exception as e:
         print(f"Error generando gráfico: {e}")
         return None
 
+def generate_comparison_svgs(user_preferences, recommended_breeds, features=None):
+    """Genera los gráficos comparativos (barras y radar) como SVG en línea, sin matplotlib"""
+    try:
+        features = features or snapshots.current.breed_info['features']
+        breed_name, breed_values = '', ()
+        if recommended_breeds:
+            best_breed = recommended_breeds[0]
+            breed_name = best_breed['breed']
+            breed_values = [best_breed['characteristics'][feature] for feature in features]
+        
+        return {
+            'bars': comparison_bar_svg(features, user_preferences, breed_name, breed_values),
+            'radar': radar_svg(features, user_preferences, breed_name, breed_values)
+        }
+    except Exception as e:
+        print(f"Error generando gráficos SVG: {e}")
+        return None
+
+# Páginas prerenderizadas y precomprimidas: plantilla -> (clave, PrecompressedPage)
+_static_pages = {}
+
+def get_static_page(template_name, key=None, context=None):
+    """Página renderizada una vez por clave (p. ej. versión del modelo) con variantes gzip/brotli"""
+    state = _static_pages.get(template_name)
+    if state is None or state[0] != key:
+        with stage('static_page', template_name):
+            body = templates.get_template(template_name).render(context or {}).encode('utf-8')
+            state = (key, PrecompressedPage(body))
+        _static_pages[template_name] = state
+    return state[1]
+
+def get_form_page(snapshot=None):
+    snapshot = snapshot or snapshots.current
+    breed_info = snapshot.breed_info
+    # Depende solo de breed_info: se rerenderiza cuando cambia el snapshot
+    return get_static_page("dog_form_new.html", key=(snapshot.version, snapshot.generation), context={
+        "features": breed_info['features'],
+        "descriptions": breed_info['feature_descriptions']
+    })
+
 @router.get("/", response_class=HTMLResponse, tags=["Web Interface"], 
             summary="Página de Inicio",
             description="Renderiza la página principal con información sobre el sistema de recomendación de razas")
 async def home_page(request: Request):
-    return templates.TemplateResponse("dog_home.html", {"request": request})
+    return get_static_page("dog_home.html").response(request)
 
 @router.get("/home", response_class=HTMLResponse, tags=["Web Interface"], include_in_schema=False)
 async def home_page_redirect(request: Request):
     """Redirección alternativa a la página de inicio"""
-    return templates.TemplateResponse("dog_home.html", {"request": request})
+    return get_static_page("dog_home.html").response(request)
 
 @router.get("/form", response_class=HTMLResponse, tags=["Web Interface"],
             summary="Formulario de Preferencias",
             description="Formulario interactivo de 3 pasos para capturar las preferencias del usuario")
 async def dog_form_step(request: Request):
-    return templates.TemplateResponse("dog_form_new.html", {
-        "request": request,
-        "features": breed_info['features'],
-        "descriptions": breed_info['feature_descriptions']
-    })
+    return get_form_page().response(request)
+
+def _compute_recommendation(cache_key, user_preferences, snapshot, constraints):
+    """Recomendaciones + gráficos de un perfil; se guarda en caché antes de liberar a quienes esperan"""
+    # Obtener recomendaciones (solo entre las razas que cumplen las restricciones)
+    with stage('recommend', 'similarity'):
+        recommendations = find_similar_breeds(user_preferences, top_n=5, snapshot=snapshot,
+                                              constraints=constraints)
+    
+    # Generar gráficos comparativos (SVG en línea, microsegundos y sin matplotlib)
+    with stage('recommend', 'comparison_svg'):
+        comparison_charts = generate_comparison_svgs(user_preferences, recommendations,
+                                                     snapshot.breed_info['features'])
+    
+    if recommendations:
+        recommendation_cache.put(cache_key, (recommendations, comparison_charts))
+    return recommendations, comparison_charts
 
 @router.post("/recommend", response_class=HTMLResponse, tags=["API"],
              summary="Obtener Recomendaciones",
@@ -173,7 +343,9 @@ async def recommend_dogs(
     grooming_needs: int = Form(..., ge=1, le=5, description="Nivel de grooming aceptable"),
     apartment_friendly: int = Form(..., ge=1, le=5, description="Necesidad de adaptación a apartamento"),
     good_alone: int = Form(..., ge=1, le=5, description="Capacidad de estar solo"),
-    watchdog_ability: int = Form(..., ge=1, le=5, description="Necesidad de capacidad de guardián")
+    watchdog_ability: int = Form(..., ge=1, le=5, description="Necesidad de capacidad de guardián"),
+    constraints: str = Form("", max_length=MAX_CONSTRAINTS_LENGTH,
+                            description="Restricciones duras opcionales, p. ej. 'energy_level<=2 AND apartment_friendly>=4'")
 ):
     
     # Recopilar preferencias del usuario
@@ -182,28 +354,160 @@ async def recommend_dogs(
         barking_tendency, grooming_needs, apartment_friendly, good_alone, watchdog_ability
     ]
     
-    # Obtener recomendaciones
-    recommendations = find_similar_breeds(user_preferences, top_n=5)
+    # Un único snapshot para toda la petición, aunque haya una recarga en curso
+    snapshot = snapshots.current
+    breed_info = snapshot.breed_info
     
-    # Generar gráfico comparativo
-    comparison_plot = generate_comparison_plot(user_preferences, recommendations)
+    # Perfiles repetidos se sirven desde la caché sin puntuar ni generar gráficos
+    constraints = constraints.strip()
+    cache_key = (snapshot.version, tuple(user_preferences), constraints)
+    cached = recommendation_cache.get(cache_key)
+    if cached is MISSING:
+        CACHE_EVENTS.inc('recommendation', 'miss')
+        if cache_key in recommendation_flights:
+            CACHE_EVENTS.inc('recommendation', 'coalesced')
+        try:
+            recommendations, comparison_charts = await recommendation_flights.run(
+                cache_key, _compute_recommendation, cache_key, user_preferences, snapshot, constraints)
+        except FilterSyntaxError as e:
+            raise HTTPException(status_code=422, detail=f"Restricciones inválidas: {e}")
+    else:
+        CACHE_EVENTS.inc('recommendation', 'hit')
+        recommendations, comparison_charts = cached
     
-    return templates.TemplateResponse("dog_results.html", {
-        "request": request,
-        "recommendations": recommendations,
-        "user_preferences": dict(zip(breed_info['features'], user_preferences)),
-        "feature_descriptions": breed_info['feature_descriptions'],
-        "comparison_plot": comparison_plot
-    })
+    # TemplateResponse renderiza la plantilla al construirse
+    with stage('recommend', 'template'):
+        return templates.TemplateResponse("dog_results.html", {
+            "request": request,
+            "recommendations": recommendations,
+            "user_preferences": dict(zip(breed_info['features'], user_preferences)),
+            "feature_descriptions": breed_info['feature_descriptions'],
+            "comparison_charts": comparison_charts
+        })
 
 @router.get("/breeds", response_class=HTMLResponse, tags=["Web Interface"],
             summary="Catálogo de Razas",
-            description="Muestra el catálogo completo de 25 razas con búsqueda y filtros")
+            description="Muestra la primera página del catálogo; el resto se carga de forma incremental desde /api/breeds")
 async def list_breeds(request: Request):
-    breeds_data = df.to_dict('records')
-    return templates.TemplateResponse("dog_breeds.html", {
-        "request": request,
-        "breeds": breeds_data,
-        "feature_descriptions": breed_info['feature_descriptions'],
-        "dog_images": dog_images
-    })
\ No newline at end of file
+    snapshot = snapshots.current
+    with stage('breeds', 'catalog_query'):
+        page = get_catalog(snapshot).query(offset=0, limit=BREEDS_PAGE_SIZE)
+    with stage('breeds', 'template'):
+        return templates.TemplateResponse("dog_breeds.html", {
+            "request": request,
+            "breeds": page['items'],
+            "total_breeds": page['total'],
+            "next_offset": page['next_offset'],
+            "page_size": BREEDS_PAGE_SIZE,
+            "feature_descriptions": snapshot.breed_info['feature_descriptions'],
+            "dog_images": snapshot.dog_images
+        })
+
+@router.get("/api/breeds", tags=["API"],
+            summary="Catálogo de Razas (JSON paginado)",
+            description="Página del catálogo con búsqueda por nombre (prefijo/subcadena), filtro de tamaño y orden por cualquier característica")
+async def breeds_api(
+    offset: int = Query(0, ge=0, description="Posición del primer resultado"),
+    limit: int = Query(BREEDS_PAGE_SIZE, ge=1, le=MAX_BREEDS_PAGE_SIZE, description="Resultados por página"),
+    q: str = Query('', max_length=100, description="Texto a buscar en el nombre de la raza"),
+    sort: str = Query('id', description="id (orden del dataset), breed o una característica; prefijo '-' para descendente"),
+    size: Optional[str] = Query(None, description="small, medium o large"),
+    where: str = Query('', max_length=MAX_CONSTRAINTS_LENGTH,
+                       description="Filtro por rangos, p. ej. 'energy_level<=2 AND apartment_friendly>=4'")
+):
+    snapshot = snapshots.current
+    try:
+        allowed = snapshot.trait_index.mask(snapshot.trait_index.evaluate(where)) if where.strip() else None
+        return JSONResponse(get_catalog(snapshot).query(offset=offset, limit=limit, q=q, sort=sort,
+                                                        size=size, allowed=allowed))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@router.get("/api/breeds/filter", tags=["API"],
+            summary="Filtrar Razas por Rangos de Características",
+            description="Evalúa expresiones AND/OR/NOT sobre comparaciones (<, <=, =, !=, >=, >) con bitmaps precalculados")
+async def filter_breeds(
+    where: str = Query(..., max_length=MAX_CONSTRAINTS_LENGTH,
+                       description="p. ej. 'energy_level<=2 AND apartment_friendly>=4 AND good_with_kids=5'")
+):
+    snapshot = snapshots.current
+    try:
+        indices = snapshot.trait_index.filter(where)
+    except FilterSyntaxError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    breeds = snapshot.engine.breeds
+    return JSONResponse({
+        'where': where,
+        'total': int(indices.size),
+        'ids': (indices + 1).tolist(),
+        'breeds': [breeds[idx] for idx in indices.tolist()]
+    })
+
+@router.post("/api/recommend/batch", tags=["API"],
+             summary="Recomendaciones en Lote (JSON)",
+             description="Puntúa muchos perfiles a la vez con un único producto matricial y retorna las top_n razas por perfil")
+async def recommend_batch(payload: BatchRecommendationRequest):
+    snapshot = snapshots.current
+    engine = snapshot.engine
+    features = engine.features
+    if not payload.profiles:
+        raise HTTPException(status_code=422, detail="La lista de perfiles está vacía")
+
+    # El rango 1-5 y la longitud ya los validó el modelo; aquí solo se comprueba contra el motor servido
+    if any(len(profile) != len(features) for profile in payload.profiles):
+        raise HTTPException(status_code=422,
+                            detail=f"Cada perfil debe tener {len(features)} valores en el orden {features}")
+    profiles = np.asarray(payload.profiles, dtype=np.int64)
+
+    candidates = None
+    if payload.constraints.strip():
+        try:
+            candidates = snapshot.trait_index.filter(payload.constraints)
+        except FilterSyntaxError as e:
+            raise HTTPException(status_code=422, detail=f"Restricciones inválidas: {e}")
+    if candidates is not None and not candidates.size:
+        indices = similarities = np.empty((len(profiles), 0))
+    else:
+        with stage('recommend_batch', 'scoring'):
+            indices, similarities = engine.top_k_batch(profiles, top_n=payload.top_n, candidates=candidates)
+
+    breeds = engine.breeds
+    results = [
+        [{'breed': breeds[idx], 'similarity': round(score, 6)} for idx, score in zip(row_idx, row_sim)]
+        for row_idx, row_sim in zip(indices.tolist(), similarities.tolist())
+    ]
+    return JSONResponse({
+        'features': features,
+        'top_n': int(indices.shape[1]),
+        'results': results
+    })
+
+@router.get("/api/cache/stats", tags=["API"],
+            summary="Estadísticas de la Caché de Recomendaciones",
+            description="Tamaño, política y contadores de aciertos/fallos/expulsiones de la caché de /recommend y de cálculos agrupados")
+async def recommendation_cache_stats():
+    return {**recommendation_cache.stats(), 'single_flight': recommendation_flights.stats()}
+
+@router.get("/admin/model", tags=["API"],
+            summary="Modelo Servido",
+            description="Versión, origen y contadores de recarga del snapshot de modelos activo")
+async def model_status():
+    return snapshots.stats()
+
+@router.post("/admin/reload", tags=["API"],
+             summary="Recargar Modelos",
+             description="Construye y valida un snapshot nuevo desde disco y lo publica de forma atómica. "
+                         "Requiere X-Admin-Token; sin DOG_ADMIN_TOKEN la ruta está deshabilitada")
+async def reload_models(wait: bool = True,
+                        x_admin_token: str = Header("", description="Token definido en DOG_ADMIN_TOKEN")):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Recarga manual deshabilitada: defina DOG_ADMIN_TOKEN")
+    if not hmac.compare_digest(x_admin_token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8')):
+        raise HTTPException(status_code=403, detail="Token de administración inválido")
+
+    if not wait:
+        snapshots.reload_in_background(reason="admin")
+        return JSONResponse({'status': 'accepted'}, status_code=202)
+    # La carga y validación bloquean: se ejecutan en el pool de hilos, no en el event loop
+    result = await run_in_threadpool(snapshots.reload, "admin")
+    return JSONResponse(result, status_code=200 if result['status'] == 'ok' else 409)
@@ -0,0 +1,280 @@
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence
+
+# Límites de los histogramas de latencia (segundos): de 50 µs a 10 s
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _ShardedMetric:
+    """Métrica con un fragmento de valores por hilo
+
+    Cada hilo escribe solo en su propio diccionario, así que registrar una
+    observación no toma ningún lock; el lock solo se usa la primera vez que
+    un hilo escribe (para registrar su fragmento). Al exportar se suman los
+    fragmentos de todos los hilos.
+    """
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def _merged(self) -> Dict[tuple, List[float]]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        merged: Dict[tuple, List[float]] = {}
+        for shard in shards:
+            for labels, values in list(shard.items()):
+                values = list(values)
+                total = merged.get(labels)
+                if total is None:
+                    merged[labels] = values
+                else:
+                    for i, value in enumerate(values):
+                        total[i] += value
+        return merged
+
+    def expose(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for labels, values in sorted(self._merged().items()):
+            lines.extend(self._sample_lines(labels, values))
+        return lines
+
+    def _sample_lines(self, labels: tuple, values: List[float]) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_ShardedMetric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        shard = self._shard()
+        values = shard.get(labels)
+        if values is None:
+            shard[labels] = [amount]
+        else:
+            values[0] += amount
+
+    def _sample_lines(self, labels, values):
+        return [f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(values[0])}']
+
+
+class _StageTimer:
+    """Context manager liviano que observa la duración del bloque en un histograma"""
+
+    __slots__ = ('histogram', 'labels', 'started')
+
+    def __init__(self, histogram: "Histogram", labels: tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+        return False
+
+
+class Histogram(_ShardedMetric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels) -> None:
+        shard = self._shard()
+        values = shard.get(labels)
+        if values is None:
+            # [conteo por bucket (no acumulado)..., +Inf, suma, total]
+            values = shard[labels] = [0] * (len(self.buckets) + 3)
+        values[bisect_left(self.buckets, value)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    def time(self, *labels) -> _StageTimer:
+        """with histogram.time('recommend', 'scoring'): ... mide el bloque"""
+        return _StageTimer(self, labels)
+
+    def _sample_lines(self, labels, values):
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (math.inf,), values):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}')
+        label_text = _format_labels(self.labelnames, labels)
+        lines.append(f'{self.name}_sum{label_text} {_format_value(values[-2])}')
+        lines.append(f'{self.name}_count{label_text} {_format_value(values[-1])}')
+        return lines
+
+
+class Gauge:
+    """Valor leído al exportar mediante una función (tamaño de caché, versión del modelo...)
+
+    La función retorna un número o una lista de (valores_de_etiquetas, número).
+    Con kind='counter' expone contadores que ya lleva otro objeto (p. ej. ResultCache).
+    """
+
+    def __init__(self, name: str, documentation: str, callback: Callable,
+                 labelnames: Sequence[str] = (), kind: str = 'gauge'):
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def expose(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        try:
+            samples = self.callback()
+        except Exception as e:
+            print(f"Error leyendo la métrica {self.name}: {e}")
+            return lines
+        if samples is None:
+            return lines
+        if not isinstance(samples, (list, tuple)):
+            samples = [((), samples)]
+        for labels, value in samples:
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        # Re-importar un módulo no debe duplicar la métrica
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, callback: Callable,
+              labelnames: Sequence[str] = (), kind: str = 'gauge') -> Gauge:
+        # Se reemplaza: la función debe apuntar a los objetos vigentes
+        gauge = Gauge(name, documentation, callback, labelnames, kind)
+        self._metrics[name] = gauge
+        return gauge
+
+    def expose(self) -> str:
+        """Todas las métricas en formato de texto de Prometheus"""
+        lines = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].expose())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# Latencia por etapa interna (escalado, similitud, gráficos, plantilla...)
+STAGE_SECONDS = REGISTRY.histogram(
+    'dog_stage_duration_seconds', 'Duración de cada etapa interna de una petición',
+    ('path', 'stage'))
+
+HTTP_REQUESTS = REGISTRY.counter(
+    'dog_http_requests_total', 'Peticiones HTTP atendidas', ('method', 'route', 'status'))
+HTTP_SECONDS = REGISTRY.histogram(
+    'dog_http_request_duration_seconds', 'Latencia total de las peticiones HTTP', ('method', 'route'))
+
+# Eventos de caché (hit/miss) por caché
+CACHE_EVENTS = REGISTRY.counter(
+    'dog_cache_events_total', 'Consultas a las cachés internas por resultado', ('cache', 'result'))
+
+
+def stage(path: str, name: str) -> _StageTimer:
+    """Mide una etapa: with stage('recommend', 'similarity'): ..."""
+    return _StageTimer(STAGE_SECONDS, (path, name))
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que cuenta peticiones y mide su latencia por ruta
+
+    La etiqueta de ruta es la plantilla (p. ej. /analytics/charts/{name}.{fmt}),
+    no la URL concreta, para que la cardinalidad quede acotada.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths: Dict[object, str] = {}
+
+    def _route_label(self, scope) -> str:
+        endpoint = scope.get('endpoint')
+        if endpoint is None:
+            return '<unmatched>'
+        label = self._route_paths.get(endpoint)
+        if label is None:
+            label = '<unknown>'
+            for route in scope['app'].routes:
+                if getattr(route, 'endpoint', getattr(route, 'app', None)) is endpoint:
+                    label = route.path
+                    break
+            self._route_paths[endpoint] = label
+        return label
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = self._route_label(scope)
+            HTTP_SECONDS.observe(time.perf_counter() - started, scope['method'], route)
+            HTTP_REQUESTS.inc(scope['method'], route, str(status[0]))
@@ -0,0 +1,112 @@
+import json
+import mmap
+import os
+import struct
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Formato del archivo:
+#   MAGIC (8 bytes) | longitud del encabezado JSON (uint32 LE) | encabezado JSON
+#   | arreglos crudos, cada uno alineado a 64 bytes
+# El encabezado describe cada arreglo (offset, dtype, shape) además de las
+# razas, el orden de características y la huella del modelo.
+MAGIC = b'DOGBNDL1'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+BUNDLE_PATH = 'models/dog_model_bundle.bin'
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+class ModelBundle:
+    """Artefactos de servicio cargados sin copia desde un único archivo mapeado en memoria"""
+
+    def __init__(self, path: str, header: dict, arrays: Dict[str, np.ndarray], buffer=None):
+        self.path = path
+        self.header = header
+        self.arrays = arrays
+        self._buffer = buffer   # mantiene vivo el mmap mientras existan las vistas
+
+    @property
+    def version(self) -> int:
+        return self.header['version']
+
+    @property
+    def breeds(self) -> List[str]:
+        return self.header['breeds']
+
+    @property
+    def features(self) -> List[str]:
+        return self.header['features']
+
+    @property
+    def fingerprint(self) -> str:
+        return self.header['fingerprint']
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.arrays
+
+
+def write_bundle(path: str, breeds: List[str], features: List[str],
+                 arrays: Dict[str, np.ndarray], metadata: Optional[dict] = None) -> dict:
+    """Escribe el bundle de forma atómica (archivo temporal + rename)"""
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    header = {
+        'version': FORMAT_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'breeds': list(breeds),
+        'features': list(features),
+        'arrays': {},
+    }
+    header.update(metadata or {})
+
+    # Los offsets son relativos al inicio de la zona de datos, así no dependen del tamaño del encabezado
+    offset = 0
+    for name, array in arrays.items():
+        header['arrays'][name] = {'offset': offset, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+        offset = _align(offset + array.nbytes)
+
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    data_start = _align(len(MAGIC) + 4 + len(header_bytes))
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.write(b'\0' * (data_start + header['arrays'][name]['offset'] - f.tell()))
+            f.write(array.tobytes())
+    os.replace(tmp_path, path)
+    return header
+
+
+def load_bundle(path: str = BUNDLE_PATH) -> ModelBundle:
+    """Mapea el bundle en memoria (solo lectura); los arreglos son vistas sin copia"""
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} no es un bundle de modelos válido")
+    (header_len,) = struct.unpack_from('<I', buffer, len(MAGIC))
+    header_start = len(MAGIC) + 4
+    header = json.loads(bytes(buffer[header_start:header_start + header_len]).decode('utf-8'))
+    if header.get('version') != FORMAT_VERSION:
+        raise ValueError(f"Versión de bundle no soportada: {header.get('version')}")
+
+    data_start = _align(header_start + header_len)
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'])) if spec['shape'] else 1
+        arrays[name] = np.frombuffer(buffer, dtype=dtype, count=count,
+                                     offset=data_start + spec['offset']).reshape(spec['shape'])
+    return ModelBundle(path, header, arrays, buffer)
@@ -0,0 +1,280 @@
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from controllers.answer_table import AnswerTable
+from controllers.columnar_dataset import read_traits, resolve_dataset_path, COLUMNAR_PATH
+from controllers.cluster_index import ClusterIndex, build_cluster_index
+from controllers.model_bundle import load_bundle, BUNDLE_PATH
+from controllers.recommendation_engine import RecommendationEngine
+from controllers.thumbnails import load_thumbnail_manifest, THUMBNAIL_MANIFEST_PATH
+from controllers.trait_filter import TraitBitmapIndex
+
+BREED_INFO_PATH = 'models/breed_info.json'
+DOG_IMAGES_PATH = 'static/dog_images.json'
+SCALER_PATH = 'models/dog_scaler.pkl'
+DATASET_PATH = 'data/dog_breeds_dataset.csv'
+ANSWER_TABLE_PATH = 'models/dog_answer_table.bin'
+KMEANS_PATH = 'models/dog_kmeans_model.pkl'
+
+# Archivos cuyo cambio dispara una recarga del snapshot
+WATCHED_PATHS = [BUNDLE_PATH, SCALER_PATH, COLUMNAR_PATH, DATASET_PATH, BREED_INFO_PATH,
+                 DOG_IMAGES_PATH, ANSWER_TABLE_PATH, THUMBNAIL_MANIFEST_PATH]
+
+
+class EngineSnapshot:
+    """Conjunto inmutable de artefactos que se sirven juntos
+
+    Las peticiones toman una referencia al snapshot actual una sola vez y la
+    usan de principio a fin, así nunca mezclan scaler y dataset de versiones
+    distintas aunque ocurra una recarga a mitad de la petición.
+    """
+
+    __slots__ = ('engine', 'breed_info', 'dog_images', 'thumbnails', 'answer_table', 'trait_index',
+                 'cluster_index', 'source', 'generation', 'loaded_at', 'files_version')
+
+    def __init__(self, engine: RecommendationEngine, breed_info: dict, dog_images: dict,
+                 answer_table: Optional[AnswerTable], source: str, generation: int,
+                 files_version: tuple, cluster_index: Optional[ClusterIndex] = None,
+                 thumbnails: Optional[dict] = None):
+        self.engine = engine
+        # Bitmaps por (característica, valor) para restricciones duras y filtros de rango
+        self.trait_index = TraitBitmapIndex.from_engine(engine)
+        # Particiones KMeans para la búsqueda aproximada (None si no hay centroides)
+        self.cluster_index = cluster_index
+        self.breed_info = breed_info
+        self.dog_images = dog_images
+        # Miniaturas locales por raza (python build_thumbnails.py); vacío si no existen
+        self.thumbnails = thumbnails or {}
+        self.answer_table = answer_table
+        self.source = source
+        self.generation = generation
+        self.loaded_at = time.time()
+        self.files_version = files_version
+
+    @property
+    def version(self) -> str:
+        """Versión de contenido del modelo servido (huella del motor)"""
+        return self.engine.fingerprint
+
+    def info(self) -> Dict:
+        return {
+            'version': self.version,
+            'generation': self.generation,
+            'source': self.source,
+            'breeds': len(self.engine),
+            'answer_table': self.answer_table is not None,
+            'thumbnails': len(self.thumbnails),
+            'cluster_index': self.cluster_index.stats() if self.cluster_index is not None else None,
+            'loaded_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.loaded_at)),
+        }
+
+
+def files_version(paths: List[str] = WATCHED_PATHS) -> tuple:
+    """(mtime, tamaño) de cada archivo vigilado; None si no existe"""
+    version = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            version.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            version.append(None)
+    return tuple(version)
+
+
+def load_snapshot(generation: int = 0, timer: Callable = None) -> EngineSnapshot:
+    """Carga todos los artefactos de servicio y construye un snapshot nuevo"""
+    timer = timer or (lambda stage: nullcontext())
+    version = files_version()
+
+    with timer(f"load {BREED_INFO_PATH}"):
+        with open(BREED_INFO_PATH, 'r', encoding='utf-8') as f:
+            breed_info = json.load(f)
+
+    # Cargar imágenes de razas
+    with timer(f"load {DOG_IMAGES_PATH}"):
+        with open(DOG_IMAGES_PATH, 'r', encoding='utf-8') as f:
+            dog_images = json.load(f)
+
+    with timer(f"load {THUMBNAIL_MANIFEST_PATH}"):
+        thumbnails = load_thumbnail_manifest(THUMBNAIL_MANIFEST_PATH)
+
+    if os.path.exists(BUNDLE_PATH):
+        # Bundle versionado: arreglos float32 mapeados en memoria, compartidos entre workers
+        with timer(f"map {BUNDLE_PATH}"):
+            bundle = load_bundle(BUNDLE_PATH)
+            engine = RecommendationEngine.from_bundle(bundle)
+        centroids = bundle['kmeans_centroids'] if 'kmeans_centroids' in bundle else None
+        source = BUNDLE_PATH
+    else:
+        # Sin bundle: scaler pickle + dataset (columnar si existe, si no CSV)
+        import joblib
+        dataset_path = resolve_dataset_path()
+        with timer(f"load {SCALER_PATH}"):
+            scaler = joblib.load(SCALER_PATH)
+        with timer(f"load {dataset_path}"):
+            breeds, features, traits = read_traits(dataset_path)
+        with timer("build RecommendationEngine"):
+            engine = RecommendationEngine.from_scaler(scaler, breeds, features, traits)
+        centroids = joblib.load(KMEANS_PATH).cluster_centers_ if os.path.exists(KMEANS_PATH) else None
+        source = f"{SCALER_PATH} + {dataset_path}"
+
+    with timer("build ClusterIndex"):
+        cluster_index = build_cluster_index(engine, centroids)
+
+    # Tabla top-k precalculada opcional (python train_dog_model.py --answer-table)
+    answer_table = None
+    if os.environ.get("DOG_ANSWER_TABLE", "1") != "0":
+        with timer(f"map {ANSWER_TABLE_PATH}"):
+            answer_table = AnswerTable.open(ANSWER_TABLE_PATH, engine.fingerprint, len(engine.features))
+
+    return EngineSnapshot(engine, breed_info, dog_images, answer_table, source, generation, version,
+                          cluster_index=cluster_index, thumbnails=thumbnails)
+
+
+def validate_snapshot(snapshot: EngineSnapshot) -> None:
+    """Comprueba que el snapshot es coherente antes de servirlo; lanza ValueError si no"""
+    engine = snapshot.engine
+    features = snapshot.breed_info.get('features')
+    if features != engine.features:
+        raise ValueError(f"breed_info.json declara {features} pero el modelo usa {engine.features}")
+    if len(engine) == 0:
+        raise ValueError("El modelo no contiene razas")
+    if engine.matrix.shape != (len(engine), len(engine.features)):
+        raise ValueError(f"Forma de la matriz inesperada: {engine.matrix.shape}")
+    if not np.isfinite(engine.matrix).all() or not np.isfinite(engine.mean).all() \
+            or not (engine.scale > 0).all():
+        raise ValueError("El modelo contiene valores no finitos o escalas no positivas")
+    missing = set(features) - set(snapshot.breed_info.get('feature_descriptions', {}))
+    if missing:
+        raise ValueError(f"Faltan descripciones para {sorted(missing)}")
+
+    # Consulta de humo con un perfil neutro
+    probe = [3] * len(features)
+    results = engine.top_k(probe, top_n=min(5, len(engine)))
+    if not results or not all(np.isfinite(r['similarity']) for r in results):
+        raise ValueError("La consulta de prueba no produjo resultados válidos")
+    if snapshot.answer_table is not None:
+        expected = [r['similarity'] for r in results]
+        indices = snapshot.answer_table.lookup(probe)[:len(results)]
+        got = [r['similarity'] for r in engine.results_for(probe, indices)]
+        if not np.allclose(sorted(expected), sorted(got), atol=1e-5):
+            raise ValueError("La tabla de respuestas no coincide con el motor")
+
+
+class SnapshotManager:
+    """Mantiene el snapshot servido y lo reemplaza de forma atómica al recargar
+
+    La recarga construye y valida el snapshot nuevo aparte (en segundo plano)
+    y solo entonces reasigna la referencia; asignar un atributo es atómico en
+    CPython, así que las peticiones en curso siguen con el snapshot anterior y
+    las nuevas ven el nuevo, sin bloqueos en el camino de lectura.
+    """
+
+    def __init__(self, loader: Callable[..., EngineSnapshot] = load_snapshot,
+                 validator: Callable[[EngineSnapshot], None] = validate_snapshot):
+        self._loader = loader
+        self._validator = validator
+        self._reload_lock = threading.Lock()
+        self._listeners: List[Callable[[EngineSnapshot, EngineSnapshot], None]] = []
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watching = threading.Event()
+        self.current: Optional[EngineSnapshot] = None
+        self.reloads = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    def load_initial(self, timer: Callable = None) -> EngineSnapshot:
+        snapshot = self._loader(generation=0, timer=timer)
+        self._validator(snapshot)
+        self.current = snapshot
+        return snapshot
+
+    def on_swap(self, listener: Callable[[EngineSnapshot, EngineSnapshot], None]) -> None:
+        """Registra una función (anterior, nuevo) que se llama tras cada reemplazo"""
+        self._listeners.append(listener)
+
+    def reload(self, reason: str = "manual") -> Dict:
+        """Construye, valida y publica un snapshot nuevo; si falla se conserva el actual"""
+        with self._reload_lock:
+            previous = self.current
+            generation = (previous.generation + 1) if previous else 0
+            started = time.perf_counter()
+            try:
+                snapshot = self._loader(generation=generation)
+                self._validator(snapshot)
+            except Exception as e:
+                self.failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"Recarga de modelos rechazada ({reason}): {self.last_error}")
+                return {'status': 'error', 'reason': reason, 'error': self.last_error,
+                        'serving': previous.info() if previous else None}
+
+            self.current = snapshot
+            self.reloads += 1
+            self.last_error = None
+            for listener in self._listeners:
+                try:
+                    listener(previous, snapshot)
+                except Exception as e:
+                    print(f"Error notificando recarga de modelos: {e}")
+
+            elapsed = (time.perf_counter() - started) * 1000
+            changed = previous is None or previous.version != snapshot.version
+            print(f"✓ Modelos recargados ({reason}): versión {snapshot.version} "
+                  f"{'(nueva)' if changed else '(sin cambios)'} en {elapsed:.1f} ms")
+            return {'status': 'ok', 'reason': reason, 'changed': changed,
+                    'elapsed_ms': round(elapsed, 1), 'serving': snapshot.info()}
+
+    def reload_in_background(self, reason: str = "manual") -> threading.Thread:
+        thread = threading.Thread(target=self.reload, args=(reason,), daemon=True,
+                                  name="model-reload")
+        thread.start()
+        return thread
+
+    def start_watcher(self, interval: float) -> None:
+        """Vigila los artefactos y recarga cuando cambian (espera un intervalo sin cambios)"""
+        if interval <= 0 or (self._watcher is not None and self._watcher.is_alive()):
+            return
+        self._stop_watching.clear()
+
+        def watch():
+            seen = self.current.files_version if self.current else files_version()
+            pending = None
+            while not self._stop_watching.wait(interval):
+                version = files_version()
+                if version == seen:
+                    pending = None
+                    continue
+                # Antirrebote: solo se recarga cuando los archivos dejan de cambiar
+                if version != pending:
+                    pending = version
+                    continue
+                result = self.reload(reason="watcher")
+                # Si falla, no se reintenta hasta el próximo cambio en disco
+                seen = version
+                pending = None
+                if result['status'] == 'ok':
+                    seen = self.current.files_version
+
+        self._watcher = threading.Thread(target=watch, daemon=True, name="model-watcher")
+        self._watcher.start()
+
+    def stop_watcher(self) -> None:
+        self._stop_watching.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+
+    def stats(self) -> Dict:
+        return {
+            'serving': self.current.info() if self.current else None,
+            'reloads': self.reloads,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'watching': self._watcher is not None and self._watcher.is_alive(),
+        }
@@ -0,0 +1,164 @@
+import hashlib
+import math
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+
+
+class RecommendationEngine:
+    """Motor de similitud coseno precalculado sobre la matriz de razas
+
+    Se construye una sola vez al cargar los modelos: la matriz de razas queda
+    escalada con los parámetros del StandardScaler, normalizada (norma L2 = 1)
+    y almacenada como float32 contiguo, de modo que cada consulta se reduce a
+    un producto matriz-vector y un argpartition.
+    """
+
+    def __init__(self, breeds: Sequence[str], features: Sequence[str],
+                 traits: np.ndarray, mean: np.ndarray, scale: np.ndarray,
+                 matrix: Optional[np.ndarray] = None):
+        self.breeds = list(breeds)
+        self.features = list(features)
+        self.mean = np.ascontiguousarray(mean, dtype=np.float32)
+        self.scale = np.ascontiguousarray(scale, dtype=np.float32)
+        self._mean_list = self.mean.tolist()
+        self._scale_list = self.scale.tolist()
+
+        traits = np.asarray(traits, dtype=np.float32)
+        self.traits = traits
+        if matrix is None:
+            scaled = (traits - self.mean) / self.scale
+            norms = np.linalg.norm(scaled, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            matrix = scaled / norms
+        # Si la matriz viene de un bundle mapeado en memoria ya es float32 contiguo: no se copia
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+
+        # Huella del modelo servido: cambia si cambian scaler, dataset o el orden de razas/características
+        digest = hashlib.sha256()
+        for array in (self.mean, self.scale, self.matrix):
+            digest.update(array.tobytes())
+        digest.update('\x1f'.join(self.breeds + self.features).encode('utf-8'))
+        self.fingerprint = digest.hexdigest()[:16]
+
+        # Diccionarios por fila construidos una única vez (misma forma que df.iloc[idx].to_dict())
+        self.records: List[Dict] = []
+        for breed, row in zip(self.breeds, traits.astype(int).tolist()):
+            record = {'breed': breed}
+            record.update(zip(self.features, row))
+            self.records.append(record)
+
+    @classmethod
+    def from_scaler(cls, scaler, breeds: Sequence[str], features: Sequence[str],
+                    traits: np.ndarray) -> "RecommendationEngine":
+        """Construye el motor a partir del scaler entrenado y las columnas del dataset"""
+        return cls(breeds, features, traits, mean=scaler.mean_, scale=scaler.scale_)
+
+    @classmethod
+    def from_bundle(cls, bundle) -> "RecommendationEngine":
+        """Construye el motor sobre los arreglos de un ModelBundle (sin copiar la matriz)"""
+        engine = cls(
+            breeds=bundle.breeds,
+            features=bundle.features,
+            traits=bundle['traits'],
+            mean=bundle['scaler_mean'],
+            scale=bundle['scaler_scale'],
+            matrix=bundle['breeds_normalized'],
+        )
+        if engine.fingerprint != bundle.fingerprint:
+            raise ValueError("La huella del bundle no coincide con su contenido")
+        return engine
+
+    def bundle_arrays(self) -> Dict[str, np.ndarray]:
+        """Arreglos del motor para serializar en un ModelBundle"""
+        return {
+            'scaler_mean': self.mean,
+            'scaler_scale': self.scale,
+            'traits': self.traits,
+            'breeds_normalized': self.matrix,
+        }
+
+    def __len__(self) -> int:
+        return len(self.breeds)
+
+    def scale_preferences(self, user_preferences) -> np.ndarray:
+        """Escala y normaliza un perfil de usuario al espacio de la matriz de razas"""
+        # Con 10 valores la aritmética en Python puro es más rápida que varias operaciones numpy
+        scaled = [(value - mean) / scale
+                  for value, mean, scale in zip(user_preferences, self._mean_list, self._scale_list)]
+        norm = math.sqrt(sum(value * value for value in scaled)) or 1.0
+        return np.array([value / norm for value in scaled], dtype=np.float32)
+
+    def top_k(self, user_preferences, top_n: int = 5, candidates: Optional[np.ndarray] = None) -> List[Dict]:
+        """Retorna las top_n razas más similares ordenadas por similitud descendente
+
+        Si se pasan candidates (índices de razas, p. ej. las que cumplen unas
+        restricciones), solo se puntúan esas filas de la matriz.
+        """
+        query = self.scale_preferences(user_preferences)
+        if candidates is None:
+            similarities = self.matrix.dot(query)
+        else:
+            candidates = np.asarray(candidates, dtype=np.intp)
+            similarities = self.matrix[candidates].dot(query)
+
+        top_n = min(top_n, len(similarities))
+        if top_n <= 0:
+            return []
+        if top_n < len(similarities):
+            best = np.argpartition(similarities, -top_n)[-top_n:]
+        else:
+            best = np.arange(len(similarities))
+        best = best[np.argsort(similarities[best])[::-1]]
+
+        indices = best if candidates is None else candidates[best]
+        return self._results(indices.tolist(), similarities[best].tolist())
+
+    def results_for(self, user_preferences, indices) -> List[Dict]:
+        """Construye el resultado para índices de razas ya ordenados (p. ej. de la tabla precalculada)"""
+        indices = np.asarray(indices, dtype=np.intp)
+        similarities = self.matrix[indices].dot(self.scale_preferences(user_preferences))
+        return self._results(indices.tolist(), similarities.tolist())
+
+    def _results(self, indices: List[int], similarities: List[float]) -> List[Dict]:
+        return [
+            {
+                'breed': self.breeds[idx],
+                'similarity': similarity,
+                'characteristics': self.records[idx],
+            }
+            for idx, similarity in zip(indices, similarities)
+        ]
+
+    def scale_batch(self, profiles: np.ndarray) -> np.ndarray:
+        """Escala y normaliza una matriz de perfiles (n_perfiles x n_características)"""
+        batch = (np.asarray(profiles, dtype=np.float32) - self.mean) / self.scale
+        norms = np.linalg.norm(batch, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        batch /= norms
+        return batch
+
+    def top_k_batch(self, profiles: np.ndarray, top_n: int = 5, candidates: Optional[np.ndarray] = None):
+        """Puntúa muchos perfiles con un único producto matricial
+
+        Retorna (indices, similitudes), ambos de forma (n_perfiles, top_n) y
+        ordenados por similitud descendente en cada fila. Con candidates solo
+        se puntúan esas razas (los índices retornados siguen siendo del dataset).
+        """
+        if candidates is not None:
+            candidates = np.asarray(candidates, dtype=np.intp)
+            matrix = self.matrix[candidates]
+        else:
+            matrix = self.matrix
+        similarities = self.scale_batch(profiles) @ matrix.T
+
+        top_n = min(top_n, similarities.shape[1])
+        if top_n < similarities.shape[1]:
+            best = np.argpartition(similarities, -top_n, axis=1)[:, -top_n:]
+        else:
+            best = np.broadcast_to(np.arange(similarities.shape[1]), similarities.shape)
+        candidate_scores = np.take_along_axis(similarities, best, axis=1)
+        order = np.argsort(-candidate_scores, axis=1)
+        indices = np.take_along_axis(best, order, axis=1)
+        if candidates is not None:
+            indices = candidates[indices]
+        return indices, np.take_along_axis(candidate_scores, order, axis=1)
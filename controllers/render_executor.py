@@ -0,0 +1,95 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+
+class RenderQueueFull(RuntimeError):
+    """Se lanza cuando la cola de renderizado alcanzó su límite"""
+
+
+class RenderExecutor:
+    """Pool acotado de hilos para renderizar gráficos fuera del event loop
+
+    Las tareas se encolan sin bloquear el event loop; si ya hay `max_queue`
+    tareas esperando se rechaza la nueva con RenderQueueFull para que el
+    llamador degrade (p. ej. responder sin gráfico o con 503) en lugar de
+    acumular latencia sin límite.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="render")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+
+    @classmethod
+    def from_env(cls) -> "RenderExecutor":
+        """Crea el ejecutor con DOG_RENDER_WORKERS y DOG_RENDER_QUEUE"""
+        default_workers = min(4, os.cpu_count() or 1)
+        return cls(
+            max_workers=int(os.environ.get("DOG_RENDER_WORKERS", default_workers)),
+            max_queue=int(os.environ.get("DOG_RENDER_QUEUE", "32")),
+        )
+
+    def _run_task(self, fn, args, kwargs):
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            with self._lock:
+                self._failed += 1
+            raise
+        else:
+            with self._lock:
+                self._completed += 1
+            return result
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def submit(self, fn, *args, **kwargs):
+        """Encola una tarea y retorna un concurrent.futures.Future"""
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self._rejected += 1
+                raise RenderQueueFull(f"Cola de renderizado llena ({self.max_queue} tareas)")
+            self._queued += 1
+        try:
+            return self._executor.submit(self._run_task, fn, args, kwargs)
+        except BaseException:
+            with self._lock:
+                self._queued -= 1
+            raise
+
+    async def run(self, fn, *args, **kwargs):
+        """Ejecuta fn en el pool y espera su resultado sin bloquear el event loop"""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def stats(self) -> Dict[str, int]:
+        """Estado actual del pool: trabajadores, cola y contadores acumulados"""
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'queued': self._queued,
+                'active': self._active,
+                'completed': self._completed,
+                'failed': self._failed,
+                'rejected': self._rejected,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+
+# Ejecutor de los gráficos de analytics_controller (dog_controller ya no renderiza imágenes)
+render_executor = RenderExecutor.from_env()
@@ -0,0 +1,96 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# Centinela para distinguir "no está en caché" de un valor None cacheado
+MISSING = object()
+
+EVICTION_POLICIES = ('lru', 'fifo')
+
+
+class ResultCache:
+    """Caché en memoria acotada, con política LRU o FIFO y TTL opcional
+
+    Lleva contadores de aciertos, fallos, expulsiones e invalidaciones para
+    poder medir su efectividad en producción.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: Optional[float] = None, policy: str = 'lru'):
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"Política de expulsión desconocida: {policy} (use {EVICTION_POLICIES})")
+        self.maxsize = maxsize
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self.policy = policy
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls, prefix: str = "DOG_RESULT_CACHE") -> "ResultCache":
+        """Crea la caché con {prefix}_SIZE, {prefix}_TTL (segundos, 0 = sin TTL) y {prefix}_POLICY"""
+        return cls(
+            maxsize=int(os.environ.get(f"{prefix}_SIZE", "4096")),
+            ttl=float(os.environ.get(f"{prefix}_TTL", "0")),
+            policy=os.environ.get(f"{prefix}_POLICY", "lru").lower(),
+        )
+
+    def get(self, key: Hashable) -> Any:
+        """Retorna el valor cacheado o MISSING"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return MISSING
+            if self.policy == 'lru':
+                self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            self._data[key] = (value, expires_at)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Invalida todas las entradas (p. ej. al cambiar el modelo o el dataset)"""
+        with self._lock:
+            self._data.clear()
+            self.invalidations += 1
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'policy': self.policy,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
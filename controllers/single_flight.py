@@ -0,0 +1,47 @@
+import asyncio
+from typing import Any, Callable, Dict, Hashable
+
+from fastapi.concurrency import run_in_threadpool
+
+
+class SingleFlight:
+    """Agrupa cálculos idénticos en curso: la primera petición calcula y las demás esperan
+
+    Cada clave tiene a lo sumo una tarea en vuelo; las peticiones concurrentes
+    con la misma clave esperan esa misma tarea en lugar de repetir el trabajo.
+    La función se ejecuta en el pool de hilos, así el event loop sigue
+    atendiendo mientras tanto. La tarea está protegida con shield: si el
+    cliente que la inició se desconecta, las demás igual reciben el resultado.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def run(self, key: Hashable, func: Callable[..., Any], *args) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(run_in_threadpool(func, *args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Marca la excepción como recuperada aunque nadie quede esperando
+        if not task.cancelled():
+            task.exception()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def stats(self) -> Dict[str, int]:
+        return {'in_flight': len(self._inflight), 'leaders': self.leaders, 'coalesced': self.coalesced}
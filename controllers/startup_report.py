@@ -0,0 +1,35 @@
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+# Etapas de arranque registradas: (nombre, segundos, profundidad de anidamiento)
+_stages: List[Tuple[str, float, int]] = []
+_depth = 0
+_process_started = time.perf_counter()
+
+
+@contextmanager
+def timed(stage: str):
+    """Mide una etapa de arranque (import o carga de artefacto); admite anidamiento"""
+    global _depth
+    index = len(_stages)
+    _stages.append((stage, 0.0, _depth))
+    _depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _depth -= 1
+        _stages[index] = (stage, time.perf_counter() - started, _depth)
+
+
+def stages() -> List[Tuple[str, float, int]]:
+    return list(_stages)
+
+
+def log_startup_report() -> None:
+    """Imprime el tiempo de cada import y carga de artefactos registrados"""
+    print("=== Reporte de arranque ===")
+    for stage, seconds, depth in _stages:
+        print(f"  {'  ' * depth}{stage:<{52 - 2 * depth}} {seconds * 1000:9.1f} ms")
+    print(f"  {'Total desde el primer import':<52} {(time.perf_counter() - _process_started) * 1000:9.1f} ms")
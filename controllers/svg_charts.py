@@ -0,0 +1,122 @@
+import math
+from html import escape
+from typing import Sequence
+
+# Colores equivalentes a los del gráfico de matplotlib original
+USER_COLOR = '#87CEEB'    # skyblue
+BREED_COLOR = '#F08080'   # lightcoral
+GRID_COLOR = '#DDDDDD'
+TEXT_COLOR = '#333333'
+
+MAX_SCORE = 5
+
+
+def _label(feature: str) -> str:
+    return escape(feature.replace('_', ' ').capitalize())
+
+
+def _svg_open(width: int, height: int, title: str) -> str:
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}" '
+            f'width="100%" role="img" aria-label="{escape(title)}" '
+            f'font-family="Segoe UI, Arial, sans-serif" fill="{TEXT_COLOR}">'
+            f'<title>{escape(title)}</title>')
+
+
+def _legend(x: float, y: float, breed_name: str) -> str:
+    legend = (f'<rect x="{x}" y="{y}" width="14" height="14" fill="{USER_COLOR}"/>'
+              f'<text x="{x + 20}" y="{y + 12}" font-size="13">Tu Perfil</text>')
+    if breed_name:
+        legend += (f'<rect x="{x + 110}" y="{y}" width="14" height="14" fill="{BREED_COLOR}"/>'
+                   f'<text x="{x + 130}" y="{y + 12}" font-size="13">{escape(breed_name)}</text>')
+    return legend
+
+
+def comparison_bar_svg(features: Sequence[str], user_values: Sequence[float],
+                       breed_name: str = '', breed_values: Sequence[float] = ()) -> str:
+    """Gráfico de barras agrupadas: perfil del usuario vs raza recomendada"""
+    width, height = 760, 420
+    left, right, top, bottom = 50, 20, 60, 110
+    plot_w = width - left - right
+    plot_h = height - top - bottom
+    group_w = plot_w / len(features)
+    bar_w = group_w * 0.35
+
+    def y_of(value: float) -> float:
+        return top + plot_h * (1 - value / MAX_SCORE)
+
+    title = 'Comparación de Perfil: Tu vs Raza Recomendada'
+    parts = [_svg_open(width, height, title),
+             f'<text x="{width / 2}" y="24" font-size="16" font-weight="bold" text-anchor="middle">{escape(title)}</text>']
+
+    # Rejilla y eje Y (1-5)
+    for score in range(MAX_SCORE + 1):
+        y = y_of(score)
+        parts.append(f'<line x1="{left}" y1="{y:.1f}" x2="{width - right}" y2="{y:.1f}" stroke="{GRID_COLOR}"/>'
+                     f'<text x="{left - 8}" y="{y + 4:.1f}" font-size="11" text-anchor="end">{score}</text>')
+    parts.append(f'<text x="14" y="{top + plot_h / 2}" font-size="12" text-anchor="middle" '
+                 f'transform="rotate(-90 14 {top + plot_h / 2})">Puntuación (1-5)</text>')
+
+    # Barras por característica
+    for idx, feature in enumerate(features):
+        center = left + group_w * (idx + 0.5)
+        user_value = user_values[idx]
+        parts.append(f'<rect x="{center - bar_w:.1f}" y="{y_of(user_value):.1f}" width="{bar_w:.1f}" '
+                     f'height="{top + plot_h - y_of(user_value):.1f}" fill="{USER_COLOR}">'
+                     f'<title>Tu perfil: {user_value}</title></rect>')
+        if breed_values:
+            breed_value = breed_values[idx]
+            parts.append(f'<rect x="{center:.1f}" y="{y_of(breed_value):.1f}" width="{bar_w:.1f}" '
+                         f'height="{top + plot_h - y_of(breed_value):.1f}" fill="{BREED_COLOR}">'
+                         f'<title>{escape(breed_name)}: {breed_value}</title></rect>')
+        label_y = top + plot_h + 14
+        parts.append(f'<text x="{center:.1f}" y="{label_y}" font-size="11" text-anchor="end" '
+                     f'transform="rotate(-35 {center:.1f} {label_y})">{_label(feature)}</text>')
+
+    parts.append(f'<line x1="{left}" y1="{top + plot_h}" x2="{width - right}" y2="{top + plot_h}" stroke="#999999"/>')
+    parts.append(_legend(left, 34, breed_name if breed_values else ''))
+    parts.append('</svg>')
+    return ''.join(parts)
+
+
+def radar_svg(features: Sequence[str], user_values: Sequence[float],
+              breed_name: str = '', breed_values: Sequence[float] = ()) -> str:
+    """Gráfico de radar: perfil del usuario superpuesto al de la raza recomendada"""
+    width, height = 520, 500
+    cx, cy, radius = width / 2, height / 2 + 20, 170
+    n = len(features)
+    angles = [-math.pi / 2 + 2 * math.pi * i / n for i in range(n)]
+
+    def xy(angle: float, value: float):
+        r = radius * value / MAX_SCORE
+        return cx + r * math.cos(angle), cy + r * math.sin(angle)
+
+    def point(angle: float, value: float) -> str:
+        x, y = xy(angle, value)
+        return f'{x:.1f},{y:.1f}'
+
+    title = 'Perfil de Compatibilidad'
+    parts = [_svg_open(width, height, title)]
+
+    # Anillos 1-5 y ejes
+    for score in range(1, MAX_SCORE + 1):
+        ring = ' '.join(point(angle, score) for angle in angles)
+        parts.append(f'<polygon points="{ring}" fill="none" stroke="{GRID_COLOR}"/>')
+    for angle, feature in zip(angles, features):
+        ax, ay = xy(angle, MAX_SCORE)
+        parts.append(f'<line x1="{cx}" y1="{cy}" x2="{ax:.1f}" y2="{ay:.1f}" stroke="{GRID_COLOR}"/>')
+        lx, ly = xy(angle, MAX_SCORE + 0.9)
+        anchor = 'middle' if abs(math.cos(angle)) < 0.3 else ('start' if math.cos(angle) > 0 else 'end')
+        parts.append(f'<text x="{lx:.1f}" y="{ly:.1f}" font-size="11" text-anchor="{anchor}">{_label(feature)}</text>')
+
+    # Series
+    series = [(USER_COLOR, user_values)]
+    if breed_values:
+        series.append((BREED_COLOR, breed_values))
+    for color, values in series:
+        polygon = ' '.join(point(angle, value) for angle, value in zip(angles, values))
+        parts.append(f'<polygon points="{polygon}" fill="{color}" fill-opacity="0.35" '
+                     f'stroke="{color}" stroke-width="2"/>')
+
+    parts.append(_legend(cx - 120, 8, breed_name if breed_values else ''))
+    parts.append('</svg>')
+    return ''.join(parts)
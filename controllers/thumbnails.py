@@ -0,0 +1,44 @@
+import json
+import re
+from typing import Dict
+
+from starlette.staticfiles import StaticFiles
+
+THUMBNAILS_DIR = 'static/thumbnails'
+THUMBNAIL_MANIFEST_PATH = f'{THUMBNAILS_DIR}/manifest.json'
+THUMBNAILS_URL = '/thumbnails'
+MANIFEST_VERSION = 1
+
+# <slug>.<12 hex del sha256 del contenido>.<ext>: un cambio de imagen es un nombre nuevo
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.(webp|jpg)$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def load_thumbnail_manifest(path: str = THUMBNAIL_MANIFEST_PATH) -> Dict[str, Dict[str, str]]:
+    """{raza del dataset: {'webp': url, 'jpeg': url}}; vacío si no se han generado miniaturas"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"Error leyendo {path}: {e}")
+        return {}
+    if manifest.get('version') != MANIFEST_VERSION:
+        print(f"Manifiesto de miniaturas con versión no soportada: {manifest.get('version')}")
+        return {}
+    return {breed: {fmt: f"{THUMBNAILS_URL}/{entry[fmt]}" for fmt in ('webp', 'jpeg')}
+            for breed, entry in manifest.get('breeds', {}).items()}
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """StaticFiles que marca como inmutables los archivos con hash de contenido en el nombre
+
+    El navegador los guarda un año sin revalidar; el resto (p. ej. el
+    manifiesto) se revalida con ETag en cada uso.
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        response.headers['Cache-Control'] = IMMUTABLE if HASHED_NAME.search(str(full_path)) else 'no-cache'
+        return response
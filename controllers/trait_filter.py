@@ -0,0 +1,180 @@
+import re
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# Cada característica toma valores enteros 1..5
+MIN_VALUE = 1
+MAX_VALUE = 5
+
+# Máximo de paréntesis/NOT anidados: el parser es recursivo y no debe agotar la pila
+MAX_NESTING = 32
+
+# Tokens del lenguaje de filtros: comparaciones, paréntesis y AND/OR/NOT
+_TOKEN = re.compile(r"\s*(?:(?P<op><=|>=|==|!=|=|<|>)|(?P<paren>[()])|(?P<number>-?\d+)|(?P<word>[A-Za-z_]+))")
+
+
+class FilterSyntaxError(ValueError):
+    """Expresión de filtro mal formada o con características desconocidas"""
+
+
+def _tokenize(expression: str) -> List[Tuple[str, str]]:
+    tokens, pos = [], 0
+    expression = expression.strip()
+    while pos < len(expression):
+        match = _TOKEN.match(expression, pos)
+        if match is None or match.end() == pos:
+            # Se informa la posición del carácter, no la del espacio que lo precede
+            pos += len(expression[pos:]) - len(expression[pos:].lstrip())
+            raise FilterSyntaxError(f"Carácter inesperado en la posición {pos}: '{expression[pos:pos + 10]}'")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'word' and value.upper() in ('AND', 'OR', 'NOT'):
+            kind, value = 'keyword', value.upper()
+        tokens.append((kind, value))
+        pos = match.end()
+    return tokens
+
+
+class TraitBitmapIndex:
+    """Índice de bitmaps por (característica, valor) para filtrar razas por rangos
+
+    Como cada característica solo toma valores 1..5, para cada una se guarda un
+    bitset acumulado "valor <= v" (v = 0..5) empaquetado en palabras uint64.
+    Cualquier rango low..high se resuelve como le[high] & ~le[low - 1] y las
+    expresiones AND/OR/NOT se evalúan con operaciones bit a bit sobre palabras,
+    sin construir máscaras booleanas por fila.
+    """
+
+    def __init__(self, features: Sequence[str], traits: np.ndarray):
+        self.features = list(features)
+        traits = np.asarray(traits)
+        self.size = traits.shape[0]
+        self.words = max(1, -(-self.size // 64))
+
+        # Bits de relleno a cero en la última palabra: NOT no debe activar filas inexistentes
+        self.all_bits = self._pack(np.ones(self.size, dtype=bool))
+        self.none_bits = np.zeros(self.words, dtype=np.uint64)
+
+        self._le: Dict[str, np.ndarray] = {}
+        for col, feature in enumerate(self.features):
+            column = traits[:, col]
+            cumulative = np.empty((MAX_VALUE + 1, self.words), dtype=np.uint64)
+            for value in range(MAX_VALUE + 1):
+                cumulative[value] = self._pack(column <= value)
+            self._le[feature] = cumulative
+
+    @classmethod
+    def from_engine(cls, engine) -> "TraitBitmapIndex":
+        return cls(engine.features, engine.traits)
+
+    def _pack(self, mask: np.ndarray) -> np.ndarray:
+        packed = np.packbits(mask, bitorder='little')
+        padded = np.zeros(self.words * 8, dtype=np.uint8)
+        padded[:packed.size] = packed
+        return padded.view(np.uint64)
+
+    def value_range(self, feature: str, low: int, high: int) -> np.ndarray:
+        """Bitset de las razas con low <= feature <= high"""
+        low, high = max(low, MIN_VALUE), min(high, MAX_VALUE)
+        if low > high:
+            return self.none_bits
+        cumulative = self._le[feature]
+        return cumulative[high] & ~cumulative[low - 1]
+
+    def compare(self, feature: str, op: str, value: int) -> np.ndarray:
+        if feature not in self._le:
+            raise FilterSyntaxError(f"Característica desconocida '{feature}' (use {self.features})")
+        if op in ('=', '=='):
+            return self.value_range(feature, value, value)
+        if op == '!=':
+            return self.all_bits & ~self.value_range(feature, value, value)
+        if op == '<=':
+            return self.value_range(feature, MIN_VALUE, value)
+        if op == '<':
+            return self.value_range(feature, MIN_VALUE, value - 1)
+        if op == '>=':
+            return self.value_range(feature, value, MAX_VALUE)
+        if op == '>':
+            return self.value_range(feature, value + 1, MAX_VALUE)
+        raise FilterSyntaxError(f"Operador desconocido '{op}'")
+
+    def evaluate(self, expression: str) -> np.ndarray:
+        """Evalúa una expresión como 'energy_level<=2 AND (size>=4 OR good_alone=5)' y retorna el bitset"""
+        tokens = _tokenize(expression)
+        if not tokens:
+            return self.all_bits
+        position = 0
+
+        def peek():
+            return tokens[position] if position < len(tokens) else (None, None)
+
+        def take(kind=None, value=None):
+            nonlocal position
+            token = peek()
+            if token[0] is None or (kind and token[0] != kind) or (value and token[1] != value):
+                expected = value or kind or 'un término'
+                raise FilterSyntaxError(f"Se esperaba {expected} en el token {position + 1}")
+            position += 1
+            return token
+
+        # Precedencia: NOT > AND > OR
+        def parse_or():
+            bits = parse_and()
+            while peek() == ('keyword', 'OR'):
+                take()
+                bits = bits | parse_and()
+            return bits
+
+        def parse_and():
+            bits = parse_not()
+            while peek() == ('keyword', 'AND'):
+                take()
+                bits = bits & parse_not()
+            return bits
+
+        depth = 0
+
+        def nested(parse):
+            nonlocal depth
+            depth += 1
+            if depth > MAX_NESTING:
+                raise FilterSyntaxError(f"Demasiados niveles de paréntesis o NOT anidados (máximo {MAX_NESTING})")
+            try:
+                return parse()
+            finally:
+                depth -= 1
+
+        def parse_not():
+            if peek() == ('keyword', 'NOT'):
+                take()
+                return self.all_bits & ~nested(parse_not)
+            if peek() == ('paren', '('):
+                take()
+                bits = nested(parse_or)
+                take('paren', ')')
+                return bits
+            _, feature = take('word')
+            _, op = take('op')
+            _, value = take('number')
+            return self.compare(feature, op, int(value))
+
+        bits = parse_or()
+        if position != len(tokens):
+            raise FilterSyntaxError(f"Token inesperado '{tokens[position][1]}'")
+        return bits
+
+    def count(self, bits: np.ndarray) -> int:
+        return int(np.unpackbits(bits.view(np.uint8)).sum())
+
+    def indices(self, bits: np.ndarray) -> np.ndarray:
+        """Posiciones (orden del dataset) de los bits activos"""
+        mask = np.unpackbits(bits.view(np.uint8), bitorder='little')[:self.size]
+        return np.flatnonzero(mask)
+
+    def mask(self, bits: np.ndarray) -> np.ndarray:
+        return np.unpackbits(bits.view(np.uint8), bitorder='little')[:self.size].astype(bool)
+
+    def filter(self, expression: str) -> np.ndarray:
+        """Índices de las razas que cumplen la expresión"""
+        return self.indices(self.evaluate(expression))
@@ -1,6 +1,6 @@
 import pandas as pd
-import numpy as np
 import os
+import shutil
 import kagglehub
 
 print("=== DESCARGANDO DATASET REAL DE RAZAS DE PERROS DESDE KAGGLE ===\n")
@@ -28,30 +28,25 @@ try:
     
     print(f"Archivo CSV encontrado: {csv_file}")
     
-    # Leer el dataset
-    df = pd.read_csv(csv_file)
-    
-    print("✓ Dataset cargado exitosamente desde Kaggle!")
-    print(f"Número de razas: {len(df)}")
+    # Solo una vista previa: el archivo completo lo procesa la ingesta por bloques
+    df = pd.read_csv(csv_file, nrows=5)
+
+    print("✓ Dataset encontrado en Kaggle!")
     print(f"Columnas disponibles: {list(df.columns)}")
-    
+
     # Mostrar primeras filas
     print("\n=== PRIMERAS 5 RAZAS DEL DATASET REAL ===")
-    print(df.head())
-    
-    print("\n=== INFORMACIÓN DEL DATASET ===")
-    print(df.info())
-    
-    print("\n=== ESTADÍSTICAS BÁSICAS ===")
-    print(df.describe())
-    
-    # Guardar el dataset localmente
-    csv_path = f'{data_dir}/dog_breeds_dataset.csv'
-    df.to_csv(csv_path, index=False)
-    print(f"\n✓ Dataset guardado en: {csv_path}")
-    
-    print("\n=== DATASET REAL DE KAGGLE LISTO PARA USAR ===")
-    print("Ahora puedes entrenar el modelo con datos reales ejecutando:")
+    print(df)
+
+    # Guardar el archivo crudo tal cual (copia de bytes, sin parsearlo)
+    raw_path = f'{data_dir}/breed_traits.csv'
+    shutil.copyfile(csv_file, raw_path)
+    print(f"\n✓ Dataset crudo guardado en: {raw_path} ({os.path.getsize(raw_path):,} bytes)")
+
+    print("\n=== DATASET REAL DE KAGGLE DESCARGADO ===")
+    print("Conviértelo al formato del proyecto ejecutando:")
+    print("python adapt_kaggle_dataset.py")
+    print("y luego entrena el modelo con:")
     print("python train_dog_model.py")
     
 except Exception as e:
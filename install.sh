@@ -37,6 +37,12 @@ if [ ! -f "models/dog_knn_model.pkl" ]; then
     python3 train_dog_model.py
 fi
 
+# Miniaturas locales del catálogo (opcional: requiere Pillow)
+if [ ! -f "static/thumbnails/manifest.json" ] && python3 -c "import PIL" &> /dev/null; then
+    echo "Generando miniaturas de razas..."
+    python3 build_thumbnails.py --download
+fi
+
 echo ""
 echo "Instalación completada"
 echo ""
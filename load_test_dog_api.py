@@ -0,0 +1,485 @@
+"""Prueba de carga HTTP de extremo a extremo para Dog Breed AI
+
+Uso:
+    python load_test_dog_api.py                                   # app ASGI en el mismo proceso
+    python load_test_dog_api.py --concurrency 32 --duration 30
+    python load_test_dog_api.py --mix recommend=6,breeds=2,analytics=1,form=1
+    python load_test_dog_api.py --url http://127.0.0.1:8000       # servidor ya levantado
+    python load_test_dog_api.py --spawn-server --workers 1        # levanta uvicorn local y lo detiene al final
+    python load_test_dog_api.py --json resultados.json
+
+Cada usuario virtual envía una petición, espera la respuesta y envía la
+siguiente (bucle cerrado). Al final se reporta, por ruta y en total:
+peticiones, throughput, p50/p95/p99/máx de latencia y tasa de error.
+No usa dependencias externas ni red: solo el app en proceso o localhost.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+FEATURES = ['size', 'energy_level', 'trainability', 'good_with_kids', 'exercise_needs',
+            'barking_tendency', 'grooming_needs', 'apartment_friendly', 'good_alone', 'watchdog_ability']
+CHARTS = ['distributions', 'correlation', 'size_pie', 'scatter', 'radar', 'top_energy', 'top_trainability']
+SEARCHES = ['ret', 'terrier', 'bull', 'shep', 'poodle', 'span', 'hound', 'pin', 'a', 'german']
+
+DEFAULT_MIX = 'recommend=6,breeds=2,breeds_api=2,analytics=1,chart=1,form=1,home=1'
+
+
+# ===== Generación de peticiones =====
+
+class Workload:
+    """Genera peticiones (nombre, método, ruta, cuerpo, content-type) según la mezcla configurada"""
+
+    def __init__(self, mix: Dict[str, float], rng: random.Random, profile_pool: int = 0,
+                 batch_size: int = 32):
+        unknown = set(mix) - set(self.ROUTES)
+        if unknown:
+            raise ValueError(f"Rutas desconocidas en la mezcla: {sorted(unknown)} (use {sorted(self.ROUTES)})")
+        self.names = [name for name, weight in mix.items() if weight > 0]
+        self.weights = [mix[name] for name in self.names]
+        self.rng = rng
+        self.batch_size = batch_size
+        # Con un pool finito de perfiles se repiten (aciertos de caché); 0 = siempre aleatorios
+        self.pool = [self._random_profile() for _ in range(profile_pool)]
+
+    def _random_profile(self) -> List[int]:
+        return [self.rng.randint(1, 5) for _ in FEATURES]
+
+    def profile(self) -> List[int]:
+        return self.rng.choice(self.pool) if self.pool else self._random_profile()
+
+    def next(self) -> Tuple[str, str, str, bytes, Optional[str]]:
+        name = self.rng.choices(self.names, self.weights)[0]
+        return (name,) + self.ROUTES[name](self)
+
+    def _recommend(self):
+        body = urlencode(dict(zip(FEATURES, self.profile()))).encode()
+        return 'POST', '/recommend', body, 'application/x-www-form-urlencoded'
+
+    def _batch(self):
+        body = json.dumps({'profiles': [self.profile() for _ in range(self.batch_size)], 'top_n': 5}).encode()
+        return 'POST', '/api/recommend/batch', body, 'application/json'
+
+    def _breeds_api(self):
+        params = {'offset': self.rng.choice([0, 24, 48, 96]), 'limit': 24}
+        if self.rng.random() < 0.5:
+            params['q'] = self.rng.choice(SEARCHES)
+        return 'GET', f'/api/breeds?{urlencode(params)}', b'', None
+
+    def _chart(self):
+        return 'GET', f'/analytics/charts/{self.rng.choice(CHARTS)}.png', b'', None
+
+    ROUTES = {
+        'recommend': _recommend,
+        'batch': _batch,
+        'breeds': lambda self: ('GET', '/breeds', b'', None),
+        'breeds_api': _breeds_api,
+        'analytics': lambda self: ('GET', '/analytics', b'', None),
+        'chart': _chart,
+        'form': lambda self: ('GET', '/form', b'', None),
+        'home': lambda self: ('GET', '/', b'', None),
+        'metrics': lambda self: ('GET', '/metrics', b'', None),
+    }
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(','):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition('=')
+        mix[name.strip()] = float(weight) if weight else 1.0
+    return mix
+
+
+# ===== Transportes =====
+
+class InProcessTransport:
+    """Invoca el app ASGI directamente, sin sockets (incluye el ciclo lifespan)"""
+
+    def __init__(self, app):
+        self.app = app
+        self._lifespan_task = None
+        self._lifespan_queue: Optional[asyncio.Queue] = None
+        self._lifespan_events: Optional[asyncio.Queue] = None
+
+    async def start(self):
+        self._lifespan_queue = asyncio.Queue()
+        self._lifespan_events = asyncio.Queue()
+
+        async def receive():
+            return await self._lifespan_queue.get()
+
+        async def send(message):
+            await self._lifespan_events.put(message)
+
+        self._lifespan_task = asyncio.ensure_future(
+            self.app({'type': 'lifespan', 'asgi': {'version': '3.0'}, 'state': {}}, receive, send))
+        await self._lifespan_queue.put({'type': 'lifespan.startup'})
+        message = await self._lifespan_events.get()
+        if message['type'] != 'lifespan.startup.complete':
+            raise RuntimeError(f"Falló el arranque del app: {message.get('message')}")
+
+    async def close(self):
+        if self._lifespan_task is None:
+            return
+        await self._lifespan_queue.put({'type': 'lifespan.shutdown'})
+        await self._lifespan_events.get()
+        await self._lifespan_task
+
+    def connection(self):
+        return self
+
+    async def request(self, method: str, target: str, body: bytes, content_type: Optional[str]) -> Tuple[int, int]:
+        path, _, query = target.partition('?')
+        headers = [(b'host', b'loadtest'), (b'content-length', str(len(body)).encode())]
+        if content_type:
+            headers.append((b'content-type', content_type.encode()))
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': method, 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+            'query_string': query.encode(), 'root_path': '', 'headers': headers,
+            'client': ('127.0.0.1', 50000), 'server': ('loadtest', 80), 'state': {},
+        }
+        sent = False
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            # El cliente no se desconecta: se espera indefinidamente como un socket abierto
+            await asyncio.Event().wait()
+
+        status, size = 0, 0
+
+        async def send(message):
+            nonlocal status, size
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body':
+                size += len(message.get('body', b''))
+
+        await self.app(scope, receive, send)
+        return status, size
+
+
+class HTTPConnection:
+    """Conexión HTTP/1.1 keep-alive mínima sobre asyncio (un usuario virtual = una conexión)"""
+
+    def __init__(self, host: str, port: int):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def _connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            with contextlib.suppress(Exception):
+                await self.writer.wait_closed()
+            self.reader = self.writer = None
+
+    async def request(self, method: str, target: str, body: bytes, content_type: Optional[str]) -> Tuple[int, int]:
+        for attempt in range(2):
+            if self.writer is None:
+                await self._connect()
+            try:
+                return await self._roundtrip(method, target, body, content_type)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # El servidor cerró la conexión keep-alive: se reintenta una vez con una nueva
+                await self.close()
+                if attempt:
+                    raise
+
+    async def _roundtrip(self, method, target, body, content_type):
+        lines = [f'{method} {target} HTTP/1.1', f'Host: {self.host}:{self.port}',
+                 f'Content-Length: {len(body)}', 'Connection: keep-alive']
+        if content_type:
+            lines.append(f'Content-Type: {content_type}')
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readuntil(b'\r\n')
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            key, _, value = line.decode('latin-1').partition(':')
+            headers[key.strip().lower()] = value.strip()
+
+        size = 0
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            while True:
+                chunk_size = int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                await self.reader.readexactly(chunk_size + 2)
+                size += chunk_size
+                if chunk_size == 0:
+                    break
+        elif method != 'HEAD' and status not in (204, 304):
+            length = int(headers.get('content-length', 0))
+            await self.reader.readexactly(length)
+            size = length
+
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, size
+
+
+class RemoteTransport:
+    def __init__(self, url: str):
+        parts = urlsplit(url)
+        if parts.scheme != 'http':
+            raise ValueError("Solo se admite http:// (servidor local)")
+        self.host = parts.hostname or '127.0.0.1'
+        self.port = parts.port or 80
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    def connection(self):
+        return HTTPConnection(self.host, self.port)
+
+
+# ===== Ejecución =====
+
+class Stats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.statuses: Dict[str, Dict[int, int]] = {}
+        self.bytes = 0
+
+    def record(self, route: str, seconds: float, status: int, size: int):
+        self.latencies.setdefault(route, []).append(seconds)
+        self.statuses.setdefault(route, {}).setdefault(status, 0)
+        self.statuses[route][status] += 1
+        if status == 0 or status >= 400:
+            self.errors[route] = self.errors.get(route, 0) + 1
+        self.bytes += size
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+
+async def run_load(transport, workload: Workload, concurrency: int, total_requests: Optional[int],
+                   duration: Optional[float], warmup: int) -> Tuple[Stats, float]:
+    # Calentamiento secuencial: cachés, imports diferidos y primeras plantillas
+    connection = transport.connection()
+    for _ in range(warmup):
+        _, method, target, body, content_type = workload.next()
+        with contextlib.suppress(Exception):
+            await connection.request(method, target, body, content_type)
+    if connection is not transport:
+        await connection.close()
+
+    stats = Stats()
+    remaining = [total_requests]
+    started = time.perf_counter()
+    deadline = started + duration if duration else None
+
+    async def user():
+        conn = transport.connection()
+        try:
+            while True:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return
+                if remaining[0] is not None:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+                route, method, target, body, content_type = workload.next()
+                request_started = time.perf_counter()
+                try:
+                    status, size = await conn.request(method, target, body, content_type)
+                except Exception:
+                    status, size = 0, 0
+                stats.record(route, time.perf_counter() - request_started, status, size)
+        finally:
+            if conn is not transport:
+                await conn.close()
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return stats, time.perf_counter() - started
+
+
+def build_report(stats: Stats, elapsed: float, config: dict) -> dict:
+    routes = {}
+    all_latencies = []
+    for route in sorted(stats.latencies):
+        latencies = sorted(stats.latencies[route])
+        all_latencies.extend(latencies)
+        errors = stats.errors.get(route, 0)
+        routes[route] = {
+            'requests': len(latencies),
+            'throughput_rps': len(latencies) / elapsed,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+            'max_ms': latencies[-1] * 1000,
+            'errors': errors,
+            'error_rate': errors / len(latencies),
+            'statuses': {str(code): count for code, count in sorted(stats.statuses[route].items())},
+        }
+    all_latencies.sort()
+    total_errors = sum(stats.errors.values())
+    return {
+        'config': config,
+        'elapsed_s': elapsed,
+        'total': {
+            'requests': len(all_latencies),
+            'throughput_rps': len(all_latencies) / elapsed if elapsed else 0.0,
+            'p50_ms': percentile(all_latencies, 50) * 1000,
+            'p95_ms': percentile(all_latencies, 95) * 1000,
+            'p99_ms': percentile(all_latencies, 99) * 1000,
+            'max_ms': all_latencies[-1] * 1000 if all_latencies else 0.0,
+            'errors': total_errors,
+            'error_rate': total_errors / len(all_latencies) if all_latencies else 0.0,
+            'mb_received': stats.bytes / 1e6,
+        },
+        'routes': routes,
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"\n{'ruta':<12} {'peticiones':>10} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'máx ms':>9} {'errores':>8}")
+    rows = list(report['routes'].items()) + [('TOTAL', report['total'])]
+    for route, row in rows:
+        print(f"{route:<12} {row['requests']:>10} {row['throughput_rps']:>9.1f} {row['p50_ms']:>9.2f} "
+              f"{row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f} {row['max_ms']:>9.2f} {row['error_rate']:>7.2%}")
+    print(f"\nDuración: {report['elapsed_s']:.2f}s, recibidos {report['total']['mb_received']:.1f} MB")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def spawned_server(workers: int):
+    """Levanta uvicorn en un puerto libre de localhost y lo detiene al salir"""
+    port = free_port()
+    command = [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1', '--port', str(port),
+               '--workers', str(workers), '--log-level', 'warning']
+    process = subprocess.Popen(command, cwd=BASE_DIR, stdout=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError("uvicorn terminó durante el arranque")
+            with contextlib.suppress(OSError), socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                break
+            time.sleep(0.2)
+        else:
+            raise RuntimeError("uvicorn no respondió en 60s")
+        yield f'http://127.0.0.1:{port}'
+    finally:
+        process.terminate()
+        with contextlib.suppress(subprocess.TimeoutExpired):
+            process.wait(timeout=15)
+        if process.poll() is None:
+            process.kill()
+
+
+async def main_async(args, url: Optional[str]) -> dict:
+    rng = random.Random(args.seed)
+    workload = Workload(parse_mix(args.mix), rng, args.profile_pool, args.batch_size)
+    if url:
+        transport = RemoteTransport(url)
+    else:
+        os.chdir(BASE_DIR)
+        if BASE_DIR not in sys.path:
+            sys.path.insert(0, BASE_DIR)
+        # Los mensajes de arranque del app no se mezclan con el reporte
+        with contextlib.redirect_stdout(io.StringIO()):
+            from main import app
+        transport = InProcessTransport(app)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        await transport.start()
+    try:
+        stats, elapsed = await run_load(transport, workload, args.concurrency,
+                                        None if args.duration else args.requests,
+                                        args.duration, args.warmup)
+    finally:
+        with contextlib.redirect_stdout(io.StringIO()):
+            await transport.close()
+
+    config = {
+        'target': url or 'in-process',
+        'concurrency': args.concurrency,
+        'requests': None if args.duration else args.requests,
+        'duration': args.duration,
+        'mix': parse_mix(args.mix),
+        'profile_pool': args.profile_pool,
+        'seed': args.seed,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    return build_report(stats, elapsed, config)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Prueba de carga HTTP de Dog Breed AI")
+    parser.add_argument('--url', help="Servidor a probar (p. ej. http://127.0.0.1:8000); por defecto en proceso")
+    parser.add_argument('--spawn-server', action='store_true', help="Levantar uvicorn local para la prueba")
+    parser.add_argument('--workers', type=int, default=1, help="Workers de uvicorn con --spawn-server")
+    parser.add_argument('-c', '--concurrency', type=int, default=16, help="Usuarios virtuales simultáneos")
+    parser.add_argument('-n', '--requests', type=int, default=2000, help="Total de peticiones")
+    parser.add_argument('-d', '--duration', type=float, help="Duración en segundos (reemplaza --requests)")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f"Pesos por ruta (por defecto {DEFAULT_MIX})")
+    parser.add_argument('--profile-pool', type=int, default=0,
+                        help="Perfiles distintos a reutilizar (controla aciertos de caché); 0 = todos aleatorios")
+    parser.add_argument('--batch-size', type=int, default=32, help="Perfiles por petición de la ruta batch")
+    parser.add_argument('--warmup', type=int, default=20, help="Peticiones de calentamiento (no se miden)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help="Guardar el reporte en este archivo JSON")
+    parser.add_argument('--max-error-rate', type=float,
+                        help="Terminar con código 1 si la tasa de error total supera este valor (0-1)")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('DOG_ANALYTICS_WARMUP', '0')
+    if args.spawn_server:
+        with spawned_server(args.workers) as url:
+            report = asyncio.run(main_async(args, url))
+    else:
+        report = asyncio.run(main_async(args, args.url))
+
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Reporte guardado en {args.json}")
+
+    if args.max_error_rate is not None and report['total']['error_rate'] > args.max_error_rate:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,14 +1,48 @@
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
 from pathlib import Path
-from fastapi import FastAPI, Request
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from fastapi.templating import Jinja2Templates
-from controllers.dog_controller import router as dog_router
-from controllers.analytics_controller import generate_all_charts, get_dataset_statistics
+from controllers.startup_report import timed, log_startup_report
+
+# Cada import se mide para el reporte de arranque; matplotlib/seaborn no se cargan aquí
+with timed("import fastapi"):
+    from fastapi import FastAPI, Request
+    from fastapi.concurrency import run_in_threadpool
+    from fastapi.staticfiles import StaticFiles
+    from fastapi.responses import FileResponse, Response, JSONResponse
+    from fastapi.templating import Jinja2Templates
+with timed("import controllers.dog_controller"):
+    from controllers.dog_controller import router as dog_router
+    from controllers.dog_controller import snapshots, MODEL_WATCH_INTERVAL
+with timed("import controllers.analytics_controller"):
+    from controllers.analytics_controller import router as analytics_router
+    from controllers.analytics_controller import dataset_fingerprint, get_cached_statistics, warm_analytics_cache
+with timed("import controllers.render_executor"):
+    from controllers.render_executor import render_executor
+    from controllers.chart_pool import chart_pool
+from controllers.metrics import REGISTRY, CONTENT_TYPE, MetricsMiddleware, stage
+from controllers.compression import CompressionMiddleware
+from controllers.thumbnails import ImmutableStaticFiles, THUMBNAILS_DIR, THUMBNAILS_URL
 
 # Templates
 templates = Jinja2Templates(directory="templates")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Cada worker mide su uptime desde su propio arranque (el import ocurre en el supervisor, antes del fork)
+    global _process_started
+    _process_started = time.time()
+    log_startup_report()
+    # Precalentar la caché de analytics en segundo plano para no bloquear el arranque
+    if os.environ.get("DOG_ANALYTICS_WARMUP", "1") != "0":
+        threading.Thread(target=warm_analytics_cache, daemon=True).start()
+    # Recarga en caliente de modelos y dataset cuando cambian en disco
+    snapshots.start_watcher(MODEL_WATCH_INTERVAL)
+    yield
+    snapshots.stop_watcher()
+    chart_pool.shutdown()
+
 # Crear la instancia de FastAPI con metadata para documentación
 app = FastAPI(
     title="🐕 Dog Breed AI",
@@ -68,7 +102,14 @@ app = FastAPI(
     * **GET /** - Página de inicio con información del sistema
     * **GET /form** - Formulario interactivo para ingresar preferencias
     * **POST /recommend** - Endpoint de predicción que retorna razas recomendadas
+    * **POST /api/recommend/batch** - Recomendaciones en lote (JSON) para muchos perfiles a la vez
     * **GET /breeds** - Catálogo completo de las 195 razas disponibles
+    * **GET /thumbnails/{archivo}** - Miniaturas locales WebP/JPEG de cada raza (caché inmutable)
+    * **GET /analytics/charts/{nombre}.png|svg** - Gráficos individuales del dataset, cacheables
+    * **GET /api/analytics/charts** - Todos los gráficos en streaming (NDJSON) a medida que se renderizan
+    * **POST /admin/reload** - Recarga modelos y dataset sin reiniciar (requiere DOG_ADMIN_TOKEN)
+    * **GET /metrics** - Métricas de latencia por etapa en formato Prometheus
+    * **GET /health** - Comprobación de salud (modelo cargado, PID y worker)
     
     ### 💡 Cómo Usar
     
@@ -96,6 +137,7 @@ app = FastAPI(
     **Desarrollado con ❤️ usando FastAPI, Machine Learning y datos reales del AKC**
     """,
     version="2.0.0",
+    lifespan=lifespan,
     terms_of_service="https://example.com/terms/",
     contact={
         "name": "Dog Breed AI Team",
@@ -118,24 +160,76 @@ app = FastAPI(
     ]
 )
 
+# Compresión brotli/gzip de páginas dinámicas (/breeds, /recommend, /analytics, JSON);
+# se registra antes que las métricas para que su costo quede dentro de la latencia medida
+app.add_middleware(CompressionMiddleware)
+
+# Contador y latencia de cada petición por ruta, expuestos en /metrics
+app.add_middleware(MetricsMiddleware)
+
+REGISTRY.gauge('dog_render_executor_tasks', 'Tareas de renderizado en cola o en ejecución',
+               lambda: [((state,), render_executor.stats()[state]) for state in ('queued', 'active')], ('state',))
+REGISTRY.gauge('dog_render_executor_tasks_total', 'Tareas de renderizado por resultado',
+               lambda: [((result,), render_executor.stats()[result]) for result in ('completed', 'failed', 'rejected')],
+               ('result',), kind='counter')
+
 # Montar carpeta de CSS
 app.mount("/css", StaticFiles(directory=Path(__file__).resolve().parent / "static/css"), name="css")
 
+# Miniaturas locales de razas (python build_thumbnails.py): nombres con hash, caché inmutable
+app.mount(THUMBNAILS_URL, ImmutableStaticFiles(directory=Path(__file__).resolve().parent / THUMBNAILS_DIR,
+                                               check_dir=False), name="thumbnails")
+
 # Registrar las rutas del controlador de perros
 app.include_router(dog_router, prefix="")
+app.include_router(analytics_router, prefix="")
 
 # Ruta de analytics
 @app.get("/analytics", tags=["Web Interface"])
 async def analytics_page(request: Request):
     """Página de análisis y visualización de datos del dataset"""
-    charts = generate_all_charts()
-    stats = get_dataset_statistics()
-    
-    return templates.TemplateResponse("dog_analytics.html", {
-        "request": request,
-        "charts": charts,
-        "stats": stats
-    })
+    # Puede leer y calcular la huella del dataset: en el pool de hilos, no en el event loop
+    with stage('analytics', 'cached_statistics'):
+        stats = await run_in_threadpool(get_cached_statistics)
+        chart_version = await run_in_threadpool(dataset_fingerprint)
+    
+    # Los gráficos se cargan de forma diferida desde /analytics/charts/{nombre}.png
+    with stage('analytics', 'template'):
+        return templates.TemplateResponse("dog_analytics.html", {
+            "request": request,
+            "chart_version": chart_version,
+            "stats": stats
+        })
+
+@app.get("/api/render/stats", tags=["API"],
+         summary="Estado del Pool de Renderizado",
+         description="Trabajadores, profundidad de cola y contadores del ejecutor de gráficos y del pool de procesos")
+async def render_stats():
+    return {**render_executor.stats(), 'chart_processes': chart_pool.stats()}
+
+# Se reinicia en lifespan al arrancar cada worker
+_process_started = time.time()
+
+@app.get("/health", tags=["API"],
+         summary="Estado del Servidor",
+         description="Comprobación de salud para balanceadores y reinicios escalonados: 200 si hay modelo cargado")
+async def health():
+    snapshot = snapshots.current
+    body = {
+        'status': 'ok' if snapshot is not None else 'unavailable',
+        'pid': os.getpid(),
+        'worker': os.environ.get('DOG_WORKER_ID'),
+        'uptime_s': round(time.time() - _process_started, 1),
+        'model_version': snapshot.version if snapshot is not None else None,
+        'model_generation': snapshot.generation if snapshot is not None else None,
+    }
+    return JSONResponse(body, status_code=200 if snapshot is not None else 503)
+
+@app.get("/metrics", tags=["API"],
+         summary="Métricas (Prometheus)",
+         description="Latencia por etapa, contadores de peticiones y estado de cachés y modelo en formato de texto de Prometheus")
+async def metrics():
+    return Response(content=REGISTRY.expose(), media_type=CONTENT_TYPE)
 
 @app.get("/favicon.ico", include_in_schema=False)
 async def favicon():
@@ -0,0 +1,342 @@
+"""Puntuación masiva y en streaming de archivos de preferencias (CSV o NDJSON)
+
+Uso:
+    python score_preferences.py respuestas.csv resultados.csv
+    python score_preferences.py respuestas.ndjson resultados.ndjson --top-k 3
+    python score_preferences.py respuestas.csv resultados.ndjson --chunk-size 50000 --workers 4
+    python score_preferences.py respuestas.csv resultados.csv --restart     # ignora el checkpoint
+
+Entrada: CSV con encabezado o NDJSON (un objeto por línea) con las 10
+características (valores 1-5) y, opcionalmente, una columna/campo de id
+(--id-column, por defecto 'id'; sin ella se usa el número de fila).
+Salida: CSV (id, breed_1, similarity_1, ...) o NDJSON ({id, recommendations}),
+según la extensión, con una fila por línea de entrada. Las filas inválidas y
+las líneas que no se pueden parsear (JSON roto, comillas sin cerrar, campos de
+más) se escriben con un error (NDJSON) o con las columnas vacías (CSV).
+
+El archivo se lee en bloques de --chunk-size líneas; cada bloque se envía
+como bytes a un proceso del pool, que lo parsea, lo escala, lo puntúa contra
+la matriz de razas con un solo producto matricial y devuelve la salida ya
+formateada. El proceso principal escribe los bloques en orden y mantiene a
+lo sumo 2 x workers bloques en vuelo, así la memoria no depende del tamaño
+del archivo. Tras cada bloque se guarda <salida>.checkpoint con los bytes
+leídos y escritos: si el proceso se interrumpe, volver a ejecutarlo retoma
+desde ahí.
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CHECKPOINT_VERSION = 1
+
+_engine = None
+_options = None
+
+
+def detect_format(path: str, explicit: str = None) -> str:
+    if explicit:
+        return explicit
+    return 'ndjson' if path.lower().endswith(('.ndjson', '.jsonl', '.json')) else 'csv'
+
+
+def read_chunks(f, chunk_size: int):
+    """Bloques de hasta chunk_size líneas no vacías: (bytes, offset al final del bloque)"""
+    lines = []
+    for line in f:
+        if line.strip():
+            lines.append(line)
+            if len(lines) >= chunk_size:
+                yield b''.join(lines), f.tell()
+                lines = []
+    if lines:
+        yield b''.join(lines), f.tell()
+
+
+def pool_context():
+    """fork si existe (los procesos heredan el motor mapeado sin copiarlo); si no, forkserver o spawn"""
+    methods = multiprocessing.get_all_start_methods()
+    for method in ('fork', 'forkserver', 'spawn'):
+        if method in methods:
+            return multiprocessing.get_context(method)
+    return multiprocessing.get_context()
+
+
+def _init_worker(engine, options):
+    global _engine, _options
+    _engine, _options = engine, options
+
+
+def _csv_lines_frame(lines, header: bytes):
+    """Parseo línea a línea (solo si el bloque completo no se pudo leer): (DataFrame, mal formadas)"""
+    import pandas as pd
+
+    names = next(csv.reader([header.decode('utf-8', errors='replace').rstrip('\r\n')]), [])
+    rows, malformed = [], []
+    for line in lines:
+        try:
+            fields = next(csv.reader([line.decode('utf-8')], strict=True), [])
+        except (csv.Error, UnicodeDecodeError):
+            fields = None
+        # Faltan campos: se completan vacíos, como hace pandas; campos de más o comillas rotas: mal formada
+        bad = fields is None or len(fields) > len(names)
+        rows.append([''] * len(names) if bad else fields + [''] * (len(names) - len(fields)))
+        malformed.append(bad)
+    return pd.DataFrame(rows, columns=names, dtype=str), np.array(malformed, dtype=bool)
+
+
+def _parse(data: bytes, header: bytes):
+    """(ids, matriz de perfiles float, máscara de filas válidas, máscara de líneas mal formadas)
+
+    Siempre una fila por línea: una línea que no se puede parsear se marca
+    como mal formada en lugar de abortar el bloque. Los ids que faltan son None.
+    """
+    import pandas as pd
+
+    features = _engine.features
+    id_column = _options['id_column']
+    lines = [line.rstrip(b'\r') for line in data.split(b'\n') if line.strip()]
+    if _options['input_format'] == 'csv':
+        try:
+            frame = pd.read_csv(io.BytesIO(header + data), dtype=str, keep_default_na=False)
+        except ValueError:
+            # ParserError (comillas sin cerrar, campos de más) o UTF-8 inválido
+            frame = None
+        # Si la primera fila trae campos de más, pandas los toma como índice en silencio y
+        # corre las columnas: solo se confía en el bloque con índice por defecto y una fila por línea
+        if frame is not None and len(frame) == len(lines) and isinstance(frame.index, pd.RangeIndex):
+            malformed = np.zeros(len(lines), dtype=bool)
+        else:
+            frame, malformed = _csv_lines_frame(lines, header)
+        ids = frame[id_column].tolist() if id_column in frame.columns else [None] * len(frame)
+    else:
+        records = []
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            records.append(record if isinstance(record, dict) else None)
+        malformed = np.array([record is None for record in records], dtype=bool)
+        records = [record or {} for record in records]
+        ids = [record.get(id_column) for record in records]
+        ids = [None if row_id is None else str(row_id) for row_id in ids]
+        frame = pd.DataFrame(records, index=pd.RangeIndex(len(records)))
+
+    columns = {}
+    for feature in features:
+        values = frame[feature] if feature in frame.columns else pd.Series([None] * len(frame), dtype=object)
+        columns[feature] = pd.to_numeric(values, errors='coerce')
+    profiles = pd.DataFrame(columns).to_numpy(dtype=np.float64)
+    valid = ~malformed & np.isfinite(profiles).all(axis=1) & ((profiles >= 1) & (profiles <= 5)).all(axis=1) \
+        & (profiles == np.round(profiles)).all(axis=1)
+    ids = [None if bad else row_id for row_id, bad in zip(ids, malformed.tolist())]
+    return ids, profiles, valid, malformed
+
+
+def _score_chunk(data: bytes, header: bytes, first_row: int):
+    """Parsea, puntúa y formatea un bloque; retorna (bytes de salida, filas, inválidas)"""
+    ids, profiles, valid, malformed = _parse(data, header)
+    rows = len(profiles)
+    # Sin columna de id (o línea mal formada): se usa el número de fila
+    ids = [str(first_row + i) if row_id is None else row_id for i, row_id in enumerate(ids)]
+
+    k = _options['top_k']
+    indices = np.zeros((rows, k), dtype=np.intp)
+    similarities = np.zeros((rows, k), dtype=np.float32)
+    if valid.any():
+        top_indices, top_similarities = _engine.top_k_batch(profiles[valid], top_n=k)
+        indices[valid] = top_indices
+        similarities[valid] = top_similarities
+
+    breeds = _engine.breeds
+    valid_list = valid.tolist()
+    indices_list = indices.tolist()
+    similarities_list = np.round(similarities.astype(np.float64), 6).tolist()
+    out = io.StringIO()
+    if _options['output_format'] == 'csv':
+        writer = csv.writer(out, lineterminator='\n')
+        empty = [''] * (2 * k)
+        for row_id, ok, row_indices, row_similarities in zip(ids, valid_list, indices_list, similarities_list):
+            if ok:
+                cells = [row_id]
+                for idx, similarity in zip(row_indices, row_similarities):
+                    cells += [breeds[idx], similarity]
+                writer.writerow(cells)
+            else:
+                writer.writerow([row_id] + empty)
+    else:
+        malformed_list = malformed.tolist()
+        for row_id, ok, bad, row_indices, row_similarities in zip(ids, valid_list, malformed_list,
+                                                                   indices_list, similarities_list):
+            if ok:
+                record = {'id': row_id, 'recommendations': [
+                    {'breed': breeds[idx], 'similarity': similarity}
+                    for idx, similarity in zip(row_indices, row_similarities)]}
+            elif bad:
+                record = {'id': row_id, 'error': 'Línea mal formada'}
+            else:
+                record = {'id': row_id, 'error': 'Se requieren 10 características enteras entre 1 y 5'}
+            out.write(json.dumps(record, ensure_ascii=False))
+            out.write('\n')
+    return out.getvalue().encode('utf-8'), rows, rows - int(valid.sum())
+
+
+def output_header(k: int, output_format: str) -> bytes:
+    if output_format != 'csv':
+        return b''
+    columns = ['id'] + [name for rank in range(1, k + 1) for name in (f'breed_{rank}', f'similarity_{rank}')]
+    return (','.join(columns) + '\n').encode('utf-8')
+
+
+def load_checkpoint(path: str, expected: dict):
+    """Checkpoint válido para esta misma entrada, modelo y opciones, o None"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if any(checkpoint.get(key) != value for key, value in expected.items()):
+        return None
+    return checkpoint
+
+
+def save_checkpoint(path: str, checkpoint: dict) -> None:
+    with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+    os.replace(f'{path}.tmp', path)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Puntúa archivos de preferencias contra la matriz de razas")
+    parser.add_argument('input', help="CSV o NDJSON con las 10 características por fila")
+    parser.add_argument('output', help="Destino .csv o .ndjson")
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--chunk-size', type=int, default=20_000, help="Filas por bloque")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--id-column', default='id')
+    parser.add_argument('--input-format', choices=['csv', 'ndjson'])
+    parser.add_argument('--output-format', choices=['csv', 'ndjson'])
+    parser.add_argument('--restart', action='store_true', help="Ignora el checkpoint y empieza de cero")
+    parser.add_argument('--progress-interval', type=float, default=5.0, help="Segundos entre reportes")
+    args = parser.parse_args(argv)
+
+    if BASE_DIR not in sys.path:
+        sys.path.insert(0, BASE_DIR)
+    cwd = os.getcwd()
+    input_path = os.path.abspath(args.input)
+    output_path = os.path.abspath(args.output)
+    os.chdir(BASE_DIR)
+    from controllers.model_snapshot import load_snapshot
+    engine = load_snapshot().engine
+    os.chdir(cwd)
+
+    options = {
+        'top_k': min(args.top_k, len(engine)),
+        'id_column': args.id_column,
+        'input_format': detect_format(input_path, args.input_format),
+        'output_format': detect_format(output_path, args.output_format),
+    }
+    checkpoint_path = f'{output_path}.checkpoint'
+    identity = {
+        'version': CHECKPOINT_VERSION,
+        'input': input_path,
+        'input_size': os.path.getsize(input_path),
+        'model': engine.fingerprint,
+        **options,
+    }
+    checkpoint = None if args.restart else load_checkpoint(checkpoint_path, identity)
+    if checkpoint is None and os.path.exists(checkpoint_path) and not args.restart:
+        print("El checkpoint existente no corresponde a esta entrada/modelo/opciones: se empieza de cero")
+
+    with open(input_path, 'rb') as source:
+        header = source.readline() if options['input_format'] == 'csv' else b''
+        if checkpoint is not None:
+            source.seek(checkpoint['input_offset'])
+            sink = open(output_path, 'r+b')
+            sink.truncate(checkpoint['output_bytes'])
+            sink.seek(checkpoint['output_bytes'])
+            rows_done, invalid = checkpoint['rows'], checkpoint['invalid']
+            print(f"Retomando desde la fila {rows_done:,} (checkpoint {checkpoint_path})")
+        else:
+            sink = open(output_path, 'wb')
+            sink.write(output_header(options['top_k'], options['output_format']))
+            rows_done, invalid = 0, 0
+            checkpoint = {**identity, 'input_offset': source.tell()}
+
+        # El motor viaja por initargs: con forkserver/spawn se serializa una vez por proceso
+        workers = args.workers
+        if workers > 1:
+            executor = ProcessPoolExecutor(workers, mp_context=pool_context(),
+                                           initializer=_init_worker, initargs=(engine, options))
+        else:
+            _init_worker(engine, options)
+            executor = None
+
+        started = time.perf_counter()
+        last_report = started
+        session_rows = 0
+        in_flight = deque()
+        next_row = rows_done
+
+        def finish_oldest():
+            nonlocal rows_done, invalid, session_rows, last_report
+            future, end_offset = in_flight.popleft()
+            data, rows, bad = future.result() if executor else future
+            sink.write(data)
+            sink.flush()
+            # El checkpoint nunca debe adelantarse a lo que ya está en disco
+            os.fsync(sink.fileno())
+            rows_done += rows
+            invalid += bad
+            session_rows += rows
+            checkpoint.update(input_offset=end_offset, output_bytes=sink.tell(), rows=rows_done, invalid=invalid)
+            save_checkpoint(checkpoint_path, checkpoint)
+            now = time.perf_counter()
+            if now - last_report >= args.progress_interval:
+                print(f"  {rows_done:,} filas ({session_rows / (now - started):,.0f} filas/s)")
+                last_report = now
+
+        try:
+            for data, end_offset in read_chunks(source, args.chunk_size):
+                first_row = next_row
+                next_row += data.count(b'\n') + (0 if data.endswith(b'\n') else 1)
+                if executor:
+                    in_flight.append((executor.submit(_score_chunk, data, header, first_row), end_offset))
+                else:
+                    in_flight.append((_score_chunk(data, header, first_row), end_offset))
+                # Ventana acotada: se escribe el bloque más antiguo antes de leer más
+                while len(in_flight) >= 2 * max(workers, 1):
+                    finish_oldest()
+            while in_flight:
+                finish_oldest()
+        except KeyboardInterrupt:
+            print(f"\nInterrumpido en la fila {rows_done:,}; vuelva a ejecutar el mismo comando para retomar")
+            return 130
+        finally:
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+            sink.close()
+
+    elapsed = time.perf_counter() - started
+    # Sin filas de datos (p. ej. solo encabezado) nunca se llegó a escribir un checkpoint
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(checkpoint_path)
+    rate = session_rows / elapsed if elapsed > 0 else 0.0
+    print(f"✓ {rows_done:,} filas puntuadas ({invalid:,} inválidas) en {elapsed:.1f}s: "
+          f"{rate:,.0f} filas/s con {max(workers, 1)} proceso(s) -> {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
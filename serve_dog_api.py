@@ -0,0 +1,267 @@
+"""Servidor de producción multi-proceso para Dog Breed AI
+
+Uso:
+    python serve_dog_api.py                          # un worker por núcleo en 0.0.0.0:8000
+    python serve_dog_api.py --workers 4 --port 8080
+    kill -HUP <pid>                                  # reinicio escalonado (rolling) sin cortar peticiones
+    kill -TERM <pid>                                 # apagado ordenado
+
+El proceso padre importa el app (modelos, bundle mapeado en memoria, dataset
+y caché de analytics) una sola vez, abre el socket y luego hace fork de los
+workers: todos heredan esas páginas de memoria (copy-on-write) y aceptan
+conexiones del mismo socket. El padre solo supervisa: reemplaza workers
+caídos y, con SIGHUP, recarga los modelos y reemplaza los workers uno a uno
+esperando a que cada nuevo esté listo antes de detener al anterior.
+"""
+import argparse
+import asyncio
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Optional
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+READY_TIMEOUT = 60
+
+
+def create_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def preload(warm_analytics: bool):
+    """Carga todo lo compartible antes del fork (sin iniciar hilos en el padre)"""
+    os.chdir(BASE_DIR)
+    if BASE_DIR not in sys.path:
+        sys.path.insert(0, BASE_DIR)
+    from main import app
+    from controllers.dog_controller import get_catalog, get_static_page, get_form_page
+    from controllers import analytics_controller
+    from controllers.chart_pool import chart_pool
+
+    get_catalog()
+    # Páginas prerenderizadas y precomprimidas (brotli 11 es lento: mejor una vez en el padre)
+    get_static_page("dog_home.html")
+    get_form_page()
+    analytics_controller.get_cached_statistics()
+    if warm_analytics:
+        # Se renderiza aquí, en el propio proceso: así cada worker no repite el trabajo.
+        # El padre nunca arranca el pool de gráficos; cada worker crea el suyo tras el fork
+        with chart_pool.in_process():
+            analytics_controller.warm_analytics_cache()
+    return app
+
+
+def run_worker(app, sock: socket.socket, ready_fd: int, worker_id: int, args) -> None:
+    """Cuerpo del proceso hijo: uvicorn sobre el socket heredado"""
+    import uvicorn
+
+    os.environ['DOG_WORKER_ID'] = str(worker_id)
+    # Los workers no vuelven a precalentar: heredan la caché del padre
+    os.environ['DOG_ANALYTICS_WARMUP'] = '0'
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+    config = uvicorn.Config(app, log_level=args.log_level, access_log=args.access_log,
+                            timeout_keep_alive=args.keep_alive,
+                            timeout_graceful_shutdown=args.graceful_timeout)
+    server = uvicorn.Server(config)
+
+    async def notify_ready():
+        while not server.started:
+            if server.should_exit:
+                return
+            await asyncio.sleep(0.05)
+        os.write(ready_fd, b'1')
+        os.close(ready_fd)
+
+    async def serve():
+        notifier = asyncio.ensure_future(notify_ready())
+        await server.serve(sockets=[sock])
+        notifier.cancel()
+
+    asyncio.run(serve())
+
+
+class Supervisor:
+    def __init__(self, app, sock: socket.socket, args):
+        self.app = app
+        self.sock = sock
+        self.args = args
+        self.workers = {}           # pid -> id de worker
+        self.next_id = 0
+        self.stopping = False
+        self.restart_requested = False
+
+    def spawn(self) -> Optional[int]:
+        """Hace fork de un worker y espera a que su servidor esté aceptando peticiones
+
+        Retorna el PID si el worker quedó listo; si terminó o no respondió a
+        tiempo, lo detiene y retorna None.
+        """
+        worker_id = self.next_id
+        self.next_id += 1
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+                signal.signal(sig, signal.SIG_DFL)
+            code = 0
+            try:
+                run_worker(self.app, self.sock, write_fd, worker_id, self.args)
+            except BaseException as e:
+                print(f"Worker {worker_id} terminó con error: {e}")
+                code = 1
+            finally:
+                os._exit(code)
+
+        os.close(write_fd)
+        self.workers[pid] = worker_id
+        ready = self._wait_ready(read_fd, pid)
+        os.close(read_fd)
+        if ready:
+            print(f"✓ Worker {worker_id} listo (PID {pid})")
+            return pid
+        print(f"❌ Worker {worker_id} (PID {pid}) no quedó listo (terminó o superó {READY_TIMEOUT}s)")
+        if pid in self.workers:
+            self.stop_worker(pid)
+        return None
+
+    def _wait_ready(self, read_fd: int, pid: int) -> bool:
+        deadline = time.monotonic() + READY_TIMEOUT
+        os.set_blocking(read_fd, False)
+        while time.monotonic() < deadline:
+            try:
+                if os.read(read_fd, 1):
+                    return True
+                return False    # el hijo cerró la tubería sin avisar: terminó
+            except BlockingIOError:
+                pass
+            finished, _ = os.waitpid(pid, os.WNOHANG)
+            if finished:
+                self.workers.pop(pid, None)
+                return False
+            time.sleep(0.05)
+        return False
+
+    def stop_worker(self, pid: int) -> None:
+        """SIGTERM (uvicorn termina las peticiones en curso) y SIGKILL si no sale a tiempo"""
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            self.workers.pop(pid, None)
+            return
+        deadline = time.monotonic() + self.args.graceful_timeout + 5
+        while time.monotonic() < deadline:
+            finished, _ = os.waitpid(pid, os.WNOHANG)
+            if finished:
+                break
+            time.sleep(0.05)
+        else:
+            print(f"Worker PID {pid} no terminó a tiempo: SIGKILL")
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.workers.pop(pid, None)
+
+    def rolling_restart(self) -> None:
+        """Recarga modelos en el padre y reemplaza los workers de a uno"""
+        print("Reinicio escalonado de workers...")
+        from controllers.dog_controller import snapshots, get_catalog
+        result = snapshots.reload(reason="rolling restart")
+        if result['status'] == 'ok':
+            get_catalog()
+        gc.freeze()
+        for old_pid in list(self.workers):
+            if self.stopping:
+                return
+            # El worker anterior solo se detiene si su reemplazo ya atiende peticiones
+            if self.spawn() is None:
+                print(f"❌ Reinicio escalonado cancelado: se conservan los {len(self.workers)} workers actuales")
+                return
+            self.stop_worker(old_pid)
+        print(f"✓ Reinicio escalonado completo ({len(self.workers)} workers)")
+
+    def reap(self) -> None:
+        """Recoge workers terminados y los reemplaza si no se está apagando"""
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker_id = self.workers.pop(pid, None)
+            if worker_id is not None and not self.stopping:
+                print(f"Worker {worker_id} (PID {pid}) terminó inesperadamente (estado {status}); reemplazando")
+                self.spawn()
+
+    def run(self) -> None:
+        def request_stop(signum, frame):
+            self.stopping = True
+
+        def request_restart(signum, frame):
+            self.restart_requested = True
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGHUP, request_restart)
+
+        # Objetos cargados hasta aquí quedan fuera del GC: los workers no tocan sus páginas compartidas
+        gc.freeze()
+        for _ in range(self.args.workers):
+            self.spawn()
+        print(f"✓ {len(self.workers)} workers atendiendo en http://{self.args.host}:{self.args.port} "
+              f"(supervisor PID {os.getpid()})")
+
+        while not self.stopping:
+            if self.restart_requested:
+                self.restart_requested = False
+                self.rolling_restart()
+            self.reap()
+            time.sleep(0.2)
+
+        print("Apagando workers...")
+        for pid in list(self.workers):
+            self.stop_worker(pid)
+        self.sock.close()
+        print("Servidor detenido")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Servidor de producción multi-proceso de Dog Breed AI")
+    parser.add_argument('--host', default=os.environ.get('DOG_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('DOG_PORT', '8000')))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('DOG_WORKERS', '0')) or os.cpu_count() or 1,
+                        help="Procesos worker (por defecto DOG_WORKERS o el número de núcleos)")
+    parser.add_argument('--graceful-timeout', type=int, default=30,
+                        help="Segundos para terminar peticiones en curso al detener un worker")
+    parser.add_argument('--keep-alive', type=int, default=5, help="Segundos de keep-alive HTTP")
+    parser.add_argument('--log-level', default='warning')
+    parser.add_argument('--access-log', action='store_true')
+    parser.add_argument('--no-warm-analytics', dest='warm_analytics', action='store_false',
+                        help="No renderizar los gráficos de analytics antes del fork")
+    args = parser.parse_args(argv)
+
+    if not hasattr(os, 'fork'):
+        print("El modo multi-proceso requiere fork (Linux/macOS); use uvicorn directamente")
+        return 1
+
+    started = time.perf_counter()
+    sock = create_socket(args.host, args.port)
+    app = preload(args.warm_analytics and os.environ.get("DOG_ANALYTICS_WARMUP", "1") != "0")
+    print(f"✓ App precargado en el proceso padre en {time.perf_counter() - started:.1f}s")
+    Supervisor(app, sock, args).run()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
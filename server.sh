@@ -1,6 +1,7 @@
 #!/bin/bash
 
 PID_FILE=".server.pid"
+PORT="${DOG_PORT:-8000}"
 
 start_server() {
     if [ -f "$PID_FILE" ]; then
@@ -12,15 +13,45 @@ start_server() {
     echo ""
     
     source .venv/bin/activate
-    uvicorn main:app --reload --host 0.0.0.0 --port 8000 &
+    uvicorn main:app --reload --host 0.0.0.0 --port $PORT &
     echo $! > $PID_FILE
     
     sleep 2
+    show_urls
+}
+
+start_production() {
+    if [ -f "$PID_FILE" ]; then
+        echo "El servidor ya está corriendo (PID: $(cat $PID_FILE))"
+        exit 1
+    fi
+    
+    # Workers: DOG_WORKERS o un proceso por núcleo
+    echo "🚀 Iniciando Dog Breed AI Server (producción, ${DOG_WORKERS:-$(nproc)} workers)..."
+    echo ""
+    
+    source .venv/bin/activate
+    python serve_dog_api.py --host 0.0.0.0 --port $PORT &
+    echo $! > $PID_FILE
+    
+    # Esperar a que el health check responda
+    for i in $(seq 1 60); do
+        if curl -sf "http://127.0.0.1:$PORT/health" > /dev/null 2>&1; then
+            show_urls
+            return
+        fi
+        sleep 1
+    done
+    echo "El servidor no respondió en /health tras 60s"
+}
+
+show_urls() {
     echo ""
     echo "Servidor corriendo en:"
-    echo "   http://localhost:8000         - Página de inicio"
-    echo "   http://localhost:8000/breeds  - Catálogo de razas"
-    echo "   http://localhost:8000/docs    - API Docs"
+    echo "   http://localhost:$PORT         - Página de inicio"
+    echo "   http://localhost:$PORT/breeds  - Catálogo de razas"
+    echo "   http://localhost:$PORT/docs    - API Docs"
+    echo "   http://localhost:$PORT/health  - Estado del servidor"
     echo ""
     echo "Para detener el servidor: ./server.sh stop"
     echo ""
@@ -35,16 +66,51 @@ stop_server() {
     PID=$(cat $PID_FILE)
     echo "Deteniendo servidor (PID: $PID)..."
     
-    kill $PID 2>/dev/null
+    # Apagado ordenado: se terminan las peticiones en curso antes de salir
+    kill -TERM $PID 2>/dev/null
+    for i in $(seq 1 40); do
+        if ! kill -0 $PID 2>/dev/null; then
+            break
+        fi
+        sleep 1
+    done
+    if kill -0 $PID 2>/dev/null; then
+        echo "El servidor no terminó a tiempo, forzando..."
+        kill -9 $PID 2>/dev/null
+    fi
     rm -f $PID_FILE
     
     echo "Servidor detenido"
 }
 
+reload_server() {
+    if [ ! -f "$PID_FILE" ]; then
+        echo "El servidor no está corriendo"
+        exit 1
+    fi
+    
+    # Solo el modo producción: los workers se reemplazan de a uno sin cortar peticiones
+    kill -HUP $(cat $PID_FILE)
+    echo "Reinicio escalonado solicitado (PID: $(cat $PID_FILE))"
+}
+
+status_server() {
+    if [ ! -f "$PID_FILE" ] || ! kill -0 $(cat $PID_FILE) 2>/dev/null; then
+        echo "El servidor no está corriendo"
+        exit 1
+    fi
+    
+    echo "Servidor corriendo (PID: $(cat $PID_FILE))"
+    curl -sf "http://127.0.0.1:$PORT/health" && echo "" || echo "El health check no responde"
+}
+
 case "$1" in
     start)
         start_server
         ;;
+    prod)
+        start_production
+        ;;
     stop)
         stop_server
         ;;
@@ -53,8 +119,14 @@ case "$1" in
         sleep 1
         start_server
         ;;
+    reload)
+        reload_server
+        ;;
+    status)
+        status_server
+        ;;
     *)
-        echo "Uso: ./server.sh {start|stop|restart}"
+        echo "Uso: ./server.sh {start|prod|stop|restart|reload|status}"
         exit 1
         ;;
 esac
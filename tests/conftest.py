@@ -0,0 +1,23 @@
+import os
+import sys
+import warnings
+
+import pytest
+
+# La app usa rutas relativas (models/, data/, templates/): las pruebas corren desde la raíz
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+os.environ.setdefault("DOG_ANALYTICS_WARMUP", "0")
+os.environ.setdefault("DOG_CHART_PROCESSES", "0")
+os.environ.setdefault("DOG_MODEL_WATCH_INTERVAL", "0")
+warnings.filterwarnings("ignore", message=".*unpickle estimator.*")
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    import main
+    with TestClient(main.app) as test_client:
+        yield test_client
@@ -0,0 +1,16 @@
+from controllers import dog_controller
+
+
+def test_reload_disabled_without_token(client, monkeypatch):
+    monkeypatch.setattr(dog_controller, "ADMIN_TOKEN", "")
+    # Ni siquiera el cliente local puede recargar sin token configurado
+    assert client.post("/admin/reload").status_code == 404
+
+
+def test_reload_requires_matching_token(client, monkeypatch):
+    monkeypatch.setattr(dog_controller, "ADMIN_TOKEN", "secreto")
+    assert client.post("/admin/reload").status_code == 403
+    assert client.post("/admin/reload", headers={"X-Admin-Token": "otro"}).status_code == 403
+    response = client.post("/admin/reload", headers={"X-Admin-Token": "secreto"})
+    assert response.status_code == 200
+    assert response.json()["status"] == "ok"
@@ -0,0 +1,35 @@
+import asyncio
+
+import main
+
+
+def test_analytics_page_loads_statistics_off_the_event_loop(client, monkeypatch):
+    calls = []
+    statistics = main.get_cached_statistics
+
+    def recording():
+        try:
+            asyncio.get_running_loop()
+            calls.append('event loop')
+        except RuntimeError:
+            calls.append('pool de hilos')
+        return statistics()
+
+    monkeypatch.setattr(main, 'get_cached_statistics', recording)
+    response = client.get('/analytics')
+    assert response.status_code == 200
+    assert calls == ['pool de hilos']
+
+
+def test_statistics_from_columns_match_pandas():
+    from controllers import analytics_controller
+    from controllers.columnar_dataset import read_dataset
+
+    df = read_dataset()
+    features = [feature for feature in df.columns if feature not in ('breed', 'size')]
+    stats = analytics_controller.get_dataset_statistics()
+    assert stats['total_breeds'] == len(df)
+    assert stats['statistics'] == df[features].astype(float).describe().round(2).to_dict()
+    expected_sizes = df['size'].value_counts().to_dict()
+    assert stats['size_distribution'] == expected_sizes
+    assert list(stats['size_distribution']) == list(expected_sizes)
@@ -0,0 +1,48 @@
+import os
+import pickle
+
+import pytest
+
+from controllers import analytics_controller
+from controllers.chart_pool import chart_pool
+
+PNG_MAGIC = b'\x89PNG'
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="requiere os.fork")
+def test_chart_render_in_forked_worker_after_preload(monkeypatch):
+    """Mismo orden que serve_dog_api: precarga en el padre, fork y gráfico sin caché en el hijo"""
+    import serve_dog_api
+
+    monkeypatch.setattr(chart_pool, 'processes', 1)
+    serve_dog_api.preload(warm_analytics=True)
+    # El padre precalienta en su propio proceso y no deja un pool para heredar
+    assert chart_pool.stats()['running'] is False
+    assert chart_pool.enabled
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            os.close(read_fd)
+            with analytics_controller._cache_lock:
+                analytics_controller._cache['images'] = None
+            try:
+                result = ('ok', analytics_controller.get_chart_image('size_pie', 'png')[:4])
+            except BaseException as e:
+                result = ('error', f"{type(e).__name__}: {e}")
+            chart_pool.shutdown()
+            with os.fdopen(write_fd, 'wb') as out:
+                pickle.dump(result, out)
+            status = 0
+        finally:
+            os._exit(status)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd, 'rb') as pipe:
+        data = pipe.read()
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert pickle.loads(data) == ('ok', PNG_MAGIC)
+    assert chart_pool.stats()['running'] is False
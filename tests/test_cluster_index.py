@@ -0,0 +1,130 @@
+import numpy as np
+import pytest
+
+from controllers.cluster_index import ClusterIndex, build_cluster_index, _normalize
+
+
+def make_index(rows: int = 3000, dims: int = 10, lists: int = 16, seed: int = 5):
+    rng = np.random.default_rng(seed)
+    centroids = _normalize(rng.normal(size=(lists, dims)))
+    # Filas alrededor de los centroides, con clústeres de tamaños muy distintos
+    weights = rng.dirichlet(np.full(lists, 0.5))
+    labels = rng.choice(lists, size=rows, p=weights)
+    matrix = _normalize(centroids[labels] + 0.6 * rng.normal(size=(rows, dims)))
+    return matrix, centroids, ClusterIndex(matrix, centroids)
+
+
+def queries(dims: int = 10, count: int = 25, seed: int = 9) -> np.ndarray:
+    return _normalize(np.random.default_rng(seed).normal(size=(count, dims)))
+
+
+def exact_top(matrix: np.ndarray, query: np.ndarray, top_n: int, rows=None):
+    rows = np.arange(len(matrix)) if rows is None else np.asarray(rows)
+    scores = matrix[rows] @ query
+    best = np.argsort(-scores, kind='stable')[:top_n]
+    return rows[best], scores[best]
+
+
+def test_layout_is_a_permutation_grouped_by_cluster():
+    matrix, centroids, index = make_index()
+    assert len(index) == len(matrix)
+    assert sorted(index.order.tolist()) == list(range(len(matrix)))
+    assert index.offsets[0] == 0 and index.offsets[-1] == len(matrix)
+    np.testing.assert_array_equal(index.lists, matrix[index.order])
+    assignments = np.argmax(matrix @ centroids.T, axis=1)
+    for cluster in range(index.n_lists):
+        members = index.order[index.offsets[cluster]:index.offsets[cluster + 1]]
+        assert (assignments[members] == cluster).all()
+
+
+@pytest.mark.parametrize('top_n', [1, 5, 40])
+def test_probing_every_list_is_exact(top_n):
+    matrix, _, index = make_index()
+    for query in queries():
+        indices, similarities, visited = index.search(query, top_n=top_n, nprobe=index.n_lists)
+        expected_indices, expected_similarities = exact_top(matrix, query, top_n)
+        assert visited == len(matrix)
+        np.testing.assert_array_equal(indices, expected_indices)
+        np.testing.assert_allclose(similarities, expected_similarities, rtol=1e-6)
+
+
+@pytest.mark.parametrize('nprobe', [1, 2, 4])
+def test_similarities_belong_to_returned_rows(nprobe):
+    """La reasignación posición -> fila del motor debe apuntar a la fila puntuada"""
+    matrix, _, index = make_index()
+    for query in queries():
+        indices, similarities, _ = index.search(query, top_n=10, nprobe=nprobe)
+        assert len(set(indices.tolist())) == len(indices) == 10
+        np.testing.assert_allclose(similarities, matrix[indices] @ query, rtol=1e-6)
+        assert (np.diff(similarities) <= 0).all()
+
+
+@pytest.mark.parametrize('nprobe', [1, 3])
+def test_results_are_exact_within_probed_lists(nprobe):
+    matrix, _, index = make_index()
+    for query in queries():
+        lists = index.probe(query, nprobe)
+        rows = np.concatenate([index.order[index.offsets[c]:index.offsets[c + 1]] for c in lists])
+        if len(rows) < 10:
+            continue
+        indices, similarities, visited = index.search(query, top_n=10, nprobe=nprobe)
+        expected_indices, _ = exact_top(matrix, query, 10, rows)
+        assert visited == len(rows)
+        np.testing.assert_array_equal(indices, expected_indices)
+
+
+def test_top_n_larger_than_probed_lists_expands_to_next_clusters():
+    matrix, _, index = make_index()
+    sizes = np.diff(index.offsets)
+    for query in queries():
+        nearest = index.probe(query, index.n_lists)
+        top_n = int(sizes[nearest[0]]) + 3
+        indices, similarities, visited = index.search(query, top_n=top_n, nprobe=1)
+        assert len(indices) == top_n
+        # Se recorren clústeres en orden de cercanía hasta juntar top_n filas, y ninguno más
+        covered = np.cumsum(sizes[nearest])
+        needed = int(np.searchsorted(covered, top_n)) + 1
+        assert visited == covered[needed - 1]
+        rows = np.concatenate([index.order[index.offsets[c]:index.offsets[c + 1]] for c in nearest[:needed]])
+        expected_indices, _ = exact_top(matrix, query, top_n, rows)
+        np.testing.assert_array_equal(indices, expected_indices)
+        np.testing.assert_allclose(similarities, matrix[indices] @ query, rtol=1e-6)
+
+
+def test_empty_lists_and_top_n_beyond_catalog():
+    rng = np.random.default_rng(1)
+    dims = 4
+    centroids = _normalize(np.eye(dims))
+    # Todas las filas cerca del primer eje: los otros tres clústeres quedan vacíos
+    matrix = _normalize(np.column_stack([np.ones(6), rng.uniform(0, 0.3, size=(6, dims - 1))]))
+    index = ClusterIndex(matrix, centroids)
+    assert index.stats()['min_list'] == 0 and index.stats()['max_list'] == 6
+
+    query = _normalize(np.array([[0.0, 1.0, 0.0, 0.0]]))[0]
+    indices, similarities, visited = index.search(query, top_n=50, nprobe=1)
+    assert visited == 6
+    assert sorted(indices.tolist()) == list(range(6))
+    np.testing.assert_allclose(similarities, matrix[indices] @ query, rtol=1e-6)
+
+
+def test_shipped_model_full_probe_matches_engine():
+    from controllers.model_snapshot import load_snapshot
+
+    snapshot = load_snapshot()
+    engine, index = snapshot.engine, snapshot.cluster_index
+    assert index is not None and len(index) == len(engine)
+    for profile in ([3] * 10, [1, 5, 5, 4, 5, 3, 2, 1, 1, 4], [5, 1, 2, 5, 1, 1, 5, 5, 5, 1]):
+        query = engine.scale_preferences(profile)
+        indices, similarities, _ = index.search(query, top_n=5, nprobe=index.n_lists)
+        expected = engine.top_k(profile, top_n=5)
+        np.testing.assert_allclose(similarities, [r['similarity'] for r in expected], rtol=1e-5)
+        assert [engine.breeds[i] for i in indices] == [r['breed'] for r in expected]
+
+
+def test_build_rejects_mismatched_centroids():
+    from controllers.model_snapshot import load_snapshot
+
+    engine = load_snapshot().engine
+    assert build_cluster_index(engine, None) is None
+    with pytest.raises(ValueError, match='dimensiones'):
+        build_cluster_index(engine, np.ones((3, len(engine.features) + 1)))
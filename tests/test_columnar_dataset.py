@@ -0,0 +1,203 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import adapt_kaggle_dataset
+from controllers.columnar_dataset import (ColumnarWriter, FEATURES, TRAIT_RANGE, dataset_fingerprint,
+                                          is_columnar, load_columnar, read_columns, read_dataset, read_traits)
+
+KAGGLE_COLUMNS = ['Breed', 'Affectionate With Family', 'Good With Young Children', 'Trainability Level',
+                  'Energy Level', 'Barking Level', 'Coat Grooming Frequency', 'Adaptability Level',
+                  'Watchdog/Protective Nature']
+
+
+def sample_frame(rows: int = 23, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame(rng.integers(1, 6, size=(rows, len(FEATURES))), columns=FEATURES)
+    # Nombres con espacio no separable y multibyte, como los del dataset de Kaggle
+    frame.insert(0, 'breed', [f'Raza\xa0{i} ñandú' if i % 4 == 0 else f'Breed {i}' for i in range(rows)])
+    return frame
+
+
+def as_int8(frame: pd.DataFrame) -> pd.DataFrame:
+    return frame.astype({feature: np.int8 for feature in FEATURES})
+
+
+def write(path, frame: pd.DataFrame, block: int) -> dict:
+    writer = ColumnarWriter(str(path), FEATURES, metadata={'source': 'prueba'})
+    for start in range(0, len(frame), block):
+        part = frame.iloc[start:start + block]
+        writer.append(part['breed'].tolist(), part[FEATURES].to_numpy())
+    return writer.close()
+
+
+def test_round_trip_matches_frame(tmp_path):
+    frame = sample_frame()
+    path = tmp_path / 'razas.col'
+    header = write(path, frame, block=len(frame))
+
+    assert is_columnar(str(path))
+    dataset = load_columnar(str(path))
+    assert len(dataset) == len(frame) == header['rows']
+    assert dataset.features == FEATURES
+    assert dataset.breeds == frame['breed'].tolist()
+    assert dataset.traits().dtype == np.int8
+    pd.testing.assert_frame_equal(dataset.to_frame(), as_int8(frame))
+    pd.testing.assert_frame_equal(read_dataset(str(path)), as_int8(frame))
+    assert dataset.header['source'] == 'prueba'
+    assert dataset_fingerprint(str(path)) == dataset.fingerprint == header['fingerprint']
+    # El directorio temporal de columnas no queda en disco
+    assert sorted(os.listdir(tmp_path)) == ['razas.col']
+
+
+def test_fingerprint_independent_of_block_size_and_sensitive_to_content(tmp_path):
+    frame = sample_frame()
+    whole = write(tmp_path / 'a.col', frame, block=len(frame))
+    blocks = write(tmp_path / 'b.col', frame, block=4)
+    assert whole['fingerprint'] == blocks['fingerprint']
+    pd.testing.assert_frame_equal(load_columnar(str(tmp_path / 'b.col')).to_frame(), as_int8(frame))
+
+    changed = frame.copy()
+    changed.loc[5, 'size'] = 1 if changed.loc[5, 'size'] != 1 else 2
+    assert write(tmp_path / 'c.col', changed, block=4)['fingerprint'] != whole['fingerprint']
+
+
+def test_empty_dataset(tmp_path):
+    header = ColumnarWriter(str(tmp_path / 'vacio.col')).close()
+    dataset = load_columnar(str(tmp_path / 'vacio.col'))
+    assert header['rows'] == len(dataset) == 0
+    assert dataset.breeds == []
+    assert dataset.traits().shape == (0, len(FEATURES))
+
+
+@pytest.mark.parametrize('value', [TRAIT_RANGE[0] - 1, TRAIT_RANGE[1] + 1])
+def test_writer_rejects_values_outside_scale(tmp_path, value):
+    writer = ColumnarWriter(str(tmp_path / 'razas.col'))
+    traits = np.full((2, len(FEATURES)), 3)
+    traits[1, 4] = value
+    with pytest.raises(ValueError, match='fuera de 1-5'):
+        writer.append(['A', 'B'], traits)
+    writer.abort()
+    assert os.listdir(tmp_path) == []
+
+
+def test_writer_rejects_shape_mismatch(tmp_path):
+    writer = ColumnarWriter(str(tmp_path / 'razas.col'))
+    with pytest.raises(ValueError, match='Forma'):
+        writer.append(['A', 'B'], np.full((3, len(FEATURES)), 3))
+    writer.abort()
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / 'razas.csv'
+    path.write_text('breed,size\nA,3\n', encoding='utf-8')
+    assert not is_columnar(str(path))
+    with pytest.raises(ValueError, match='no es un dataset columnar'):
+        load_columnar(str(path))
+
+
+def test_columns_are_int8_views_without_copy(tmp_path):
+    frame = sample_frame()
+    path = tmp_path / 'razas.col'
+    write(path, frame, block=7)
+    dataset = load_columnar(str(path))
+
+    as_frame = dataset.to_frame()
+    for feature in FEATURES:
+        assert np.shares_memory(as_frame[feature].to_numpy(), dataset.columns[feature])
+        assert read_columns(str(path))[feature].dtype == np.int8
+    # Las vistas son de solo lectura: nadie puede modificar el dataset compartido
+    with pytest.raises(ValueError):
+        as_frame.loc[0, 'size'] = 5
+
+
+def test_read_traits_matches_csv(tmp_path):
+    frame = sample_frame()
+    write(tmp_path / 'razas.col', frame, block=5)
+    frame.to_csv(tmp_path / 'razas.csv', index=False)
+
+    breeds, features, traits = read_traits(str(tmp_path / 'razas.col'))
+    csv_breeds, csv_features, csv_traits = read_traits(str(tmp_path / 'razas.csv'))
+    assert breeds == csv_breeds == frame['breed'].tolist()
+    assert features == csv_features == FEATURES
+    assert traits.dtype == np.int8
+    np.testing.assert_array_equal(traits, csv_traits)
+    # Misma disposición que la matriz del DataFrame: el escalado da los mismos bits
+    assert traits.flags.f_contiguous == csv_traits.flags.f_contiguous
+    columns = read_columns(str(tmp_path / 'razas.csv'))
+    assert list(columns) == FEATURES
+    np.testing.assert_array_equal(np.column_stack([columns[f] for f in FEATURES]), traits)
+
+
+def kaggle_frame(rows: int = 41, seed: int = 11) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame(rng.integers(1, 6, size=(rows, len(KAGGLE_COLUMNS) - 1)), columns=KAGGLE_COLUMNS[1:])
+    names = list(adapt_kaggle_dataset.size_mapping) + ['Plott Hounds', 'Otterhounds']
+    frame.insert(0, 'Breed', [f' {names[i % len(names)]} {i} ' for i in range(rows)])
+    # Kaggle usa 0 como "sin dato" (Plott Hounds)
+    frame.loc[3, ['Trainability Level', 'Energy Level', 'Barking Level']] = 0
+    return frame
+
+
+def ingest(tmp_path, source: pd.DataFrame, chunk_size: int, name: str):
+    source_path = tmp_path / f'{name}.csv'
+    source.to_csv(source_path, index=False)
+    output = tmp_path / f'{name}.col'
+    exported = tmp_path / f'{name}_export.csv'
+    assert adapt_kaggle_dataset.main([str(source_path), '--output', str(output), '--chunk-size', str(chunk_size),
+                                      '--csv', str(exported)]) == 0
+    return load_columnar(str(output)), pd.read_csv(exported)
+
+
+def test_chunked_kaggle_ingestion_matches_single_chunk(tmp_path):
+    source = kaggle_frame()
+    single, _ = ingest(tmp_path, source, chunk_size=10_000, name='uno')
+    chunked, exported = ingest(tmp_path, source, chunk_size=4, name='bloques')
+
+    assert len(chunked) == len(source)
+    assert chunked.fingerprint == single.fingerprint
+    pd.testing.assert_frame_equal(chunked.to_frame(), single.to_frame())
+    pd.testing.assert_frame_equal(exported, chunked.to_frame(), check_dtype=False)
+    assert chunked.breeds[0] == source['Breed'][0].strip()
+
+    traits = chunked.traits()
+    assert traits.min() >= TRAIT_RANGE[0] and traits.max() <= TRAIT_RANGE[1]
+    # "Sin dato" se lleva al mínimo de la escala en lugar de descartar la raza
+    row = chunked.to_frame().iloc[3]
+    assert row['trainability'] == row['energy_level'] == row['barking_tendency'] == TRAIT_RANGE[0]
+
+
+def test_project_format_drops_invalid_rows(tmp_path):
+    source = sample_frame(rows=12)
+    source.loc[2, 'size'] = 9
+    source.loc[5, 'energy_level'] = None
+    source.loc[7, 'breed'] = None
+    source.loc[9, 'good_alone'] = 0
+    dataset, _ = ingest(tmp_path, source, chunk_size=5, name='proyecto')
+
+    expected = source.drop(index=[2, 5, 7]).reset_index(drop=True)
+    expected.loc[expected['breed'] == source.loc[9, 'breed'], 'good_alone'] = TRAIT_RANGE[0]
+    pd.testing.assert_frame_equal(dataset.to_frame(), as_int8(expected))
+
+
+def test_estimate_sizes_matches_first_matching_key():
+    breeds = pd.Series(['Toy Poodle', 'Labrador Retrievers', 'Great Danes', 'Border Collies', 'Basenjis',
+                        'Miniature Schnauzers', 'Boston Terriers', 'Toy Poodle', 'Bulldogs', 'Beagles'])
+
+    def first_match(name: str) -> int:
+        for key, size in adapt_kaggle_dataset.size_mapping.items():
+            if key.lower() in name.lower():
+                return size
+        return adapt_kaggle_dataset.DEFAULT_SIZE
+
+    assert adapt_kaggle_dataset.estimate_sizes(breeds).tolist() == [first_match(name) for name in breeds]
+
+
+def test_shipped_dataset_within_scale():
+    dataset = load_columnar()
+    traits = dataset.traits()
+    assert len(dataset) == 195
+    assert traits.min() >= TRAIT_RANGE[0] and traits.max() <= TRAIT_RANGE[1]
+    assert dataset_fingerprint('data/dog_breeds_dataset.col') == dataset.fingerprint
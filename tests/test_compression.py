@@ -0,0 +1,60 @@
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
+from fastapi.testclient import TestClient
+
+from controllers.compression import CompressionMiddleware, etag_matches
+
+SVG = b'<svg xmlns="http://www.w3.org/2000/svg">' + b'<rect width="1" height="1"/>' * 200 + b'</svg>'
+ETAG = '"abc123-scatter-svg"'
+
+
+def make_client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+
+    @app.get('/chart.svg')
+    async def chart(request: Request):
+        if etag_matches(request.headers.get('if-none-match'), ETAG):
+            return Response(status_code=304, headers={'ETag': ETAG})
+        return Response(SVG, media_type='image/svg+xml', headers={'ETag': ETAG})
+
+    @app.get('/weak')
+    async def weak():
+        return Response(SVG, media_type='image/svg+xml', headers={'ETag': 'W/"debil"'})
+
+    return TestClient(app)
+
+
+def test_compressed_response_gets_weak_etag():
+    client = make_client()
+    response = client.get('/chart.svg', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['content-encoding'] == 'gzip'
+    assert response.headers['etag'] == f'W/{ETAG}'
+    assert response.content == SVG
+    assert 'Accept-Encoding' in response.headers['vary']
+
+
+def test_identity_response_keeps_strong_etag():
+    response = make_client().get('/chart.svg', headers={'Accept-Encoding': 'identity'})
+    assert 'content-encoding' not in response.headers
+    assert response.headers['etag'] == ETAG
+    assert response.content == SVG
+
+
+def test_weak_etag_revalidates_and_is_not_prefixed_twice():
+    client = make_client()
+    etag = client.get('/chart.svg', headers={'Accept-Encoding': 'gzip'}).headers['etag']
+    assert client.get('/chart.svg', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag}).status_code == 304
+    assert client.get('/weak', headers={'Accept-Encoding': 'gzip'}).headers['etag'] == 'W/"debil"'
+
+
+def test_svg_chart_endpoint_weakens_etag_when_compressed(client):
+    url = '/analytics/charts/size_pie.svg'
+    plain = client.get(url, headers={'Accept-Encoding': 'identity'})
+    encoded = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert plain.status_code == encoded.status_code == 200
+    assert encoded.headers['content-encoding'] == 'gzip'
+    assert not plain.headers['etag'].startswith('W/')
+    assert encoded.headers['etag'] == f"W/{plain.headers['etag']}"
+    revalidated = client.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': encoded.headers['etag']})
+    assert revalidated.status_code == 304
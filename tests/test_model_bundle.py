@@ -0,0 +1,22 @@
+import numpy as np
+
+from controllers.model_bundle import load_bundle, write_bundle
+from controllers.recommendation_engine import RecommendationEngine
+
+
+def test_bundle_round_trip_keeps_engine(tmp_path):
+    shipped = RecommendationEngine.from_bundle(load_bundle())
+    arrays = shipped.bundle_arrays()
+    # Solo lo que from_bundle lee: la matriz servida es la normalizada
+    assert set(arrays) == {'scaler_mean', 'scaler_scale', 'traits', 'breeds_normalized'}
+
+    path = str(tmp_path / 'bundle.bin')
+    write_bundle(path, shipped.breeds, shipped.features, arrays, metadata={'fingerprint': shipped.fingerprint})
+    engine = RecommendationEngine.from_bundle(load_bundle(path))
+    assert engine.fingerprint == shipped.fingerprint
+    assert np.array_equal(engine.matrix, shipped.matrix)
+    assert engine.top_k([3] * len(engine.features)) == shipped.top_k([3] * len(shipped.features))
+
+
+def test_shipped_bundle_has_no_unused_arrays():
+    assert 'breeds_scaled' not in load_bundle()
@@ -0,0 +1,34 @@
+def test_batch_scores_valid_profiles(client):
+    response = client.post("/api/recommend/batch", json={"profiles": [[3] * 10, [5] * 10], "top_n": 3})
+    assert response.status_code == 200
+    assert len(response.json()["results"]) == 2
+
+
+def test_batch_rejects_out_of_range_before_conversion(client):
+    # Un entero enorme no debe llegar a numpy (OverflowError -> 500)
+    response = client.post("/api/recommend/batch", json={"profiles": [[10 ** 30] * 10]})
+    assert response.status_code == 422
+
+
+def test_batch_rejects_zero_and_wrong_length(client):
+    assert client.post("/api/recommend/batch", json={"profiles": [[0] + [3] * 9]}).status_code == 422
+    assert client.post("/api/recommend/batch", json={"profiles": [[3] * 9]}).status_code == 422
+    assert client.post("/api/recommend/batch", json={"profiles": [[3] * 11]}).status_code == 422
+
+
+def test_batch_rejects_empty_list(client):
+    assert client.post("/api/recommend/batch", json={"profiles": []}).status_code == 422
+
+
+def test_batch_caps_profiles_in_model(client):
+    from controllers import dog_controller
+
+    limit = dog_controller.MAX_BATCH_PROFILES
+    response = client.post("/api/recommend/batch", json={"profiles": [[3] * 10] * (limit + 1)})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "too_long"
+
+    # El tope se aplica antes de validar cada perfil: no se informan errores de los perfiles
+    response = client.post("/api/recommend/batch", json={"profiles": [[0] * 10] * (limit + 1)})
+    assert response.status_code == 422
+    assert [error["type"] for error in response.json()["detail"]] == ["too_long"]
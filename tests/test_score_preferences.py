@@ -0,0 +1,176 @@
+import csv
+import json
+import multiprocessing
+import os
+import random
+
+import pytest
+
+import score_preferences
+
+FEATURES = ['size', 'energy_level', 'trainability', 'good_with_kids', 'exercise_needs',
+            'barking_tendency', 'grooming_needs', 'apartment_friendly', 'good_alone', 'watchdog_ability']
+
+
+@pytest.fixture
+def answers(tmp_path):
+    rng = random.Random(7)
+    path = tmp_path / 'respuestas.csv'
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['id'] + FEATURES)
+        for row in range(230):
+            values = [rng.randint(1, 5) for _ in FEATURES]
+            if row % 37 == 0:
+                values[row % len(FEATURES)] = 9
+            writer.writerow([f'r{row}'] + values)
+    return path
+
+
+def score(input_path, output_path, *extra):
+    return score_preferences.main([str(input_path), str(output_path), '--chunk-size', '20',
+                                   '--workers', '1', '--progress-interval', '0', *extra])
+
+
+def test_interrupted_run_resumes_from_checkpoint(answers, tmp_path, monkeypatch, capsys):
+    expected_path = tmp_path / 'esperado.csv'
+    assert score(answers, expected_path) == 0
+    expected = expected_path.read_bytes()
+
+    output = tmp_path / 'resultados.csv'
+    checkpoint = tmp_path / 'resultados.csv.checkpoint'
+    score_chunk = score_preferences._score_chunk
+    calls = []
+
+    def interrupted(*args):
+        calls.append(1)
+        if len(calls) == 5:
+            raise KeyboardInterrupt
+        return score_chunk(*args)
+
+    monkeypatch.setattr(score_preferences, '_score_chunk', interrupted)
+    assert score(answers, output) == 130
+    assert checkpoint.exists()
+    partial = output.read_bytes()
+    assert 0 < len(partial) < len(expected)
+    assert expected.startswith(partial)
+
+    # Bytes escritos tras el último checkpoint (p. ej. un bloque a medias) se descartan al retomar
+    with open(output, 'ab') as f:
+        f.write(b'r999,bloque incompleto')
+    monkeypatch.setattr(score_preferences, '_score_chunk', score_chunk)
+    capsys.readouterr()
+    assert score(answers, output) == 0
+    assert 'Retomando desde la fila' in capsys.readouterr().out
+    assert output.read_bytes() == expected
+    assert not checkpoint.exists()
+
+
+def test_checkpoint_ignored_when_options_change(answers, tmp_path, monkeypatch, capsys):
+    output = tmp_path / 'resultados.csv'
+    score_chunk = score_preferences._score_chunk
+
+    def interrupted(data, header, first_row):
+        if first_row >= 60:
+            raise KeyboardInterrupt
+        return score_chunk(data, header, first_row)
+
+    monkeypatch.setattr(score_preferences, '_score_chunk', interrupted)
+    assert score(answers, output) == 130
+    monkeypatch.setattr(score_preferences, '_score_chunk', score_chunk)
+
+    capsys.readouterr()
+    assert score(answers, output, '--top-k', '3') == 0
+    assert 'no corresponde' in capsys.readouterr().out
+    with open(output, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ['id'] + [c for rank in (1, 2, 3) for c in (f'breed_{rank}', f'similarity_{rank}')]
+    assert len(rows) == 231
+
+
+@pytest.mark.skipif('spawn' not in multiprocessing.get_all_start_methods(), reason="requiere spawn")
+def test_pool_without_fork_matches_single_process(answers, tmp_path, monkeypatch):
+    single = tmp_path / 'un_proceso.ndjson'
+    assert score(answers, single) == 0
+
+    # Plataformas sin fork (Windows, macOS por defecto): el motor viaja serializado por initargs
+    monkeypatch.setattr(multiprocessing, 'get_all_start_methods', lambda: ['spawn'])
+    assert score_preferences.pool_context().get_start_method() == 'spawn'
+    pooled = tmp_path / 'pool.ndjson'
+    assert score_preferences.main([str(answers), str(pooled), '--chunk-size', '40', '--workers', '2']) == 0
+    assert pooled.read_bytes() == single.read_bytes()
+    assert not os.path.exists(f'{pooled}.checkpoint')
+
+
+def write_lines(path, lines):
+    path.write_text(''.join(line + '\n' for line in lines), encoding='utf-8')
+    return path
+
+
+def valid_csv_line(row_id, value=3):
+    return ','.join([row_id] + [str(value)] * len(FEATURES))
+
+
+def valid_json_line(row_id, value=3):
+    return json.dumps({'id': row_id, **{feature: value for feature in FEATURES}})
+
+
+@pytest.mark.parametrize('bad_line', [
+    'b,"3,3,3',                                    # comillas sin cerrar
+    'b,' + ','.join(['3'] * len(FEATURES)) + ',9,9',  # campos de más
+])
+@pytest.mark.parametrize('bad_position', [0, 1])
+def test_malformed_csv_line_becomes_invalid_row(tmp_path, bad_line, bad_position):
+    lines = [valid_csv_line('a'), valid_csv_line('c', 4)]
+    lines.insert(bad_position, bad_line)
+    source = write_lines(tmp_path / 'respuestas.csv', ['id,' + ','.join(FEATURES)] + lines)
+    output = tmp_path / 'resultados.ndjson'
+
+    assert score(source, output) == 0
+    records = [json.loads(line) for line in output.read_text(encoding='utf-8').splitlines()]
+    assert len(records) == 3
+    assert records[bad_position] == {'id': str(bad_position), 'error': 'Línea mal formada'}
+    good = [record for i, record in enumerate(records) if i != bad_position]
+    assert [record['id'] for record in good] == ['a', 'c']
+    assert all(len(record['recommendations']) == 5 for record in good)
+
+
+def test_malformed_ndjson_lines_become_invalid_rows(tmp_path):
+    source = write_lines(tmp_path / 'respuestas.ndjson', [
+        valid_json_line('a'), '{roto', '[1, 2]', '"texto"', valid_json_line('e', 4),
+        json.dumps({feature: 2 for feature in FEATURES}),
+    ])
+    output = tmp_path / 'resultados.csv'
+
+    assert score(source, output) == 0
+    with open(output, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))[1:]
+    assert [row[0] for row in rows] == ['a', '1', '2', '3', 'e', '5']
+    assert [bool(row[1]) for row in rows] == [True, False, False, False, True, True]
+
+
+def test_malformed_line_matches_clean_output_for_other_rows(answers, tmp_path):
+    clean = tmp_path / 'limpio.csv'
+    assert score(answers, clean) == 0
+
+    lines = answers.read_text(encoding='utf-8').splitlines()
+    lines.insert(50, 'roto,"sin cerrar')
+    broken = write_lines(tmp_path / 'con_error.csv', lines)
+    output = tmp_path / 'con_error_out.csv'
+    assert score(broken, output) == 0
+
+    expected = clean.read_text(encoding='utf-8').splitlines()
+    got = output.read_text(encoding='utf-8').splitlines()
+    assert len(got) == len(expected) + 1
+    assert got[50] == '49' + ',' * (2 * 5)
+    assert got[:50] + got[51:] == expected
+
+
+def test_header_only_input(tmp_path, capsys):
+    source = write_lines(tmp_path / 'vacio.csv', ['id,' + ','.join(FEATURES)])
+    output = tmp_path / 'vacio_out.csv'
+    assert score(source, output) == 0
+    assert output.read_text(encoding='utf-8').startswith('id,breed_1,similarity_1')
+    assert len(output.read_text(encoding='utf-8').splitlines()) == 1
+    assert not os.path.exists(f'{output}.checkpoint')
+    assert '0 filas puntuadas' in capsys.readouterr().out
@@ -0,0 +1,91 @@
+import argparse
+import gc
+import os
+import time
+
+import pytest
+
+import serve_dog_api
+from controllers import dog_controller
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'), reason="requiere os.fork")
+
+
+def alive(pid: int) -> bool:
+    try:
+        finished, _ = os.waitpid(pid, os.WNOHANG)
+    except ChildProcessError:
+        return False
+    return finished == 0
+
+
+@pytest.fixture
+def supervisor(monkeypatch):
+    """Supervisor con workers simulados: 'ok' avisa que está listo, 'crash' termina, 'hang' nunca avisa"""
+    behaviour = {'mode': 'ok'}
+
+    def fake_worker(app, sock, ready_fd, worker_id, args):
+        if behaviour['mode'] == 'crash':
+            raise RuntimeError("modelo recargado inválido")
+        if behaviour['mode'] == 'ok':
+            os.write(ready_fd, b'1')
+            os.close(ready_fd)
+        time.sleep(60)
+
+    monkeypatch.setattr(serve_dog_api, 'run_worker', fake_worker)
+    monkeypatch.setattr(serve_dog_api, 'READY_TIMEOUT', 1)
+    # La recarga de modelos no es lo que se prueba aquí
+    monkeypatch.setattr(dog_controller.snapshots, 'reload', lambda reason: {'status': 'error'})
+    args = argparse.Namespace(graceful_timeout=1)
+    sup = serve_dog_api.Supervisor(app=None, sock=None, args=args)
+    sup.behaviour = behaviour
+    yield sup
+    for pid in list(sup.workers):
+        sup.stop_worker(pid)
+    # rolling_restart congela el GC (pensado para el supervisor real)
+    gc.unfreeze()
+
+
+def test_spawn_reports_readiness(supervisor):
+    pid = supervisor.spawn()
+    assert pid is not None and alive(pid)
+    assert supervisor.workers == {pid: 0}
+
+    supervisor.behaviour['mode'] = 'crash'
+    assert supervisor.spawn() is None
+    supervisor.behaviour['mode'] = 'hang'
+    assert supervisor.spawn() is None
+    # Los que no quedaron listos se detienen y no cuentan como workers
+    assert supervisor.workers == {pid: 0}
+
+
+@pytest.mark.parametrize('failure', ['crash', 'hang'])
+def test_failed_replacement_keeps_live_workers(supervisor, failure):
+    originals = [supervisor.spawn(), supervisor.spawn()]
+    assert all(pid is not None for pid in originals)
+
+    supervisor.behaviour['mode'] = failure
+    supervisor.rolling_restart()
+
+    assert sorted(supervisor.workers) == sorted(originals)
+    assert all(alive(pid) for pid in originals)
+
+
+def test_rolling_restart_replaces_every_worker(supervisor):
+    originals = [supervisor.spawn(), supervisor.spawn()]
+    supervisor.rolling_restart()
+
+    assert len(supervisor.workers) == 2
+    assert not set(supervisor.workers) & set(originals)
+    assert not any(alive(pid) for pid in originals)
+    assert all(alive(pid) for pid in supervisor.workers)
+
+
+def test_health_uptime_is_per_worker(monkeypatch):
+    from fastapi.testclient import TestClient
+    import main
+
+    # Como si el módulo se hubiera importado en el supervisor hace una hora
+    monkeypatch.setattr(main, '_process_started', time.time() - 3600)
+    with TestClient(main.app) as worker:
+        assert worker.get('/health').json()['uptime_s'] < 60
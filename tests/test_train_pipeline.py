@@ -0,0 +1,70 @@
+import threading
+import time
+
+import train_dog_model
+
+
+def test_exclusive_stage_runs_alone_on_main_thread(monkeypatch, tmp_path):
+    """La tabla de respuestas hace fork: no puede coincidir con otras etapas ni con el pool de hilos"""
+    events = []
+    lock = threading.Lock()
+
+    def stage(name, delay=0.0):
+        def run(ctx, params):
+            with lock:
+                events.append(('start', name, threading.current_thread(), list(threading.enumerate())))
+            time.sleep(delay)
+            with lock:
+                events.append(('end', name))
+            return {}
+        return run
+
+    stages = {
+        'scaler': (stage('scaler'), 1, {}, (), (), True),
+        'kmeans': (stage('kmeans', 0.1), 1, {}, ('scaler',), (), True),
+        'random_forest': (stage('random_forest', 0.3), 1, {}, ('scaler',), (), True),
+        'bundle': (stage('bundle'), 1, {}, ('scaler', 'kmeans'), (), True),
+        'answer_table': (stage('answer_table'), 1, {}, ('bundle',), (), False),
+    }
+    monkeypatch.setattr(train_dog_model, 'STAGES', stages)
+
+    ctx = train_dog_model.TrainingContext(str(tmp_path / 'dataset.col'), str(tmp_path), n_jobs=4)
+    manifest = {'version': train_dog_model.MANIFEST_VERSION, 'stages': {}}
+    ok, trained = train_dog_model.run_pipeline(ctx, manifest, {name: name for name in stages}, set(stages))
+
+    assert ok
+    assert trained[-1] == 'answer_table'
+    assert set(trained) == set(stages)
+    # Todas las demás etapas terminaron antes de empezar la exclusiva
+    assert events[-2][:2] == ('start', 'answer_table')
+    assert events[-1] == ('end', 'answer_table')
+    _, _, thread, alive = events[-2]
+    assert thread is threading.main_thread()
+    # Los hilos del pool de etapas ya terminaron
+    stage_threads = {event[2] for event in events[:-2] if event[0] == 'start'}
+    assert stage_threads and not stage_threads & set(alive)
+
+
+def test_exclusive_stage_skipped_when_dependency_fails(monkeypatch, tmp_path):
+    calls = []
+
+    def failing(ctx, params):
+        raise RuntimeError("sin datos")
+
+    def answer_table(ctx, params):
+        calls.append('answer_table')
+        return {}
+
+    stages = {
+        'bundle': (failing, 1, {}, (), (), True),
+        'answer_table': (answer_table, 1, {}, ('bundle',), (), False),
+    }
+    monkeypatch.setattr(train_dog_model, 'STAGES', stages)
+
+    ctx = train_dog_model.TrainingContext(str(tmp_path / 'dataset.col'), str(tmp_path), n_jobs=2)
+    manifest = {'version': train_dog_model.MANIFEST_VERSION, 'stages': {}}
+    ok, trained = train_dog_model.run_pipeline(ctx, manifest, {name: name for name in stages}, set(stages))
+
+    assert not ok
+    assert trained == []
+    assert calls == []
@@ -0,0 +1,124 @@
+import operator
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from controllers.trait_filter import TraitBitmapIndex, FilterSyntaxError, MAX_NESTING
+
+FEATURES = ['size', 'energy_level', 'good_alone']
+OPS = {'<': operator.lt, '<=': operator.le, '=': operator.eq, '==': operator.eq,
+       '!=': operator.ne, '>=': operator.ge, '>': operator.gt}
+
+
+@pytest.fixture(scope="module")
+def frame():
+    rng = np.random.default_rng(7)
+    # 150 filas: más de dos palabras de 64 bits, con relleno en la última
+    return pd.DataFrame(rng.integers(1, 6, size=(150, len(FEATURES))), columns=FEATURES)
+
+
+@pytest.fixture(scope="module")
+def index(frame):
+    return TraitBitmapIndex(FEATURES, frame.to_numpy())
+
+
+def rows(index, expression):
+    return index.filter(expression).tolist()
+
+
+def expected(frame, mask):
+    return np.flatnonzero(mask.to_numpy()).tolist()
+
+
+def test_single_comparisons(index, frame):
+    for op, func in OPS.items():
+        for value in range(0, 7):
+            assert rows(index, f"energy_level{op}{value}") == expected(frame, func(frame['energy_level'], value))
+
+
+def test_precedence_not_and_or(index, frame):
+    size4, energy2, alone5 = frame['size'] >= 4, frame['energy_level'] <= 2, frame['good_alone'] == 5
+    # AND se agrupa antes que OR
+    assert rows(index, "size>=4 OR energy_level<=2 AND good_alone=5") == expected(frame, size4 | (energy2 & alone5))
+    # NOT se aplica solo al término inmediato
+    assert rows(index, "NOT size>=4 AND energy_level<=2") == expected(frame, ~size4 & energy2)
+    assert rows(index, "NOT (size>=4 AND energy_level<=2)") == expected(frame, ~(size4 & energy2))
+    assert rows(index, "(size>=4 OR energy_level<=2) AND good_alone=5") == expected(frame, (size4 | energy2) & alone5)
+
+
+def test_keywords_are_case_insensitive(index):
+    assert rows(index, "size>=4 and not energy_level<=2") == rows(index, "size>=4 AND NOT energy_level<=2")
+
+
+def test_empty_expression_matches_everything(index, frame):
+    assert rows(index, "   ") == list(range(len(frame)))
+
+
+def test_not_never_sets_padding_bits(index):
+    bits = index.evaluate("NOT size>=1")
+    assert index.count(bits) == 0
+
+
+@pytest.mark.parametrize("expression, message", [
+    ("weight>=3", "Característica desconocida 'weight'"),
+    ("size>=", "Se esperaba number"),
+    ("size 3", "Se esperaba op"),
+    ("(size>=3", "Se esperaba )"),
+    ("size>=3)", "Token inesperado ')'"),
+    ("size>=3 AND", "Se esperaba word"),
+    ("size>=3 $ 4", "Carácter inesperado en la posición 8"),
+])
+def test_error_messages(index, expression, message):
+    with pytest.raises(FilterSyntaxError, match=message.replace('(', r'\(').replace(')', r'\)').replace('$', r'\$')):
+        index.evaluate(expression)
+
+
+def test_nesting_limit(index, frame):
+    ok = "(" * MAX_NESTING + "size>=3" + ")" * MAX_NESTING
+    assert rows(index, ok) == expected(frame, frame['size'] >= 3)
+    for expression in ("(" * (MAX_NESTING + 1) + "size>=3" + ")" * (MAX_NESTING + 1),
+                       "NOT " * (MAX_NESTING + 1) + "size>=3",
+                       "(" * 494 + "size>=3" + ")" * 494):
+        with pytest.raises(FilterSyntaxError, match="anidados"):
+            index.evaluate(expression)
+
+
+def _random_expression(rng, frame, depth=0):
+    """(expresión, máscara de pandas equivalente)"""
+    choice = rng.random()
+    if depth >= 4 or choice < 0.35:
+        feature, op, value = rng.choice(FEATURES), rng.choice(list(OPS)), rng.randint(0, 6)
+        return f"{feature}{op}{value}", OPS[op](frame[feature], value)
+    if choice < 0.5:
+        text, mask = _random_expression(rng, frame, depth + 1)
+        return f"NOT ({text})", ~mask
+    left, left_mask = _random_expression(rng, frame, depth + 1)
+    right, right_mask = _random_expression(rng, frame, depth + 1)
+    if choice < 0.75:
+        return f"({left}) AND ({right})", left_mask & right_mask
+    return f"({left}) OR ({right})", left_mask | right_mask
+
+
+def test_bitmaps_match_pandas(index, frame):
+    rng = random.Random(11)
+    for _ in range(300):
+        expression, mask = _random_expression(rng, frame)
+        assert rows(index, expression) == expected(frame, mask), expression
+
+
+@pytest.mark.parametrize("path", ["/api/breeds/filter?where=", "/api/breeds?where="])
+def test_deep_nesting_is_a_422_over_http(client, path):
+    # Sin límite de anidamiento esto agotaba la pila (RecursionError -> 500)
+    where = "(" * 490 + "size=3"
+    assert len(where) <= 500
+    assert client.get(path + where).status_code == 422
+
+
+def test_deep_nesting_in_recommend_constraints_is_a_422(client):
+    form = {feature: "3" for feature in ['size', 'energy_level', 'trainability', 'good_with_kids', 'exercise_needs',
+                                          'barking_tendency', 'grooming_needs', 'apartment_friendly', 'good_alone',
+                                          'watchdog_ability']}
+    form['constraints'] = "(" * 490 + "size=3"
+    assert client.post("/recommend", data=form).status_code == 422
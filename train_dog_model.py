@@ -1,110 +1,389 @@
+"""Entrenamiento incremental de los modelos de recomendación de razas
+
+Uso:
+    python train_dog_model.py                    # solo reentrena las etapas cuyas entradas cambiaron
+    python train_dog_model.py --answer-table     # incluye la tabla de respuestas precalculada
+    python train_dog_model.py --force            # reentrena todo
+    python train_dog_model.py --force kmeans     # reentrena solo esas etapas (y nada más)
+    python train_dog_model.py --n-jobs 4         # núcleos para etapas en paralelo y Random Forest
+    python train_dog_model.py --dry-run          # muestra qué etapas se ejecutarían
+
+Cada etapa tiene una clave: el hash de su nombre, versión, parámetros, las
+entradas de las que depende (hash del CSV y claves de las etapas previas) y
+la versión de scikit-learn. Si la clave coincide con la del manifiesto
+(models/training_manifest.json) y sus artefactos siguen en disco con el
+mismo hash, la etapa se omite. Las etapas independientes (KMeans, Random
+Forest, KNN, metadatos) corren a la vez en hilos; scikit-learn libera el GIL
+en su trabajo pesado.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
 import joblib
-import pandas as pd
 import numpy as np
-from sklearn.cluster import KMeans
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import accuracy_score, classification_report
-import os
+import sklearn
+
+MODEL_FOLDER = 'models'
+MANIFEST_PATH = os.path.join(MODEL_FOLDER, 'training_manifest.json')
+MANIFEST_VERSION = 1
+
+FEATURE_DESCRIPTIONS = {
+    'size': 'Tamaño (1=muy pequeño, 5=muy grande)',
+    'energy_level': 'Nivel de energía (1=tranquilo, 5=muy activo)',
+    'trainability': 'Facilidad de entrenamiento (1=difícil, 5=fácil)',
+    'good_with_kids': 'Bueno con niños (1=no recomendado, 5=excelente)',
+    'exercise_needs': 'Necesidades de ejercicio (1=poco, 5=mucho)',
+    'barking_tendency': 'Tendencia a ladrar (1=silencioso, 5=ladra mucho)',
+    'grooming_needs': 'Necesidades de cuidado (1=poco, 5=mucho)',
+    'apartment_friendly': 'Apto para apartamento (1=no, 5=perfecto)',
+    'good_alone': 'Tolera estar solo (1=no tolera, 5=muy independiente)',
+    'watchdog_ability': 'Capacidad de guardia (1=no protector, 5=excelente guardián)'
+}
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def dump_atomic(obj, path: str) -> None:
+    """joblib.dump a un temporal y rename: el watcher del servidor nunca ve un pickle a medias"""
+    tmp_path = f'{path}.tmp'
+    joblib.dump(obj, tmp_path)
+    os.replace(tmp_path, path)
+
+
+class TrainingContext:
+    """Datos compartidos entre etapas: el dataset se lee una sola vez y bajo demanda"""
+
+    def __init__(self, dataset_path: str, model_folder: str, n_jobs: int):
+        self.dataset_path = dataset_path
+        self.model_folder = model_folder
+        self.n_jobs = n_jobs
+        self._lock = threading.Lock()
+        self._dataset = None
+        self._scaled = None
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.model_folder, name)
+
+    @property
+    def dataset(self):
+        """(razas, características, matriz int8 si el dataset es columnar)"""
+        with self._lock:
+            if self._dataset is None:
+                from controllers.columnar_dataset import read_traits
+                self._dataset = read_traits(self.dataset_path)
+            return self._dataset
 
-model_folder = 'models'
-
-# Crear la carpeta 'models' si no existe
-if not os.path.exists(model_folder):
-    os.makedirs(model_folder)
-
-print("=== ENTRENANDO MODELOS PARA RECOMENDACIÓN DE RAZAS DE PERROS ===\n")
-
-# Cargar el dataset
-df = pd.read_csv('data/dog_breeds_dataset.csv')
-print(f"Dataset cargado: {len(df)} razas de perros")
-print(f"Características: {list(df.columns)[1:]}")
-
-# Preparar los datos
-X = df.drop('breed', axis=1).to_numpy()  # Características
-y = df['breed'].to_numpy()  # Razas (etiquetas)
-breed_names = df['breed'].unique()
-
-print(f"\nRazas incluidas ({len(breed_names)}):")
-for i, breed in enumerate(breed_names):
-    print(f"{i+1:2}. {breed}")
-
-# Normalizar las características
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
-
-# Guardar el scaler
-joblib.dump(scaler, f'{model_folder}/dog_scaler.pkl')
-print(f"\nScaler guardado en {model_folder}/dog_scaler.pkl")
-
-# ===== MODELO KMEANS (Clustering de perros similares) =====
-print("\n=== ENTRENANDO MODELO KMEANS (CLUSTERING) ===")
-kmeans = KMeans(n_clusters=5, random_state=42)  # 5 grupos de perros similares
-kmeans.fit(X_scaled)
-
-# Guardar el modelo KMeans
-joblib.dump(kmeans, f'{model_folder}/dog_kmeans_model.pkl')
-print("✓ Modelo KMeans guardado para agrupar perros similares")
-
-# ===== MODELO RANDOM FOREST (Clasificación de razas) =====
-print("\n=== ENTRENANDO MODELO RANDOM FOREST ===")
-# Dividir datos
-X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, test_size=0.3, random_state=42)
-
-# Crear y entrenar modelo
-rf_model = RandomForestClassifier(n_estimators=100, random_state=42, min_samples_leaf=1, max_features='sqrt')
-rf_model.fit(X_train, y_train)
-
-# Evaluar modelo
-y_pred = rf_model.predict(X_test)
-accuracy = accuracy_score(y_test, y_pred)
-print(f"✓ Precisión del modelo Random Forest: {accuracy:.4f}")
-
-# Guardar el modelo
-joblib.dump(rf_model, f'{model_folder}/dog_rf_model.pkl')
-
-# ===== MODELO KNN (Recomendación basada en similitud) =====
-print("\n=== ENTRENANDO MODELO KNN ===")
-knn_model = KNeighborsClassifier(n_neighbors=3)
-knn_model.fit(X_train, y_train)
-
-# Evaluar KNN
-y_pred_knn = knn_model.predict(X_test)
-accuracy_knn = accuracy_score(y_test, y_pred_knn)
-print(f"✓ Precisión del modelo KNN: {accuracy_knn:.4f}")
-
-# Guardar el modelo KNN
-joblib.dump(knn_model, f'{model_folder}/dog_knn_model.pkl')
-
-# Guardar información adicional
-breed_info = {
-    'breeds': list(breed_names),
-    'features': list(df.columns)[1:],
-    'feature_descriptions': {
-        'size': 'Tamaño (1=muy pequeño, 5=muy grande)',
-        'energy_level': 'Nivel de energía (1=tranquilo, 5=muy activo)',
-        'trainability': 'Facilidad de entrenamiento (1=difícil, 5=fácil)',
-        'good_with_kids': 'Bueno con niños (1=no recomendado, 5=excelente)',
-        'exercise_needs': 'Necesidades de ejercicio (1=poco, 5=mucho)',
-        'barking_tendency': 'Tendencia a ladrar (1=silencioso, 5=ladra mucho)',
-        'grooming_needs': 'Necesidades de cuidado (1=poco, 5=mucho)',
-        'apartment_friendly': 'Apto para apartamento (1=no, 5=perfecto)',
-        'good_alone': 'Tolera estar solo (1=no tolera, 5=muy independiente)',
-        'watchdog_ability': 'Capacidad de guardia (1=no protector, 5=excelente guardián)'
+    def scaled(self):
+        """(X escalado, y) con el scaler del disco, recién entrenado u omitido"""
+        breeds, _, traits = self.dataset
+        with self._lock:
+            if self._scaled is None:
+                scaler = joblib.load(self.path('dog_scaler.pkl'))
+                self._scaled = (scaler.transform(traits), np.array(breeds, dtype=object))
+            return self._scaled
+
+    def split(self):
+        from sklearn.model_selection import train_test_split
+        X_scaled, y = self.scaled()
+        return train_test_split(X_scaled, y, test_size=0.3, random_state=42)
+
+
+# ===== Etapas =====
+# Cada función entrena y guarda sus artefactos; retorna métricas para el manifiesto
+
+def train_scaler(ctx: TrainingContext, params: dict) -> dict:
+    from sklearn.preprocessing import StandardScaler
+    _, _, traits = ctx.dataset
+    dump_atomic(StandardScaler().fit(traits), ctx.path('dog_scaler.pkl'))
+    return {}
+
+
+def train_kmeans(ctx: TrainingContext, params: dict) -> dict:
+    from sklearn.cluster import KMeans
+    X_scaled, _ = ctx.scaled()
+    kmeans = KMeans(n_clusters=params['n_clusters'], random_state=params['random_state'])
+    kmeans.fit(X_scaled)
+    dump_atomic(kmeans, ctx.path('dog_kmeans_model.pkl'))
+    return {'inertia': round(float(kmeans.inertia_), 4)}
+
+
+def train_random_forest(ctx: TrainingContext, params: dict) -> dict:
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import accuracy_score
+    X_train, X_test, y_train, y_test = ctx.split()
+    # n_jobs no cambia el resultado (random_state fija cada árbol), por eso no forma parte de la clave
+    rf_model = RandomForestClassifier(n_jobs=ctx.n_jobs, **params)
+    rf_model.fit(X_train, y_train)
+    accuracy = accuracy_score(y_test, rf_model.predict(X_test))
+    rf_model.n_jobs = None
+    dump_atomic(rf_model, ctx.path('dog_rf_model.pkl'))
+    return {'accuracy': round(float(accuracy), 4)}
+
+
+def train_knn(ctx: TrainingContext, params: dict) -> dict:
+    from sklearn.neighbors import KNeighborsClassifier
+    from sklearn.metrics import accuracy_score
+    X_train, X_test, y_train, y_test = ctx.split()
+    knn_model = KNeighborsClassifier(**params)
+    knn_model.fit(X_train, y_train)
+    accuracy = accuracy_score(y_test, knn_model.predict(X_test))
+    dump_atomic(knn_model, ctx.path('dog_knn_model.pkl'))
+    return {'accuracy': round(float(accuracy), 4)}
+
+
+def write_breed_info(ctx: TrainingContext, params: dict) -> dict:
+    breeds, features, _ = ctx.dataset
+    breed_info = {
+        'breeds': list(dict.fromkeys(breeds)),
+        'features': list(features),
+        'feature_descriptions': FEATURE_DESCRIPTIONS,
     }
+    path = ctx.path('breed_info.json')
+    with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+        json.dump(breed_info, f, ensure_ascii=False, indent=2)
+    os.replace(f'{path}.tmp', path)
+    return {'breeds': len(breed_info['breeds'])}
+
+
+def _serving_engine(ctx: TrainingContext):
+    from controllers.recommendation_engine import RecommendationEngine
+    return RecommendationEngine.from_scaler(joblib.load(ctx.path('dog_scaler.pkl')), *ctx.dataset)
+
+
+def write_serving_bundle(ctx: TrainingContext, params: dict) -> dict:
+    # Scaler, matriz de razas escalada/normalizada, centroides KMeans, razas y orden de
+    # características en un solo archivo versionado que dog_controller carga sin copia
+    from controllers.model_bundle import write_bundle
+    engine = _serving_engine(ctx)
+    kmeans = joblib.load(ctx.path('dog_kmeans_model.pkl'))
+    bundle_arrays = engine.bundle_arrays()
+    bundle_arrays['kmeans_centroids'] = kmeans.cluster_centers_.astype(np.float32)
+    bundle_arrays['kmeans_labels'] = kmeans.labels_.astype(np.int32)
+    write_bundle(ctx.path('dog_model_bundle.bin'), engine.breeds, engine.features, bundle_arrays,
+                 metadata={'fingerprint': engine.fingerprint, 'sklearn_version': sklearn.__version__})
+    return {'fingerprint': engine.fingerprint}
+
+
+def build_answers(ctx: TrainingContext, params: dict) -> dict:
+    # Top-k para los 5^10 perfiles posibles (~50 MB); dog_controller la mapea en memoria
+    from controllers.answer_table import build_answer_table
+    build_answer_table(_serving_engine(ctx), ctx.path('dog_answer_table.bin'), k=params['k'],
+                       workers=ctx.n_jobs)
+    return {}
+
+
+# nombre -> (función, versión, parámetros, etapas de las que depende, artefactos, usa el CSV)
+# Subir la versión de una etapa invalida su clave (y la de las que dependen de ella)
+STAGES = {
+    'scaler': (train_scaler, 1, {}, (), ('dog_scaler.pkl',), True),
+    'breed_info': (write_breed_info, 1, {'descriptions': FEATURE_DESCRIPTIONS}, (), ('breed_info.json',), True),
+    'kmeans': (train_kmeans, 1, {'n_clusters': 5, 'random_state': 42},
+               ('scaler',), ('dog_kmeans_model.pkl',), True),
+    'random_forest': (train_random_forest, 1,
+                      {'n_estimators': 100, 'random_state': 42, 'min_samples_leaf': 1, 'max_features': 'sqrt'},
+                      ('scaler',), ('dog_rf_model.pkl',), True),
+    'knn': (train_knn, 1, {'n_neighbors': 3}, ('scaler',), ('dog_knn_model.pkl',), True),
+    'bundle': (write_serving_bundle, 2, {}, ('scaler', 'kmeans'), ('dog_model_bundle.bin',), True),
+    'answer_table': (build_answers, 1, {'k': 5}, ('bundle',), ('dog_answer_table.bin',), False),
 }
 
-import json
-with open(f'{model_folder}/breed_info.json', 'w', encoding='utf-8') as f:
-    json.dump(breed_info, f, ensure_ascii=False, indent=2)
+OPTIONAL_STAGES = {'answer_table'}
+
+# Etapas que hacen fork de un pool de procesos: se ejecutan en el hilo principal cuando
+# el pool de hilos ya terminó, nunca con otras etapas (sklearn/joblib/BLAS) en curso
+EXCLUSIVE_STAGES = {'answer_table'}
+
+
+def stage_key(name: str, dataset_hash: str, keys: dict) -> str:
+    _, version, params, deps, _, uses_dataset = STAGES[name]
+    payload = {
+        'stage': name,
+        'version': version,
+        'params': params,
+        'dataset': dataset_hash if uses_dataset else None,
+        'deps': {dep: keys[dep] for dep in deps},
+        'sklearn': sklearn.__version__,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def load_manifest(path: str) -> dict:
+    try:
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') == MANIFEST_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {'version': MANIFEST_VERSION, 'stages': {}}
+
+
+def save_manifest(manifest: dict, path: str) -> None:
+    with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(f'{path}.tmp', path)
+
+
+def is_up_to_date(ctx: TrainingContext, name: str, key: str, entry: dict) -> bool:
+    """Misma clave y artefactos intactos (existentes y con el hash registrado)"""
+    if not entry or entry.get('key') != key:
+        return False
+    recorded = entry.get('artifacts', {})
+    for artifact in STAGES[name][4]:
+        path = ctx.path(artifact)
+        if artifact not in recorded or not os.path.exists(path) or file_sha256(path) != recorded[artifact]:
+            return False
+    return True
+
+
+def plan(ctx: TrainingContext, manifest: dict, dataset_hash: str, selected, force) -> dict:
+    """Retorna {etapa: clave} de las etapas seleccionadas y el conjunto a ejecutar"""
+    keys, pending = {}, set()
+    for name in STAGES:                 # STAGES está en orden topológico
+        keys[name] = stage_key(name, dataset_hash, keys)
+        if name not in selected:
+            continue
+        if force is not None and (not force or name in force):
+            pending.add(name)
+        elif not is_up_to_date(ctx, name, keys[name], manifest['stages'].get(name)):
+            pending.add(name)
+    return keys, pending
+
+
+def run_stage(ctx: TrainingContext, name: str, key: str) -> dict:
+    func, version, params, deps, artifacts, _ = STAGES[name]
+    started = time.perf_counter()
+    metrics = func(ctx, params)
+    elapsed = time.perf_counter() - started
+    print(f"✓ {name}: {elapsed:.2f}s {metrics if metrics else ''}".rstrip())
+    return {
+        'key': key,
+        'version': version,
+        'params': params,
+        'deps': list(deps),
+        'artifacts': {artifact: file_sha256(ctx.path(artifact)) for artifact in artifacts},
+        'metrics': metrics,
+        'seconds': round(elapsed, 4),
+        'trained_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+
+
+def run_pipeline(ctx: TrainingContext, manifest: dict, keys: dict, pending: set):
+    """Ejecuta las etapas pendientes en cuanto sus dependencias terminaron; retorna (ok, entrenadas)"""
+    done = {name for name in STAGES if name not in pending}
+    trained, failed = [], set()
+    running = {}
+
+    def skip_if_dependency_failed(name: str) -> bool:
+        if any(dep in failed for dep in STAGES[name][3]):
+            pending.discard(name)
+            failed.add(name)
+            print(f"Etapa {name} omitida: falló una dependencia")
+            return True
+        return False
+
+    def record(name: str, run) -> None:
+        try:
+            manifest['stages'][name] = run()
+            done.add(name)
+            trained.append(name)
+        except Exception as e:
+            print(f"Error en la etapa {name}: {e}")
+            failed.add(name)
+
+    with ThreadPoolExecutor(max_workers=max(1, ctx.n_jobs)) as executor:
+        while pending or running:
+            for name in [n for n in STAGES if n in pending and n not in EXCLUSIVE_STAGES]:
+                if not skip_if_dependency_failed(name) and all(dep in done for dep in STAGES[name][3]):
+                    pending.discard(name)
+                    running[executor.submit(run_stage, ctx, name, keys[name])] = name
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                record(running.pop(future), future.result)
+
+    # Con el pool de hilos ya cerrado, las etapas exclusivas corren de a una en este hilo
+    for name in [n for n in STAGES if n in pending]:
+        if not skip_if_dependency_failed(name):
+            pending.discard(name)
+            record(name, lambda: run_stage(ctx, name, keys[name]))
+    return not failed, trained
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Entrena (de forma incremental) los modelos de razas de perros")
+    parser.add_argument('--dataset', help="Dataset columnar o CSV (por defecto el columnar si existe)")
+    parser.add_argument('--models', default=MODEL_FOLDER, help="Carpeta de artefactos")
+    parser.add_argument('--answer-table', action='store_true',
+                        help="Genera también la tabla de respuestas precalculada (~50 MB)")
+    parser.add_argument('--force', nargs='*', choices=list(STAGES), metavar='ETAPA',
+                        help="Reentrena sin consultar el manifiesto (todas, o solo las indicadas)")
+    parser.add_argument('--n-jobs', type=int, default=os.cpu_count() or 1,
+                        help="Núcleos para etapas en paralelo, Random Forest y la tabla de respuestas")
+    parser.add_argument('--dry-run', action='store_true', help="Solo muestra el plan")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.models, exist_ok=True)
+    if os.path.dirname(os.path.abspath(__file__)) not in sys.path:
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    print("=== ENTRENANDO MODELOS PARA RECOMENDACIÓN DE RAZAS DE PERROS ===\n")
+    started = time.perf_counter()
+    from controllers.columnar_dataset import resolve_dataset_path
+    args.dataset = args.dataset or resolve_dataset_path()
+    ctx = TrainingContext(args.dataset, args.models, args.n_jobs)
+    manifest_path = os.path.join(args.models, os.path.basename(MANIFEST_PATH))
+    manifest = load_manifest(manifest_path)
+    dataset_hash = file_sha256(args.dataset)
+
+    selected = [name for name in STAGES if name not in OPTIONAL_STAGES or args.answer_table]
+    keys, pending = plan(ctx, manifest, dataset_hash, selected, args.force)
+    for name in selected:
+        print(f"  {name:<15} {'entrenar' if name in pending else 'sin cambios'}")
+    print()
+    if args.dry_run:
+        return 0
+
+    if pending:
+        breeds, features, _ = ctx.dataset
+        print(f"Dataset cargado: {len(breeds)} razas de perros")
+        print(f"Características: {features}\n")
+    ok, trained = run_pipeline(ctx, manifest, keys, set(pending))
+
+    manifest['dataset'] = {'path': args.dataset, 'sha256': dataset_hash}
+    manifest['sklearn_version'] = sklearn.__version__
+    manifest['last_run'] = {
+        'finished_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'seconds': round(time.perf_counter() - started, 4),
+        'trained': trained,
+        'n_jobs': args.n_jobs,
+        'ok': ok,
+    }
+    save_manifest(manifest, manifest_path)
+
+    print("\n=== RESUMEN DE MODELOS ===")
+    for name in selected:
+        entry = manifest['stages'].get(name, {})
+        state = 'entrenado' if name in trained else ('error' if name in pending else 'sin cambios')
+        metrics = entry.get('metrics') or ''
+        print(f"✓ {name:<15} {state:<12} {entry.get('seconds', 0):7.2f}s {metrics}".rstrip())
+    print(f"\nArtefactos en '{args.models}/', manifiesto en {manifest_path} "
+          f"({manifest['last_run']['seconds']:.2f}s en total)")
+    return 0 if ok else 1
 
-print("\n=== RESUMEN DE MODELOS ENTRENADOS ===")
-print("✓ KMeans: Clustering de razas similares")
-print(f"✓ Random Forest: Clasificación de razas (precisión: {accuracy:.4f})")
-print(f"✓ KNN: Recomendación por similitud (precisión: {accuracy_knn:.4f})")
-print("✓ Scaler: Normalización de características")
-print("✓ Información de razas: JSON con metadatos")
 
-print(f"\nTodos los modelos guardados en '{model_folder}/'")
\ No newline at end of file
+if __name__ == '__main__':
+    sys.exit(main())